@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Table-aware Markdown conversion for atwiki pages
+atwiki tables use rowspan/colspan heavily (character pages, page 57), which
+markdownify flattens into misaligned rows. This module expands spans into a
+rectangular grid in one pass over the rows and renders it as either
+- GFM pipe tables with spans expanded (every cell filled), or
+- clean embedded HTML (Option B from extract_html_tables.py)
+Non-table content is still handled by markdownify.
+"""
+
+import re
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from markdownify import MarkdownConverter
+
+# "auto" keeps spanned tables as HTML and renders simple tables as GFM
+TABLE_STYLES = ("gfm", "html", "auto")
+
+# Cells that hold values rather than labels (050, 58/256(22.7%), 187F, 1.55本, -)
+_VALUE_CELL = re.compile(r'^[-+]?[\d.,/()%]+[F本%]?$|^-$')
+
+def _span(cell, attr):
+    """Read a rowspan/colspan attribute, tolerating junk values"""
+    try:
+        return max(1, int(cell.get(attr, 1)))
+    except (TypeError, ValueError):
+        return 1
+
+def _table_rows(table):
+    """Rows that belong to this table (not to nested tables)"""
+    rows = []
+    for child in table.children:
+        if not isinstance(child, Tag):
+            continue
+        if child.name == "tr":
+            rows.append(child)
+        elif child.name in ("thead", "tbody", "tfoot"):
+            rows.extend(c for c in child.children if isinstance(c, Tag) and c.name == "tr")
+    return rows
+
+def cell_text(cell):
+    """Plain text of a cell with <br> kept as a line break marker"""
+    parts = []
+    for node in cell.descendants:
+        if isinstance(node, Comment):
+            continue
+        if isinstance(node, NavigableString):
+            parts.append(str(node))
+        elif node.name == "br":
+            parts.append("\n")
+    text = "".join(parts)
+    lines = [re.sub(r'\s+', ' ', line).strip() for line in text.split("\n")]
+    return "\n".join(line for line in lines if line)
+
+def _escape_html(text, quote=False):
+    """Escape text for embedded HTML (and attribute values with quote=True)"""
+    text = text.replace("&", "&amp;").replace("<", "&lt;")
+    return text.replace('"', "&quot;") if quote else text
+
+def cell_html(cell):
+    """Escaped cell contents for render_html with <br> as a line break and <a href> links kept"""
+    def walk(node):
+        parts = []
+        for child in node.children:
+            if isinstance(child, Comment):
+                continue
+            if isinstance(child, NavigableString):
+                parts.append(_escape_html(str(child)))
+            elif child.name == "br":
+                parts.append("\n")
+            elif child.name == "a" and child.get("href"):
+                parts.append(f'<a href="{_escape_html(child["href"], quote=True)}">{walk(child)}</a>')
+            else:
+                parts.append(walk(child))
+        return "".join(parts)
+
+    lines = [re.sub(r'\s+', ' ', line).strip() for line in walk(cell).split("\n")]
+    return "<br/>".join(line for line in lines if line)
+
+def expand_table(table, text_fn=cell_text):
+    """
+    Expand a <table> into a rectangular grid in a single pass
+
+    Returns (grid, origin) where grid[r][c] is the cell text and origin[r][c]
+    is (row, col) of the source cell that covers it, so callers can tell
+    spanned copies from real cells.
+    """
+    grid = []
+    origin = []
+    carry = {}  # column -> (rows_left, text, origin)
+
+    for r, row in enumerate(_table_rows(table)):
+        out_text = []
+        out_origin = []
+        col = 0
+
+        def fill_carried():
+            nonlocal col
+            while col in carry:
+                rows_left, text, src = carry[col]
+                out_text.append(text)
+                out_origin.append(src)
+                if rows_left <= 1:
+                    del carry[col]
+                else:
+                    carry[col] = (rows_left - 1, text, src)
+                col += 1
+
+        for cell in row.children:
+            if not isinstance(cell, Tag) or cell.name not in ("td", "th"):
+                continue
+            fill_carried()
+            text = text_fn(cell)
+            rowspan = _span(cell, "rowspan")
+            colspan = _span(cell, "colspan")
+            src = (r, col)
+            for _ in range(colspan):
+                out_text.append(text)
+                out_origin.append(src)
+                if rowspan > 1:
+                    carry[col] = (rowspan - 1, text, src)
+                col += 1
+
+        # Trailing cells spanned from rows above
+        fill_carried()
+        while carry and col <= max(carry):
+            if col in carry:
+                fill_carried()
+            else:
+                out_text.append("")
+                out_origin.append(None)
+                col += 1
+
+        grid.append(out_text)
+        origin.append(out_origin)
+
+    width = max((len(row) for row in grid), default=0)
+    for row_text, row_origin in zip(grid, origin):
+        row_text.extend([""] * (width - len(row_text)))
+        row_origin.extend([None] * (width - len(row_origin)))
+
+    return grid, origin
+
+def is_carried_row(row_origin, r):
+    """True if every cell of row r is a rowspan copy from an earlier row"""
+    return all(src is None or src[0] < r for src in row_origin) and \
+        any(src is not None for src in row_origin)
+
+def has_spans(table):
+    """True if any cell of the table spans rows or columns"""
+    for row in _table_rows(table):
+        for cell in row.find_all(["td", "th"], recursive=False):
+            if _span(cell, "rowspan") > 1 or _span(cell, "colspan") > 1:
+                return True
+    return False
+
+def header_row_count(table, grid):
+    """
+    Number of leading label-only rows
+    atwiki tables use <td> for headers, so a header block is the first row's
+    tallest rowspan, provided none of those rows hold values.
+    """
+    rows = _table_rows(table)
+    if not rows or not grid:
+        return 0
+
+    if all(c.name == "th" for c in rows[0].find_all(["td", "th"], recursive=False)):
+        count = 0
+        for row in rows:
+            cells = row.find_all(["td", "th"], recursive=False)
+            if cells and all(c.name == "th" for c in cells):
+                count += 1
+            else:
+                break
+        return count
+
+    first = rows[0].find_all(["td", "th"], recursive=False)
+    count = max((_span(c, "rowspan") for c in first), default=1)
+    count = min(count, len(grid))
+    for row in grid[:count]:
+        if any(_VALUE_CELL.match(text) for text in row if text):
+            return 0
+    return count
+
+def _escape_gfm(text):
+    """Escape a cell for a GFM pipe table"""
+    return text.replace("|", "\\|").replace("\n", "<br>")
+
+def render_gfm(grid, header_rows=1):
+    """Render an expanded grid as a GFM pipe table"""
+    if not grid:
+        return ""
+    width = len(grid[0])
+
+    if header_rows:
+        # GFM has a single header row: stack multi-row headers per column
+        header = []
+        for c in range(width):
+            labels = []
+            for row in grid[:header_rows]:
+                if row[c] and row[c] not in labels:
+                    labels.append(row[c])
+            header.append(" ".join(labels))
+        body = grid[header_rows:]
+    else:
+        header = [""] * width
+        body = grid
+
+    lines = [
+        "| " + " | ".join(_escape_gfm(h) for h in header) + " |",
+        "| " + " | ".join(["---"] * width) + " |",
+    ]
+    for row in body:
+        lines.append("| " + " | ".join(_escape_gfm(text) for text in row) + " |")
+    return "\n".join(lines)
+
+def render_html(table):
+    """Render a table as clean HTML keeping only rowspan/colspan/text-align, <br> and links"""
+    out = ["<table>"]
+    for row in _table_rows(table):
+        cells = []
+        for cell in row.find_all(["td", "th"], recursive=False):
+            attrs = ""
+            rowspan = _span(cell, "rowspan")
+            colspan = _span(cell, "colspan")
+            if colspan > 1:
+                attrs += f' colspan="{colspan}"'
+            if rowspan > 1:
+                attrs += f' rowspan="{rowspan}"'
+            style = cell.get("style", "")
+            if "text-align:center" in style.replace(" ", ""):
+                attrs += ' style="text-align:center;"'
+            elif "text-align:right" in style.replace(" ", ""):
+                attrs += ' style="text-align:right;"'
+            cells.append(f"<{cell.name}{attrs}>{cell_html(cell)}</{cell.name}>")
+        out.append("<tr>" + "".join(cells) + "</tr>")
+    out.append("</table>")
+    return "\n".join(out)
+
+def render_table(table, style="auto", text_fn=cell_text):
+    """Render a <table> Tag in the requested style"""
+    if style not in TABLE_STYLES:
+        raise ValueError(f"Unknown table style: {style}")
+    if style == "html" or (style == "auto" and has_spans(table)):
+        return render_html(table)
+    grid, origin = expand_table(table, text_fn)
+    header_rows = header_row_count(table, grid)
+
+    # atwiki pads rowspan blocks with empty <tr> rows; they repeat the row above
+    body = [row for r, row in enumerate(grid[header_rows:], start=header_rows)
+            if not is_carried_row(origin[r], r)]
+    return render_gfm(grid[:header_rows] + body, header_rows)
+
+class AtwikiMarkdownConverter(MarkdownConverter):
+    """markdownify converter that hands tables to the span-aware renderer"""
+
+    def __init__(self, table_style="auto", **options):
+        super().__init__(**options)
+        self.table_style = table_style
+
+    def process_tag(self, node, *args, **kwargs):
+        # Render tables directly instead of converting every cell first
+        if node.name == "table" and node.find_parent("table") is None:
+            return "\n\n" + render_table(node, self.table_style, self._cell_markdown) + "\n\n"
+        return super().process_tag(node, *args, **kwargs)
+
+    def _cell_markdown(self, cell):
+        """Cell text, falling back to inline Markdown for cells with links/images"""
+        if cell.find(["a", "img", "b", "strong", "em", "i"]) is None:
+            return cell_text(cell)
+        inner = "".join(str(c) for c in cell.children if not isinstance(c, Comment))
+        inner = re.sub(r'<br\s*/?>', '\n', inner)
+        text = MarkdownConverter(**self.options).convert(inner)
+        lines = [re.sub(r'\s+', ' ', line).strip() for line in text.split("\n")]
+        return "\n".join(line for line in lines if line)
+
+def convert_html(html, table_style="auto", **options):
+    """Convert HTML (string or soup) to Markdown with span-aware tables"""
+    if not isinstance(html, str):
+        html = str(html)
+    return AtwikiMarkdownConverter(table_style=table_style, **options).convert(html)
+
+def tables_in_markdown(markdown_text):
+    """Expanded grids for every embedded HTML <table> in a Markdown document"""
+    soup = BeautifulSoup(markdown_text, "html.parser")
+    return [expand_table(table)[0] for table in soup.find_all("table")
+            if table.find_parent("table") is None]
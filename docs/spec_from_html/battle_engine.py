@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Turn-level battle model for search
+A state holds both sides' HP (8.8 fixed), touki, balance, reiki, item stock
+and airborne flag, plus who has the initiative (先手). One turn is both sides
+picking a command; outcome() returns the exact chance distribution over next
+states from the judgment pages and the RNG damage distribution:
+- attack vs attack: the attack judgment (judgment_sim), or the collision
+  judgment (collision_sim) when two 飛び that can 相殺 meet
+- attack vs non-attack: the guard judgment (guard_sim) in either order
+- damage: damage_table over the RNG in DAMAGE_BUCKETS equal-width buckets
+  (damage_buckets=64 is every RNG value, the exact distribution)
+
+Rules modelled (018/013/022/023):
+- attacks cost reiki; the crystal ball pays orbs by success judgment
+- balance >= 256 is a knockdown: the side cannot act next turn, then recovers
+- items (霊/気/愛) from the stock, jump to the air, 無行動
+- 地上 has no graze and, like ground 接触, cannot reach an airborne target;
+  air 接触 on a grounded target deals x1.25 and lands; a direct hit lands the
+  target (except 飛び(蝕み)); a 後手 jump that is hit directly goes down
+- 相殺 through (つきぬけ) hits directly, 減衰 at 3/4 damage and balance
+- 防御 only as 後手: 受ける turns a graze into a 3/8 block and recovers 120
+  balance, かわす costs 56 balance (never a knockdown), ガード nullifies all
+  but a direct hit; each has its 013 reach and 回避率 factors
+Other 技 (即効, フィールド, キャンセル) pay their reiki and are judged with
+their 回避率, but their effects are not modelled.
+"""
+
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+from collision_sim import RESULTS as COLLISION_RESULTS, collision_results
+from damage_table import TOUKI_MAX, apply_defense, balance_hit, hp_hit, load_grid
+from guard_sim import guard_buckets, guard_receives
+from judgment_sim import ATTACK_BUCKETS, RESULTS, buckets_uniform
+from roster import is_attack
+
+HP_MAX = 96 << 8
+REIKI_START = 20
+REIKI_MAX = 25
+KNOCKDOWN = 256
+
+# Crystal ball orbs assumed each turn (the opening ball holds 3-6)
+ORBS = 4
+# RNG buckets of the damage distribution (64 = exact, one per RNG value)
+DAMAGE_BUCKETS = 4
+
+# 022-補助効果一覧: item effects
+ITEM_REIKI = {"霊小": 5, "霊大": 8}
+ITEM_HP = {"愛小": 22 << 8, "愛大": 28 << 8}
+
+# 023-霊界水晶玉報酬: success judgments, best first
+SUCCESS_JUDGMENTS = ["full", "half", "fail", "none"]
+
+# 013: 飛び that never collide
+NO_COLLISION = ("飛び(黒龍波)", "飛び(降り注ぎ)", "飛び(蝕み)")
+# Collision result -> (first receives, second receives); 減衰 is "weakened"
+COLLISION_RECEIVES = {
+    "first_through": ("evade", "direct"),
+    "first_weakened": ("evade", "weakened"),
+    "cancel": ("evade", "evade"),
+    "both_through": ("weakened", "weakened"),
+    "second_weakened": ("weakened", "evade"),
+    "second_through": ("direct", "evade"),
+}
+
+# 013 防御: families each command can answer, and 回避率 factors by attack family
+DEFENSES = {
+    "受ける": ("飛び", "伸び", "接触"),
+    "上ガード": ("接触",),
+    "下ガード": ("接触",),
+    "かわす": ("飛び", "伸び", "衝撃波", "接触"),
+}
+DEFENSE_FACTORS = {
+    ("受ける", "パンチ"): 0.365,
+    ("上ガード", "パンチ"): 0.83,
+    ("下ガード", "パンチ"): 0.83,
+    ("かわす", "パンチ"): 0.0625,
+    ("かわす", "接触"): 0.3,
+}
+# Guard against a punch of the other height
+WRONG_HEIGHT = 0.125
+BLOCK_RECOVERY = 120
+DODGE_BALANCE = 56
+
+Side = namedtuple("Side", "hp touki balance reiki item air")
+State = namedtuple("State", "sides first")
+
+def initial_side(touki=TOUKI_MAX, item=None):
+    """Side at the start of a match"""
+    return Side(HP_MAX, touki, 0, REIKI_START, item, False)
+
+def initial_state(touki=TOUKI_MAX, first=0):
+    """Match start: full HP, reiki 20, no items, both grounded"""
+    return State((initial_side(touki), initial_side(touki)), first)
+
+def is_down(side):
+    """True while knocked down"""
+    return side.balance >= KNOCKDOWN
+
+def winner(state):
+    """0 or 1 when one side is out of HP, -1 for a double KO, None otherwise"""
+    dead = [side.hp <= 0 for side in state.sides]
+    if all(dead):
+        return -1
+    if any(dead):
+        return dead.index(False)
+    return None
+
+def is_direct(result):
+    """True for a direct hit, including a weakened (減衰) one"""
+    return result in ("direct", "weakened")
+
+def _family(move):
+    """Broad attack family used by the success rules"""
+    kind = move["kind"]
+    if kind.startswith("飛び"):
+        return "飛び"
+    if "衝撃波" in kind:
+        return "衝撃波"
+    if kind == "パンチ":
+        return "接触"
+    return kind
+
+def _collides(move):
+    """True for a 飛び that can 相殺 with another"""
+    return _family(move) == "飛び" and move["kind"] not in NO_COLLISION
+
+class BattleEngine:
+    """Exact one-turn transitions for a pair of fighters"""
+
+    def __init__(self, roster, names, orbs=ORBS, damage_buckets=DAMAGE_BUCKETS):
+        self.names = tuple(names)
+        self.fighters = [roster[name] for name in self.names]
+        self.orbs = orbs
+        self.damage_buckets = damage_buckets
+        self.moves = [self._commands(fighter) for fighter in self.fighters]
+
+    @staticmethod
+    def _commands(fighter):
+        """Commands the model can play for a fighter"""
+        commands = []
+        for move in fighter["moves"]:
+            if move["category"] == "霊撃力UP":
+                continue
+            if is_attack(move) or move["category"] in ("防御", "技") \
+                    or move["kind"] == "無行動" or move["name"] == "アイテム":
+                commands.append(move)
+        return commands
+
+    def move(self, side, key):
+        """Command record by key"""
+        for move in self.moves[side]:
+            if move["key"] == key:
+                return move
+        raise KeyError(f"{self.names[side]} has no command {key}")
+
+    def actions(self, state, side):
+        """Command keys side can choose in state"""
+        me = state.sides[side]
+        keys = []
+        for move in self.moves[side]:
+            if is_down(me):
+                if move["kind"] == "無行動":
+                    keys.append(move["key"])
+                continue
+            if move["cost"] > me.reiki:
+                continue
+            if move["name"] == "アイテム" and me.item is None:
+                continue
+            if move["kind"] == "ジャンプ" and me.air:
+                continue
+            if move["category"] == "防御" and state.first == side:
+                continue
+            keys.append(move["key"])
+        return keys
+
+    def damage(self, attacker, move, result, touki):
+        """[(probability, hp 8.8, whole balance)] a move deals for a result"""
+        if result == "evade" or not is_attack(move):
+            return ((1.0, 0, 0),)
+        defender = self.fighters[1 - attacker]
+        return damage_buckets(move["power"], move["drain"], defender["defense"],
+                              defender["balance_defense"], result, touki, self.damage_buckets)
+
+    def guard_evasion(self, move, side, attack):
+        """回避率 a non-attack command has against an attack (0 when it cannot answer it)"""
+        if is_down(side) or move["kind"] == "無行動" or move["name"] == "アイテム":
+            return 0
+        kind, family = move["kind"], _family(attack)
+        if kind == "ガード":
+            return move["evasion"] if family in ("飛び", "伸び", "接触", "地上") else 0
+        if move["category"] != "防御":
+            return move["evasion"]
+        if family not in DEFENSES.get(kind, ()) or (kind == "受ける" and attack["kind"] == "飛び(蝕み)"):
+            return 0
+        factor = DEFENSE_FACTORS.get((kind, attack["kind"]), DEFENSE_FACTORS.get((kind, family), 1.0))
+        if attack["kind"] == "パンチ" and kind in ("上ガード", "下ガード") and attack["name"][0] != kind[0]:
+            factor *= WRONG_HEIGHT
+        return int(move["evasion"] * factor)
+
+    def judgment(self, state, keys):
+        """[(probability, result side 0 receives, result side 1 receives)]"""
+        first = state.first
+        order = (first, 1 - first)
+        moves = [self.move(side, keys[side]) for side in order]
+        sides = [state.sides[side] for side in order]
+        attacks = [is_attack(move) for move in moves]
+        if all(attacks) and all(_collides(move) for move in moves):
+            outcomes = _collision(moves[0]["success"], moves[1]["success"],
+                                  sides[0].touki, sides[1].touki)
+        elif all(attacks):
+            stats = [(move["success"], 0 if is_down(side) else move["evasion"])
+                     for move, side in zip(moves, sides)]
+            outcomes = _judgment(stats[0][0], stats[0][1], stats[1][0], stats[1][1],
+                                 sides[0].touki, sides[1].touki,
+                                 min(sides[0].balance, 255), min(sides[1].balance, 255))
+        elif any(attacks):
+            a = attacks.index(True)
+            d = 1 - a
+            received = _guard(moves[a]["success"], self.guard_evasion(moves[d], sides[d], moves[a]),
+                              "attacker_first" if a == 0 else "defender_first",
+                              sides[a].touki, sides[d].touki,
+                              min(sides[a].balance, 255), min(sides[d].balance, 255))
+            outcomes = []
+            for p, result in received:
+                if moves[d]["kind"] == "受ける" and result == "graze":
+                    result = "block"
+                elif moves[d]["kind"] == "ガード" and result != "direct":
+                    result = "evade"
+                outcomes.append((p, "evade", result) if a == 0 else (p, result, "evade"))
+        else:
+            outcomes = [(1.0, "evade", "evade")]
+        if first == 0:
+            return outcomes
+        return [(p, b, a) for p, a, b in outcomes]
+
+    def branches(self, state, keys):
+        """[(probability, received, damage)] over judgments and damage buckets (side order)"""
+        moves = [self.move(side, keys[side]) for side in (0, 1)]
+        result = []
+        for p, *received in self.judgment(state, keys):
+            received, _, _ = self.reach(state, moves, received)
+            dealt = [self.damage(1 - s, moves[1 - s], received[s], state.sides[1 - s].touki)
+                     for s in (0, 1)]
+            for p0, hp0, bal0 in dealt[0]:
+                for p1, hp1, bal1 in dealt[1]:
+                    result.append((p * p0 * p1, received, ((hp0, bal0), (hp1, bal1))))
+        return result
+
+    def outcome(self, state, keys):
+        """[(probability, next state)] for both sides' command keys (side order)"""
+        merged = {}
+        for p, received, damage in self.branches(state, keys):
+            next_state = self._resolve(state, keys, received, damage)
+            merged[next_state] = merged.get(next_state, 0.0) + p
+        return [(p, s) for s, p in merged.items() if p > 0]
+
+    def sample(self, state, keys, u):
+        """Next state for one draw u in [0, 1) (outcomes in judgment order)"""
+        branches = self.branches(state, keys)
+        total = 0.0
+        for p, received, damage in branches:
+            total += p
+            if u < total:
+                return self._resolve(state, keys, received, damage)
+        return self._resolve(state, keys, *branches[-1][1:])
+
+    def reach(self, state, moves, received):
+        """
+        Apply reach and air rules to a joint judgment
+        Returns (received, landed, scale); received[t] is what side t receives.
+        """
+        received = list(received)
+        landed = [False, False]
+        scale = [1.0, 1.0]
+        for s in (0, 1):
+            t = 1 - s
+            move, me, target = moves[s], state.sides[s], state.sides[t]
+            if not is_attack(move):
+                continue
+            family = _family(move)
+            if family in ("地上", "接触") and target.air and not (family == "接触" and me.air):
+                received[t] = "evade"
+            if family == "地上" and received[t] == "graze":
+                received[t] = "evade"
+            if family == "接触" and me.air and not target.air:
+                scale[s] = 1.25
+                landed[s] = True
+            if family == "地上" and me.air:
+                landed[s] = True
+        return received, landed, scale
+
+    def success_judgments(self, state, keys):
+        """[(probability, side 0 judgment, side 1 judgment)] (SUCCESS_JUDGMENTS)"""
+        moves = [self.move(side, keys[side]) for side in (0, 1)]
+        merged = {}
+        for p, *received in self.judgment(state, keys):
+            received, _, _ = self.reach(state, moves, received)
+            pair = tuple(success_judgment(moves[s], moves[1 - s], received, s, state.first)
+                         for s in (0, 1))
+            merged[pair] = merged.get(pair, 0.0) + p
+        return [(p, a, b) for (a, b), p in merged.items()]
+
+    def _resolve(self, state, keys, received, damage):
+        """Apply one joint judgment result (after reach) and the damage each side takes"""
+        moves = [self.move(side, keys[side]) for side in (0, 1)]
+        _, landed, scale = self.reach(state, moves, received)
+
+        sides = []
+        for s in (0, 1):
+            t = 1 - s
+            me, move, other = state.sides[s], moves[s], moves[t]
+            hp_damage, bal_damage = damage[s]
+            hp_damage = int(hp_damage * scale[t])
+            hp, balance, reiki, item, air = me.hp, me.balance, me.reiki, me.item, me.air
+
+            if is_down(me):
+                balance = 0
+            reiki -= move["cost"]
+            if move["name"] == "アイテム" and item is not None:
+                reiki += ITEM_REIKI.get(item, 0)
+                hp = min(HP_MAX, hp + ITEM_HP.get(item, 0))
+                if item == "気小":
+                    balance = balance // 4
+                elif item == "気大":
+                    balance = 0
+                item = None
+
+            hp -= hp_damage
+            balance = min(KNOCKDOWN, balance + bal_damage)
+            if received[s] == "block":
+                balance = max(0, balance - BLOCK_RECOVERY)
+            if move["kind"] == "かわす" and is_attack(other) and balance < KNOCKDOWN \
+                    and not (other["kind"] == "飛び(蝕み)" and is_direct(received[s])):
+                balance = min(KNOCKDOWN - 1, balance + DODGE_BALANCE)
+            if move["kind"] == "ジャンプ":
+                if is_direct(received[s]) and state.first != s:
+                    balance = KNOCKDOWN
+                air = not is_direct(received[s])
+            elif air and (landed[s] or (is_direct(received[s]) and other["kind"] != "飛び(蝕み)")):
+                air = False
+
+            reiki = min(REIKI_MAX, reiki + self.orbs_paid(move, other, received, s, state.first))
+            sides.append(Side(max(hp, 0), me.touki, balance, max(reiki, 0), item, air))
+        return State(tuple(sides), state.first)
+
+    def orbs_paid(self, move, other, received, side, first):
+        """Crystal ball orbs for side under the 023 success rules"""
+        return orbs_for(success_judgment(move, other, received, side, first), self.orbs)
+
+def success_judgment(move, other, received, side, first):
+    """023 success judgment of side's command: full, half, fail or none"""
+    if not is_attack(move):
+        return "none"
+    mine, dealt = received[side], received[1 - side]
+    family, other_family = _family(move), _family(other) if is_attack(other) else None
+    ranged = ("飛び", "衝撃波")
+    hit = is_direct(mine) and other_family is not None
+    if hit and family == "地上" and other_family == "地上" and is_direct(dealt) and side != first:
+        return "full"
+    if hit and not (family in ranged and other_family in ranged) \
+            and not (family == "伸び" and other_family in ranged + ("伸び",)):
+        return "fail"
+    if is_direct(dealt):
+        return "full"
+    if dealt == "graze":
+        return "half"
+    return "fail"
+
+def orbs_for(judgment, orbs):
+    """Orbs paid out of a ball holding orbs for a success judgment"""
+    if judgment == "full":
+        return orbs
+    if judgment == "half":
+        return -(-orbs // 2)
+    return 1 if judgment == "fail" else 0
+
+@functools.lru_cache(maxsize=None)
+def damage_buckets(power, drain, defense, balance_defense, result, touki, buckets=DAMAGE_BUCKETS):
+    """
+    ((probability, hp 8.8, whole balance), ...) for one hit type
+    The RNG values are split into equal-width buckets, each at its mean
+    damage; damage rises with the RNG, so buckets are damage quantiles.
+    A weakened (減衰) hit is a direct hit at 3/4.
+    """
+    hit = "direct" if result == "weakened" else result
+    hp = hp_hit(apply_defense(load_grid(power)[touki, 0], defense), hit).astype(np.int64)
+    bal = balance_hit(apply_defense(load_grid(drain)[touki, 0], balance_defense), hit).astype(np.int64)
+    if result == "weakened":
+        hp, bal = (hp * 3) >> 2, (bal * 3) >> 2
+    bal >>= 8
+    merged = {}
+    for part in np.array_split(np.arange(len(hp)), buckets):
+        key = (int(round(hp[part].mean())), int(round(bal[part].mean())))
+        merged[key] = merged.get(key, 0.0) + len(part) / len(hp)
+    return tuple((p, hp_damage, bal_damage) for (hp_damage, bal_damage), p in merged.items())
+
+@functools.lru_cache(maxsize=None)
+def _judgment(first_success, first_evasion, second_success, second_evasion,
+              first_touki, second_touki, first_balance, second_balance):
+    """Joint (probability, first receives, second receives) for one exchange"""
+    buckets = buckets_uniform(first_success, first_evasion, second_success, second_evasion,
+                              first_touki, second_touki, first_balance, second_balance)
+    joint = {}
+    for p, outcomes in zip(buckets, ATTACK_BUCKETS):
+        for share, first, second in outcomes:
+            joint[(first, second)] = joint.get((first, second), 0.0) + p * share
+    return tuple((p, first, second) for (first, second), p in joint.items() if p > 0)
+
+@functools.lru_cache(maxsize=None)
+def _collision(first_success, second_success, first_touki, second_touki):
+    """Joint (probability, first receives, second receives) for two colliding 飛び"""
+    results = collision_results(first_success, second_success, "uniform", first_touki, second_touki)
+    joint = {}
+    for p, result in zip(results, COLLISION_RESULTS):
+        pair = COLLISION_RECEIVES[result]
+        joint[pair] = joint.get(pair, 0.0) + float(p)
+    return tuple((p, first, second) for (first, second), p in joint.items() if p > 0)
+
+@functools.lru_cache(maxsize=None)
+def _guard(success, evasion, order, attacker_touki, defender_touki, attacker_balance, defender_balance):
+    """((probability, defender receives), ...) for an attack on a non-attack command"""
+    buckets = guard_buckets(success, evasion, order, "uniform", attacker_touki, defender_touki,
+                            attacker_balance, defender_balance)
+    return tuple((float(p), result) for p, result in zip(guard_receives(buckets, order), RESULTS)
+                 if p > 0)
+
+def describe(state, names=("1P", "2P")):
+    """One-line summary of a state"""
+    parts = []
+    for name, side in zip(names, state.sides):
+        flags = ("空" if side.air else "") + ("ダウン" if is_down(side) else "")
+        parts.append(f"{name} HP {side.hp / 256:5.1f} バ {min(side.balance, 255):3d} "
+                     f"霊 {side.reiki:2d} {side.item or '-'} {flags}".rstrip())
+    return f"先手 {names[state.first]} | " + " | ".join(parts)
@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 """
 Bulk export script for atwiki to Markdown
-Fetches all pages from /list and converts them to Markdown
+Fetches all pages from /list and converts them to Markdown (plus pages link_crawler.py found through links)
+Fetching runs on one I/O thread; cleaning and conversion run in a process pool
 """
 
 import re
 import requests
 from bs4 import BeautifulSoup
-from markdownify import markdownify as md
 from pathlib import Path
 import time
 import sys
 from datetime import datetime
+from export_metrics import RunMetrics, track
+from export_pipeline import new_worker_metrics, run_pipeline
+from atwiki_tables import convert_html
+from link_crawler import crawled_pages
 
 BASE = "https://w.atwiki.jp/yuyuz"
 LIST_URL = f"{BASE}/list"
 OUTPUT_DIR = Path("yuyuz_md")
+METRICS_PATH = Path("yuyuz_export_metrics.json")
+# "auto": tables with rowspan/colspan stay as clean HTML, simple ones become GFM
+# "gfm": every table becomes a pipe table with spans expanded
+TABLE_STYLE = "auto"
 
 def fetch_page_list():
     """Fetch the list of all wiki pages"""
@@ -52,7 +60,7 @@ def extract_page_info(html_content):
 
     return pages
 
-def fetch_single_page(page_id):
+def fetch_single_page(page_id, metrics=None):
     """Fetch a single page from atwiki"""
     url = f"{BASE}/pages/{page_id}.html"
 
@@ -63,21 +71,34 @@ def fetch_single_page(page_id):
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, timeout=20, headers=headers)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding
-            return response.text
+            with track(metrics, "fetch"):
+                response = requests.get(url, timeout=20, headers=headers)
+                response.raise_for_status()
+            if metrics:
+                metrics.bytes_in += len(response.content)
+            with track(metrics, "decode"):
+                response.encoding = response.apparent_encoding
+                return response.text
         except requests.RequestException as e:
             if attempt < max_retries - 1:
+                if metrics:
+                    metrics.retries += 1
                 print(f"  Retry {attempt + 1}/{max_retries} for page {page_id}")
                 time.sleep(2)
             else:
                 print(f"  Failed to fetch page {page_id}: {e}")
                 return None
 
-def clean_html(html_content):
+def clean_html(html_content, metrics=None):
     """Clean HTML by removing navigation, ads, and other non-content elements"""
-    soup = BeautifulSoup(html_content, "html.parser")
+    with track(metrics, "parse"):
+        soup = BeautifulSoup(html_content, "html.parser")
+
+    with track(metrics, "clean"):
+        return _strip_non_content(soup)
+
+def _strip_non_content(soup):
+    """Remove non-content elements and return the main content area"""
 
     # Check if page exists
     if "指定されたページ番号は存在しません" in str(soup):
@@ -147,9 +168,10 @@ def absolutize_urls(soup, base_url="https://w.atwiki.jp"):
     return soup
 
 def convert_to_markdown(soup):
-    """Convert cleaned HTML to Markdown"""
-    markdown_text = md(
-        str(soup),
+    """Convert cleaned HTML to Markdown (tables via the span-aware renderer)"""
+    markdown_text = convert_html(
+        soup,
+        table_style=TABLE_STYLE,
         heading_style="ATX",
         bullets="*",
         code_language="",
@@ -161,66 +183,127 @@ def convert_to_markdown(soup):
 
     return markdown_text
 
-def save_markdown(content, page_id, title):
-    """Save markdown content to file"""
-    # Sanitize title for filename
+def markdown_path(page_id, title):
+    """Output path for a page"""
     safe_title = re.sub(r'[<>:"/\\|?*]', '', title)
     safe_title = safe_title.strip()[:50]
-    filename = f"{page_id:03d}-{safe_title}.md"
+    return OUTPUT_DIR / f"{page_id:03d}-{safe_title}.md"
 
-    filepath = OUTPUT_DIR / filename
+def save_markdown(content, page_id, title, metrics=None):
+    """Save markdown content to file"""
+    filepath = markdown_path(page_id, title)
 
     # Write content
-    with open(filepath, "w", encoding="utf-8") as f:
-        # Add front matter
-        f.write("---\n")
-        f.write(f'source: "{BASE}/pages/{page_id}.html"\n')
-        f.write(f'id: {page_id}\n')
-        f.write(f'title: "{title}"\n')
-        f.write(f'fetched_at: "{datetime.now().isoformat()}"\n')
-        f.write("---\n\n")
-        f.write(content)
+    with track(metrics, "write"):
+        with open(filepath, "w", encoding="utf-8") as f:
+            # Add front matter
+            f.write("---\n")
+            f.write(f'source: "{BASE}/pages/{page_id}.html"\n')
+            f.write(f'id: {page_id}\n')
+            f.write(f'title: "{title}"\n')
+            f.write(f'fetched_at: "{datetime.now().isoformat()}"\n')
+            f.write("---\n\n")
+            f.write(content)
+            if metrics:
+                metrics.bytes_out += f.tell()
 
     return filepath
 
-def convert_page(page_id, title):
+def convert_page(page_id, title, metrics=None):
     """Convert a single page to Markdown"""
     print(f"Converting page {page_id}: {title}")
+    page_metrics = metrics.page(page_id, title) if metrics else None
 
     # Check if already exists
-    safe_title = re.sub(r'[<>:"/\\|?*]', '', title)
-    safe_title = safe_title.strip()[:50]
-    filename = f"{page_id:03d}-{safe_title}.md"
-    filepath = OUTPUT_DIR / filename
+    filepath = markdown_path(page_id, title)
+    filename = filepath.name
 
     if filepath.exists():
         print(f"  Skipping (already exists): {filename}")
+        if page_metrics:
+            page_metrics.cache_hit = True
+            page_metrics.status = "cached"
         return True
 
     # Fetch the page
-    html_content = fetch_single_page(page_id)
+    html_content = fetch_single_page(page_id, page_metrics)
     if not html_content:
         print(f"  Failed to fetch page")
+        if page_metrics:
+            page_metrics.status = "fetch_failed"
         return False
 
     # Clean the HTML
-    cleaned_soup = clean_html(html_content)
+    cleaned_soup = clean_html(html_content, page_metrics)
     if not cleaned_soup:
         print(f"  Page is deleted or doesn't exist")
+        if page_metrics:
+            page_metrics.status = "missing"
         return False
 
     # Absolutize URLs
-    cleaned_soup = absolutize_urls(cleaned_soup)
+    with track(page_metrics, "clean"):
+        cleaned_soup = absolutize_urls(cleaned_soup)
 
     # Convert to Markdown
-    markdown_content = convert_to_markdown(cleaned_soup)
+    with track(page_metrics, "convert"):
+        markdown_content = convert_to_markdown(cleaned_soup)
 
     # Save the result
-    filepath = save_markdown(markdown_content, page_id, title)
+    filepath = save_markdown(markdown_content, page_id, title, page_metrics)
     print(f"  Saved: {filepath.name}")
+    if page_metrics:
+        page_metrics.status = "ok"
 
     return True
 
+def fetch_stage(page_id, title, metrics=None):
+    """I/O stage: return the raw HTML, True if already converted, or None"""
+    print(f"Fetching page {page_id}: {title}")
+
+    filepath = markdown_path(page_id, title)
+    if filepath.exists():
+        print(f"  Skipping (already exists): {filepath.name}")
+        if metrics:
+            metrics.cache_hit = True
+            metrics.status = "cached"
+        return True
+
+    html_content = fetch_single_page(page_id, metrics)
+    if not html_content:
+        print(f"  Failed to fetch page {page_id}")
+        if metrics:
+            metrics.status = "fetch_failed"
+        return None
+
+    return html_content
+
+def render_stage(page_id, title, html_content):
+    """CPU stage (worker process): clean and convert fetched HTML to Markdown"""
+    metrics = new_worker_metrics(page_id, title)
+
+    cleaned_soup = clean_html(html_content, metrics)
+    if not cleaned_soup:
+        print(f"  Page {page_id} is deleted or doesn't exist")
+        metrics.status = "missing"
+        return None, metrics
+
+    with track(metrics, "clean"):
+        cleaned_soup = absolutize_urls(cleaned_soup)
+
+    with track(metrics, "convert"):
+        markdown_content = convert_to_markdown(cleaned_soup)
+
+    return markdown_content, metrics
+
+def write_stage(page_id, title, markdown_content, metrics=None):
+    """Write stage (main process): save converted Markdown"""
+    filepath = save_markdown(markdown_content, page_id, title, metrics)
+    print(f"  Saved: {filepath.name}")
+    if metrics:
+        metrics.status = "ok"
+    return True
+
 def main():
     """Main conversion process"""
     print("=" * 60)
@@ -243,6 +326,13 @@ def main():
         print("No pages found")
         return 1
 
+    # Pages only reachable through links (from link_crawler.py, if it has run)
+    crawled = crawled_pages("yuyuz")
+    for page_id, title in crawled.items():
+        pages.setdefault(page_id, title)
+    if crawled:
+        print(f"Merged crawl results: {len(crawled)} pages known from links")
+
     print(f"\nFound {len(pages)} pages to convert")
 
     # Ask for confirmation
@@ -255,23 +345,12 @@ def main():
     print("\nStarting conversion...")
     print("=" * 60)
 
-    success_count = 0
-    failed_pages = []
-
-    for page_id in sorted(pages.keys()):
-        title = pages[page_id]
+    metrics = RunMetrics("yuyuz")
 
-        try:
-            if convert_page(page_id, title):
-                success_count += 1
-            else:
-                failed_pages.append((page_id, title))
-        except Exception as e:
-            print(f"  Error converting page {page_id}: {e}")
-            failed_pages.append((page_id, title))
-
-        # Rate limiting
-        time.sleep(0.7)
+    # Fetch on one thread (rate limited), convert across all cores
+    success_count, failed_pages = run_pipeline(
+        pages, fetch_stage, render_stage, write_stage, metrics, delay=0.7
+    )
 
     # Summary
     print("\n" + "=" * 60)
@@ -286,6 +365,12 @@ def main():
 
     print(f"\nOutput saved to: {OUTPUT_DIR.absolute()}")
 
+    # Metrics
+    metrics.finish()
+    metrics.print_summary()
+    metrics.write_report(METRICS_PATH)
+    print(f"\nMetrics report: {METRICS_PATH.absolute()}")
+
     return 0
 
 if __name__ == "__main__":
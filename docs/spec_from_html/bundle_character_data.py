@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Content-hashed, precompressed copies of the character data for deployment
+Each character's stats.json / moves.json / frames.json and roster.json is
+minified and written as <name>.<hash>.json under public/data/dist, with a
+.gz sibling (and .br when the brotli module is installed) for servers and
+CDNs that serve precompressed files. Names change only when the content
+does, so they can be served with Cache-Control: immutable.
+
+public/data/manifest.json maps each character id to its artifact URLs and
+hashes; it is the only file that must be revalidated. characterLoader.ts
+reads it and falls back to the fixed names when it is missing.
+
+Artifacts already present under their hash are not rewritten, and files no
+longer referenced by the manifest are removed.
+
+    python bundle_character_data.py
+    python bundle_character_data.py --characters /tmp/characters --no-prune
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from character_compiler import CHARACTERS_DIR, DATA_DIR, ROSTER_PATH, write_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIST_DIR = DATA_DIR / "dist"
+MANIFEST_PATH = DATA_DIR / "manifest.json"
+MANIFEST_VERSION = 1
+# Hex digits of the SHA-256 kept in file names and the manifest
+HASH_LENGTH = 16
+CHARACTER_FILES = ("stats", "moves", "frames")
+SUFFIXES = (".gz", ".br") if brotli is not None else (".gz",)
+
+def minify(path):
+    """Compact UTF-8 JSON bytes of a file (keys kept in file order)"""
+    value = json.loads(Path(path).read_text(encoding="utf-8"))
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def content_hash(data):
+    """Truncated SHA-256 hex digest"""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def compressed(data):
+    """{suffix: bytes} for SUFFIXES (gzip with a fixed mtime, so output is reproducible)"""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return variants
+
+def write_artifact(data, directory, stem, stats):
+    """Write stem.<hash>.json and its compressed siblings; returns the manifest entry"""
+    digest = content_hash(data)
+    path = directory / f"{stem}.{digest}.json"
+    entry = {"url": "/" + path.relative_to(DATA_DIR.parent).as_posix(), "hash": digest, "bytes": len(data)}
+    targets = [path] + [path.with_name(path.name + suffix) for suffix in SUFFIXES]
+    if all(target.exists() for target in targets):
+        stats["unchanged"] += 1
+    else:
+        directory.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        for suffix, variant in compressed(data).items():
+            path.with_name(path.name + suffix).write_bytes(variant)
+        stats["written"] += 1
+    stats["files"].update(targets)
+    stats["raw"] += len(data)
+    stats["gzip"] += targets[1].stat().st_size
+    return entry
+
+def bundle(characters_dir=CHARACTERS_DIR, roster_path=ROSTER_PATH, dist_dir=DIST_DIR):
+    """(manifest, stats) after writing the artifacts for every character directory and the roster"""
+    stats = {"written": 0, "unchanged": 0, "raw": 0, "gzip": 0, "files": set()}
+    manifest = {"version": MANIFEST_VERSION, "characters": {}}
+    for directory in sorted(Path(characters_dir).iterdir()):
+        if not all((directory / f"{name}.json").exists() for name in CHARACTER_FILES):
+            continue
+        manifest["characters"][directory.name] = {
+            name: write_artifact(minify(directory / f"{name}.json"), dist_dir / directory.name, name, stats)
+            for name in CHARACTER_FILES
+        }
+    if roster_path and Path(roster_path).exists():
+        manifest["roster"] = write_artifact(minify(roster_path), dist_dir, "roster", stats)
+    return manifest, stats
+
+def prune(dist_dir, keep):
+    """Remove artifacts under dist_dir that are not in keep; returns how many"""
+    removed = 0
+    for path in sorted(Path(dist_dir).rglob("*"), reverse=True):
+        if path.is_file() and path not in keep:
+            path.unlink()
+            removed += 1
+        elif path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+    return removed
+
+def main():
+    """Write the hashed artifacts and manifest.json"""
+    parser = argparse.ArgumentParser(description="Write content-hashed, precompressed character data")
+    parser.add_argument("--characters", default=str(CHARACTERS_DIR), help="Per-form character directories")
+    parser.add_argument("--roster", default=str(ROSTER_PATH), help="Compiled roster (skipped if missing)")
+    parser.add_argument("--no-prune", action="store_true", help="Keep artifacts no longer in the manifest")
+    args = parser.parse_args()
+
+    manifest, stats = bundle(args.characters, args.roster)
+    write_json(MANIFEST_PATH, manifest)
+    removed = 0 if args.no_prune else prune(DIST_DIR, stats["files"])
+    print(f"{len(manifest['characters'])} characters, {stats['written']} artifacts written, "
+          f"{stats['unchanged']} unchanged, {removed} stale files removed")
+    print(f"{stats['raw']} bytes -> {stats['gzip']} gzip" + ("" if brotli else " (brotli not installed, no .br)"))
+    print(f"wrote {MANIFEST_PATH}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
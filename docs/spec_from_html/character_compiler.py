@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Compile the character pages (024, 030-048) and page 57 into game data
+Every 戦闘コマンド form (蔵馬 / 蔵馬2 / 妖狐, 飛影 / 黒龍波吸収飛影, 戸愚呂弟 /
+80% / 100%, ...) becomes its own move and frame set. Moves and frame
+timings are interned roster-wide, so a row shared by several forms (or by
+several characters, like most punches) is stored once and forms only hold
+indices into the shared tables:
+
+    {"moves": [MoveDefinition], "frames": [MoveFrames],
+     "modes": {mode: {field: [value per slot]}},
+     "characters": [{"id", "name", "forms": [{"id", "name", "nameEn", "slot",
+                     "stats", "moves": [index], "frames": [index]}]}]}
+
+form.moves[k] and form.frames[k] describe the same command, so switching
+form in the engine is swapping one index list for another.
+
+Stats that differ between story and 総当たり戦 (defense, 防御力UP defense,
+気合い/クリーンヒット rates) are decoded from their x/256 bytes per mode,
+with real HP (96 / rate) and real balance (256 / rate) precomputed, into
+one array per field indexed by form slot; the engine picks a mode by
+picking a table. The wiki's 実体力 cells are not used since several are
+misplaced (凍矢 and 武威 list their 防御力UP value).
+
+English names and transform metadata are not on the wiki; they are kept
+from the hand-made public/data/characters/<id> files when those exist.
+Forms without their own page 57 section use their page's section.
+Random-outcome moves (神谷's ↑B ド｜ピング) get one id per outcome: up_b,
+up_b_2, ... The payloads are checked by validate_character_json.py before
+anything is written.
+
+    python character_compiler.py
+    python character_compiler.py --split public/data/characters
+    python character_compiler.py --check
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+from frame_check import check_tables, format_problem, repairs
+from frame_timeline import STAGES, prep_frames
+from roster import STAT_LABELS, parse_int
+from spec_tables import load_directory
+
+SCRIPT_DIR = Path(__file__).parent
+MD_DIR = SCRIPT_DIR / "yuyuz_md"
+DATA_DIR = SCRIPT_DIR.parent.parent / "public" / "data"
+CHARACTERS_DIR = DATA_DIR / "characters"
+ROSTER_PATH = DATA_DIR / "roster.json"
+
+ROSTER_VERSION = 2
+
+GAME_MODES = list(STAT_LABELS)
+TOTAL_HP = 96
+TOTAL_BALANCE = 256
+
+# 戦闘コマンド form name -> CharacterId (src/types/CharacterData.ts)
+FORM_IDS = {
+    "幽助": "yusuke",
+    "桑原": "kuwabara",
+    "蔵馬": "kurama1",
+    "蔵馬2": "kurama2",
+    "妖狐": "youko",
+    "妖狐蔵馬": "youko_kurama",
+    "飛影": "hiei",
+    "黒龍波吸収飛影": "hiei_dragon",
+    "幻海": "genkai",
+    "若幻海": "genkai_rejuvenated",
+    "幻海(若)": "genkai_young",
+    "鈴駒": "suzuku",
+    "凍矢": "touya",
+    "陣": "jin",
+    "死々若丸": "shishiwakamaru",
+    "鴉": "karasu",
+    "マスク無し鴉": "karasu_unmasked",
+    "金髪鴉": "karasu_blonde",
+    "武威": "bui",
+    "戸愚呂兄": "toguro_elder",
+    "戸愚呂弟": "toguro_younger",
+    "80%": "toguro_80",
+    "100%": "toguro_100",
+    "神谷": "gourmet",
+    "刃霧": "makintaro",
+    "樹": "itsuki",
+    "仙水": "sensui",
+}
+# Forms named like another page's own form (戸愚呂弟's 100% is not page 044)
+PAGE_FORM_IDS = {
+    ("戸愚呂弟", "100%"): "toguro_younger_100",
+}
+
+NAMES_EN = {
+    "yusuke": "Yusuke Urameshi",
+    "kuwabara": "Kazuma Kuwabara",
+    "kurama1": "Kurama",
+    "kurama2": "Kurama",
+    "youko": "Yoko Kurama",
+    "youko_kurama": "Yoko Kurama",
+    "hiei": "Hiei",
+    "hiei_dragon": "Hiei (Dragon)",
+    "genkai": "Genkai",
+    "genkai_rejuvenated": "Genkai (Rejuvenated)",
+    "genkai_young": "Genkai (Young)",
+    "suzuku": "Rinku",
+    "touya": "Touya",
+    "jin": "Jin",
+    "shishiwakamaru": "Shishiwakamaru",
+    "karasu": "Karasu",
+    "karasu_unmasked": "Karasu (Unmasked)",
+    "karasu_blonde": "Karasu (Blonde)",
+    "bui": "Bui",
+    "toguro_elder": "Elder Toguro",
+    "toguro_younger": "Younger Toguro",
+    "toguro_80": "Younger Toguro (80%)",
+    "toguro_younger_100": "Younger Toguro (100%)",
+    "toguro_100": "Younger Toguro (100%)",
+    "gourmet": "Kamiya",
+    "makintaro": "Kaname Hagiri",
+    "itsuki": "Itsuki",
+    "sensui": "Shinobu Sensui",
+}
+
+DIRECTIONS = {"→": "forward", "←": "back", "↑": "up", "↓": "down"}
+# Commands that are not direction + button
+SPECIAL_IDS = {"AorY": "item_use", "なし": "no_action"}
+
+STAGE_KEYS = dict(zip(STAGES, ["forest", "dark", "guillotine", "timegap"]))
+
+# 防御 row 種類 -> type; other 防御 rows are guards
+DEFENSE_TYPES = {"受ける": "defense", "かわす": "evasion"}
+# 技 row 種類 that buff the user
+BUFF_KINDS = ("自分即効", "キャンセル/自分即効")
+
+# Attack kind (last part of 種類, 返し/接触 -> 接触) -> priority
+PRIORITIES = [("飛び", "highest"), ("衝撃波", "highest"), ("伸び", "high"),
+              ("地上", "high"), ("接触", "medium")]
+
+# 7E0EBA is not on the wiki; every hand-made file uses 1
+KNOCKDOWN_SPEED = 1
+
+def parse_number(text):
+    """Leading number of a cell ('187F', '1.55本'); 0 if none"""
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)', text or "")
+    return float(match.group(1)) if match else 0
+
+def parse_share(text):
+    """'58/256(22.7%)' -> 0.227 (the wiki's rounded percentage)"""
+    match = re.search(r'\(([\d.]+)%\)', text or "")
+    return round(float(match.group(1)) / 100, 3) if match else 0
+
+def real_value(total, rate):
+    """total / (rate / 256) rounded half up, as the wiki's 実体力 / 実バランス; 0 without a rate"""
+    return (2 * total * 256 + rate) // (2 * rate) if rate else 0
+
+def mode_stats(basic, mode):
+    """Mode-dependent x/256 bytes and the real HP / balance they give"""
+    labels = STAT_LABELS[mode]
+    normal = STAT_LABELS["normal"]
+
+    def rate(key):
+        return parse_int(basic.get(labels[key]) or basic.get(normal[key]))
+
+    defense, defense_up, balance = rate("defense"), rate("defense_up"), rate("balance_defense")
+    return {
+        "defense": defense,
+        "realHp": real_value(TOTAL_HP, defense),
+        "defenseUp": defense_up,
+        "realHpUp": real_value(TOTAL_HP, defense_up),
+        "balanceDefense": balance,
+        "realBalance": real_value(TOTAL_BALANCE, balance),
+        "poweredPunchRate": rate("powered_punch"),
+        "cleanHitRate": rate("clean_hit"),
+    }
+
+def form_stats(basic):
+    """CharacterStats from a 基本性能 block (normal mode)"""
+    normal = mode_stats(basic, "normal")
+    return {
+        "defense": parse_share(basic.get("防御力/威力倍率")),
+        "realHp": normal["realHp"],
+        "balanceDefense": parse_share(basic.get("バランス防御力/奪バランス値倍率")),
+        "realBalance": normal["realBalance"],
+        "airtime": int(parse_number(basic.get("滞空時間/滞空時間"))),
+        "knockdownDuration": int(parse_number(basic.get("ダウン時間/ダウン時間(短縮無し)"))),
+        "knockdownDuration30PerSec": int(parse_number(basic.get("ダウン時間/ダウン時間(30/秒短縮)"))),
+        "knockdownDuration60PerSec": int(parse_number(basic.get("ダウン時間/ダウン時間(60/秒短縮)"))),
+        "knockdownSpeed": KNOCKDOWN_SPEED,
+        "airtimeTouki": parse_number(basic.get("滞空時間/霊撃闘気")),
+        "poweredPunchRate": parse_share(basic.get("気合いの入ったパンチ発生率/発生率")),
+        "cleanHitRate": parse_share(basic.get("クリーンヒット発生率/発生率")),
+    }
+
+def command_id(category, command):
+    """MoveId for a 戦闘コマンド row ('↓X' -> down_x, 霊撃力UP -> spirit_boost_down_x)"""
+    if command in SPECIAL_IDS:
+        return SPECIAL_IDS[command]
+    move = f"{DIRECTIONS[command[0]]}_{command[1:].lower()}"
+    return f"spirit_boost_{move}" if category == "霊撃力UP" else move
+
+def move_type(category, kind):
+    """MoveType for a row's category and 種類"""
+    if category == "パンチ":
+        return "punch"
+    if category == "防御":
+        return DEFENSE_TYPES.get(kind, "guard")
+    if category in ("霊撃", "霊撃力UP"):
+        return "spirit"
+    if category == "技" and kind in BUFF_KINDS:
+        return "buff"
+    return "technique"
+
+def move_priority(kind):
+    """ActionPriority from 種類"""
+    attack = kind.split("/")[-1]
+    for prefix, priority in PRIORITIES:
+        if attack.startswith(prefix):
+            return priority
+    return "low"
+
+def compile_moves(rows, names_en):
+    """MoveDefinition list for one form's 戦闘コマンド rows"""
+    moves = []
+    spirit_names = {}
+    for row in rows:
+        category = row["category"]
+        command = row["key"].split("/")[1]
+        name = row["name"].strip("「」")
+        if category == "霊撃":
+            spirit_names[command] = name
+        if category == "霊撃力UP" and spirit_names.get(command) == name:
+            name = f"{name} (霊撃力UP)"
+        move_id = command_id(category, command)
+        # Random-outcome moves list one row per outcome (神谷 ↑B ド｜ピング)
+        if "#" in row["key"]:
+            move_id = f"{move_id}_{row['key'].rsplit('#', 1)[1]}"
+        move = {
+            "id": move_id,
+            "command": f"霊撃力UP{command}" if category == "霊撃力UP" else command,
+            "name": name,
+        }
+        if names_en.get((move_id, name)):
+            move["nameEn"] = names_en[(move_id, name)]
+        move.update({
+            "type": move_type(category, row["種類"]),
+            "priority": move_priority(row["種類"]),
+            "successRate": int(parse_number(row["成功"])),
+            "evasionRate": int(parse_number(row["回避"])),
+            "power": int(parse_number(row["威力"])),
+            "balanceDrain": int(parse_number(row["奪バ"])),
+            "reikiCost": int(parse_number(row["消費"])),
+        })
+        moves.append(move)
+    return moves
+
+def frame_timings(row):
+    """FrameTimings for a page 57 row (blank cells count as 0)"""
+    def value(text):
+        text = text.strip().rstrip("~")
+        return int(text) if text.isdigit() else 0
+    return {
+        "prepTransition": {STAGE_KEYS[stage]: value(row[stage]) for stage in STAGES},
+        "preparation": max(prep_frames(row), 0),
+        "activation": value(row["発動F"]),
+    }
+
+def frame_lookup(frame_rows, fixes=None):
+    """
+    {(category, button): {'ground': timings, 'aerial': timings}} from page 57 rows
+    fixes maps a row key to corrected cells ({column: text}, from frame_check).
+    """
+    lookup = {}
+    for row in frame_rows:
+        row = {**row, **(fixes or {}).get(row["key"], {})}
+        variants = lookup.setdefault((row["category"], row["button"]), {})
+        timings = frame_timings(row)
+        if row["state"] == "空":
+            variants.setdefault("aerial", timings)
+        else:
+            variants.setdefault("ground", timings)
+    return lookup
+
+def zero_frames():
+    """MoveFrames for commands without page 57 data (defense, jump, items)"""
+    return {"ground": {"prepTransition": {key: 0 for key in STAGE_KEYS.values()},
+                       "preparation": 0, "activation": 0}}
+
+def move_frames(row, lookup):
+    """MoveFrames for one 戦闘コマンド row"""
+    category = row["category"]
+    command = row["key"].split("/")[1]
+    if category not in ("パンチ", "技", "霊撃", "霊撃力UP") or command == "↑X":
+        return zero_frames()
+    button = command[1:]
+    if category == "パンチ":
+        button = "AX" if button in "AX" else "BY"
+    variants = lookup.get((category, button))
+    if variants is None and category == "霊撃力UP":
+        variants = lookup.get(("霊撃", button))
+    if not variants or "ground" not in variants:
+        return zero_frames()
+    return {state: variants[state] for state in ("ground", "aerial") if state in variants}
+
+def hand_made(character_id, directory=CHARACTERS_DIR):
+    """(stats.json dict, {(move id, name): nameEn}) of a hand-made character, if any"""
+    path = Path(directory) / character_id
+    if not (path / "stats.json").exists():
+        return {}, {}
+    stats = json.loads((path / "stats.json").read_text(encoding="utf-8"))
+    moves = json.loads((path / "moves.json").read_text(encoding="utf-8"))
+    return stats, {(m["id"], m["name"]): m.get("nameEn") for m in moves}
+
+class Interner:
+    """Stores each distinct JSON value once and hands out its index"""
+    def __init__(self):
+        self.values = []
+        self.index = {}
+        self.requests = 0
+
+    def add(self, value):
+        """Index of value, appending it the first time it is seen"""
+        self.requests += 1
+        key = json.dumps(value, sort_keys=True, ensure_ascii=False)
+        if key not in self.index:
+            self.index[key] = len(self.values)
+            self.values.append(value)
+        return self.index[key]
+
+def page_form_id(page, form):
+    """Roster id of a page's form"""
+    return PAGE_FORM_IDS.get((page, form)) or FORM_IDS.get(form, form)
+
+def form_basic(tables, form):
+    """基本性能 block of a form (the page's first block if the form has none)"""
+    return tables["basic"].get(form) or next(iter(tables["basic"].values()), {})
+
+def compile_character(page, tables, frame_sections, moves, frames, frame_fixes=None,
+                      characters_dir=CHARACTERS_DIR, first_slot=0):
+    """
+    Compiled character entry for one page, interning into moves / frames
+    frame_sections is page 57 ({heading: rows}); forms get slots from first_slot.
+    """
+    frame_fixes = frame_fixes or {}
+    forms = []
+    for slot, (form, rows) in enumerate(tables["commands"].items(), first_slot):
+        form_id = page_form_id(page, form)
+        hand_stats, names_en = hand_made(form_id, characters_dir)
+        heading = form if form in frame_sections else page
+        fixes = {key: cells for (h, key), cells in frame_fixes.items() if h == heading}
+        lookup = frame_lookup(frame_sections.get(heading, []), fixes)
+        definitions = compile_moves(rows, names_en)
+        forms.append({
+            "id": form_id,
+            "name": form,
+            "nameEn": hand_stats.get("nameEn") or NAMES_EN.get(form_id, form_id),
+            "slot": slot,
+            "stats": form_stats(form_basic(tables, form)),
+            "moves": [moves.add(move) for move in definitions],
+            "frames": [frames.add(move_frames(row, lookup)) for row in rows],
+        })
+    return {
+        "id": forms[0]["id"],
+        "name": page,
+        "pageId": tables["page_id"],
+        "forms": forms,
+    }
+
+def compile_roster(snapshot=None, directory=MD_DIR, characters_dir=CHARACTERS_DIR, frame_fixes=None):
+    """
+    Compiled roster payload (see module docstring)
+    frame_fixes: {(heading, row key): {column: text}} applied to page 57 rows.
+    Raises ValueError when two forms get the same id.
+    """
+    snapshot = snapshot or load_directory(directory)
+    moves = Interner()
+    frames = Interner()
+    modes = {mode: {} for mode in GAME_MODES}
+    characters = []
+    owners = {}
+    slots = 0
+    for page, tables in snapshot["characters"].items():
+        character = compile_character(page, tables, snapshot["frames"], moves, frames,
+                                      frame_fixes, characters_dir, slots)
+        for form in character["forms"]:
+            if form["id"] in owners:
+                raise ValueError(f"form id {form['id']} used by {owners[form['id']]} and {page}/{form['name']}")
+            owners[form["id"]] = f"{page}/{form['name']}"
+            for mode, table in modes.items():
+                for field, value in mode_stats(form_basic(tables, form["name"]), mode).items():
+                    table.setdefault(field, []).append(value)
+        slots += len(character["forms"])
+        characters.append(character)
+    return {
+        "version": ROSTER_VERSION,
+        "moves": moves.values,
+        "frames": frames.values,
+        "modes": modes,
+        "characters": characters,
+    }, (moves, frames)
+
+def form_files(character, form, roster, characters_dir=CHARACTERS_DIR):
+    """(stats.json, moves.json, frames.json) contents for one form"""
+    hand_stats, _ = hand_made(form["id"], characters_dir)
+    stats = {
+        "id": form["id"],
+        "name": form["name"],
+        "nameEn": form["nameEn"],
+        "canTransform": len(character["forms"]) > 1,
+    }
+    for key in ("canTransform", "transformInto", "transformCondition"):
+        if key in hand_stats:
+            stats[key] = hand_stats[key]
+    stats["stats"] = form["stats"]
+    moves = [roster["moves"][m] for m in form["moves"]]
+    frames = {roster["moves"][m]["id"]: roster["frames"][f] for m, f in zip(form["moves"], form["frames"])}
+    return stats, moves, frames
+
+def split_forms(roster):
+    """[(character, form)] for every form (form ids are unique)"""
+    return [(character, form) for character in roster["characters"] for form in character["forms"]]
+
+def check(roster, characters_dir=CHARACTERS_DIR):
+    """Differences between compiled forms and the hand-made character files"""
+    problems = []
+    for character, form in split_forms(roster):
+        path = Path(characters_dir) / form["id"]
+        if not (path / "stats.json").exists():
+            continue
+        compiled = form_files(character, form, roster, characters_dir)
+        for name, value in zip(("stats.json", "moves.json", "frames.json"), compiled):
+            existing = json.loads((path / name).read_text(encoding="utf-8"))
+            if name == "moves.json":
+                existing = {m["id"]: m for m in existing}
+                value = {m["id"]: m for m in value}
+            for key in sorted(set(existing) | set(value)):
+                if existing.get(key) != value.get(key):
+                    problems.append(f"{form['id']}/{name} {key}: {existing.get(key)} != {value.get(key)}")
+    return problems
+
+def write_json(path, value, indent=2):
+    """Write UTF-8 JSON with a trailing newline"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    separators = None if indent else (",", ":")
+    path.write_text(json.dumps(value, ensure_ascii=False, indent=indent, separators=separators) + "\n",
+                    encoding="utf-8")
+
+def main():
+    """Compile the roster payload; optionally split per form or check the hand-made files"""
+    parser = argparse.ArgumentParser(description="Compile character data with interned moves")
+    parser.add_argument("--directory", default=str(MD_DIR), help="yuyuz_md directory")
+    parser.add_argument("--output", default=str(ROSTER_PATH), help="Compiled roster JSON")
+    parser.add_argument("--split", metavar="DIR", help="Also write <DIR>/<id>/{stats,moves,frames}.json per form")
+    parser.add_argument("--check", action="store_true", help="Compare against the hand-made character files")
+    args = parser.parse_args()
+
+    snapshot = load_directory(args.directory)
+    # Gate: page 57 derived columns must agree or be explained by one cell
+    problems = check_tables(snapshot["frames"])
+    for problem in problems:
+        print(f"  frame check: {format_problem(problem)}")
+    if any(p["suspect"] is None for p in problems):
+        print("page 57 has ambiguous frame rows; not writing")
+        return 1
+
+    try:
+        roster, (moves, frames) = compile_roster(snapshot, frame_fixes=repairs(problems))
+    except ValueError as e:
+        print(f"{e}; not writing")
+        return 1
+    forms = sum(len(c["forms"]) for c in roster["characters"])
+    print(f"{len(roster['characters'])} characters, {forms} forms")
+    print(f"moves:  {moves.requests} rows -> {len(moves.values)} interned")
+    print(f"frames: {frames.requests} rows -> {len(frames.values)} interned")
+
+    if args.check:
+        problems = check(roster)
+        for problem in problems:
+            print(f"  {problem}")
+        print(f"{len(problems)} differences from the hand-made files")
+        return 1 if problems else 0
+
+    # Gate: the payloads must pass the schema and cross-field checks before
+    # anything is written (validated as they will read back from JSON)
+    from validate_character_json import character_errors, report, roster_errors
+    split = [(form["id"], dict(zip(("stats.json", "moves.json", "frames.json"),
+                                   form_files(character, form, roster))))
+             for character, form in split_forms(roster)] if args.split else []
+    results = [(form_id, character_errors(form_id, json.loads(json.dumps(files))))
+               for form_id, files in split]
+    results.append((Path(args.output).name, roster_errors(json.loads(json.dumps(roster)))))
+    failed = report(results)
+    if failed:
+        print(f"{failed} generated files failed validation; not writing")
+        return 1
+
+    write_json(Path(args.output), roster, indent=None)
+    print(f"wrote {args.output} ({Path(args.output).stat().st_size} bytes)")
+    for form_id, files in split:
+        for name, value in files.items():
+            write_json(Path(args.split) / form_id / name, value)
+    if args.split:
+        print(f"wrote {len(split)} form directories under {args.split}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
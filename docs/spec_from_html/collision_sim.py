@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Port of the 相殺判定シミュレーター (simulators/相殺判定シミュレーター_simulator2.htm)
+Two attacks meet and collide; the result is which one gets through. Each
+page iteration draws 128-255 for the 後手 success (the collision roll of
+09_rng_system.md) and 192-255 for the 先手; results in the 打ち消し合い band
+draw a third byte whose bit 2 turns it into お互いつきぬけ.
+
+- "simulator": the page's 65535 iterations from z = 0 (first press). The
+  extra draw makes iterations 2 or 3 draws long, so every orbit position's
+  result and step are evaluated at once and the walk is composed by
+  pointer doubling (16 passes) instead of iterating (~30 ms per rate pair)
+- "uniform": every RNG pair equally likely, the third bit a fair coin
+  (the cheap mode for bulk queries)
+Rates may be arrays; both modes evaluate all of them together.
+
+    python collision_sim.py 56 54
+    python collision_sim.py 122 102 --mode uniform
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from damage_table import RNG_NORMAL, RNG_SPECIAL, TOUKI_MAX, mul16x8, touki_correct
+from judgment_sim import lcg_cycle, ratio, rng_byte, rng_byte_wide
+
+RESULTS = ["first_through", "first_weakened", "cancel", "both_through",
+           "second_weakened", "second_through"]
+RESULT_LABELS = {
+    "first_through": "先手つきぬけ",
+    "first_weakened": "先手減衰つきぬけ",
+    "cancel": "打ち消し合い",
+    "both_through": "お互いつきぬけ",
+    "second_weakened": "後攻減衰つきぬけ",
+    "second_through": "後攻つきぬけ",
+}
+SUMMARY = [("先手有利", [0, 1]), ("互角", [2, 3]), ("後手有利", [4, 5])]
+
+# Band that draws the extra byte (its bit decides cancel vs both_through)
+TIE = RESULTS.index("cancel")
+ITERATIONS = 65535
+BATCH_ROWS = 32
+
+def collision_part(value):
+    """Result index 0-5 (page x - 1, TIE for the whole 3/4 band); -1 for NaN"""
+    value = np.asarray(value, dtype=float)
+    part = np.full(value.shape, -1, dtype=np.int64)
+    part = np.where(value <= 52, 5, part)
+    part = np.where(value >= 53, 4, part)
+    part = np.where(value >= 59, TIE, part)
+    part = np.where(value >= 73, 1, part)
+    part = np.where(value >= 88, 0, part)
+    return part
+
+def collision_grid(first_success, second_success, first_touki=TOUKI_MAX, second_touki=TOUKI_MAX):
+    """[..., 64, 128] result index for every (先手 RNG 192-255, 後手 RNG 128-255)"""
+    first = touki_correct(np.asarray(first_success)[..., None, None], first_touki)
+    second = touki_correct(np.asarray(second_success)[..., None, None], second_touki)
+    return collision_part(ratio(mul16x8(first, RNG_NORMAL[:, None]),
+                                mul16x8(second, RNG_SPECIAL[None, :])))
+
+def _orbit_draws():
+    """Per orbit position: (後手 RNG index, 先手 RNG index, tie bit) of an iteration starting there"""
+    states = lcg_cycle()
+    wide = rng_byte_wide(states) - 128
+    normal = np.roll(rng_byte(states), -1) - 192
+    bit = (np.roll(states, -2) >> 2) & 1
+    return wide.astype(np.intp), normal.astype(np.intp), bit.astype(np.int64)
+
+def _walk_counts(grid):
+    """
+    [B, 6] result counts of the page's iterations, by pointer doubling
+    Counts are packed as 16-bit fields (results 0-3 and 4-5 in two words);
+    no field exceeds 65535 iterations, so additions never carry across.
+    """
+    wide, normal, bit = _orbit_draws()
+    size = len(wide)
+    rows = np.arange(len(grid))[:, None]
+    result = grid[rows, normal[None, :], wide[None, :]]                      # [B, N]
+    tie = result == TIE
+    result = np.where(tie, TIE + bit[None, :], result)
+
+    # Flat indices so each doubling pass is one gather per array
+    offset = rows * size
+    jump = ((np.arange(size) + 2 + tie) % size + offset).ravel()
+    one = np.where(result >= 0, np.uint64(1) << (np.uint64(16) * (result % 4).astype(np.uint64)),
+                   np.uint64(0))
+    low = np.where(result < 4, one, np.uint64(0)).ravel()
+    high = np.where(result >= 4, one, np.uint64(0)).ravel()
+
+    total_low = np.zeros(len(grid), dtype=np.uint64)
+    total_high = np.zeros(len(grid), dtype=np.uint64)
+    position = offset[:, 0]
+    levels = ITERATIONS.bit_length()
+    for level in range(levels):
+        if ITERATIONS >> level & 1:
+            total_low += low[position]
+            total_high += high[position]
+            position = jump[position]
+        if level + 1 < levels:
+            low = low + low[jump]
+            high = high + high[jump]
+            jump = jump[jump]
+
+    fields = [(total_low, i) for i in range(4)] + [(total_high, i) for i in range(2)]
+    return np.stack([(word >> np.uint64(16 * i)) & np.uint64(0xFFFF) for word, i in fields],
+                    axis=1).astype(np.int64)
+
+def collision_results(first_success, second_success, mode="simulator",
+                      first_touki=TOUKI_MAX, second_touki=TOUKI_MAX):
+    """[..., 6] result probabilities; rates and touki broadcast together"""
+    shape = np.broadcast_shapes(np.shape(first_success), np.shape(second_success),
+                                np.shape(first_touki), np.shape(second_touki))
+    args = [np.broadcast_to(a, shape).reshape(-1)
+            for a in (first_success, second_success, first_touki, second_touki)]
+    flat = np.zeros((len(args[0]), len(RESULTS)))
+    for start in range(0, len(flat), BATCH_ROWS):
+        rows = slice(start, start + BATCH_ROWS)
+        grid = collision_grid(args[0][rows], args[1][rows],
+                              args[2][rows][:, None, None], args[3][rows][:, None, None])
+        if mode == "simulator":
+            flat[rows] = _walk_counts(grid) / ITERATIONS
+            continue
+        cells = grid.shape[-2] * grid.shape[-1]
+        for r in range(len(RESULTS)):
+            flat[rows, r] = (grid == r).sum(axis=(-2, -1)) / cells
+        flat[rows, TIE + 1] = flat[rows, TIE] / 2
+        flat[rows, TIE] /= 2
+    return flat.reshape(shape + (len(RESULTS),))
+
+def summary(results):
+    """[..., 3] 先手有利 / 互角 / 後手有利"""
+    results = np.asarray(results)
+    return np.stack([results[..., idx].sum(axis=-1) for _, idx in SUMMARY], axis=-1)
+
+def main():
+    """Print the outcome table like the web simulator"""
+    parser = argparse.ArgumentParser(description="Collision (相殺) judgment simulator")
+    parser.add_argument("first_success", type=int, help="先手成功率")
+    parser.add_argument("second_success", type=int, help="後手成功率")
+    parser.add_argument("--mode", default="simulator", choices=["simulator", "uniform"])
+    args = parser.parse_args()
+
+    results = collision_results(args.first_success, args.second_success, args.mode)
+    for key, p in zip(RESULTS, results):
+        print(f"  {RESULT_LABELS[key]:<12} {p * 100:6.2f}%")
+    print()
+    for (label, _), p in zip(SUMMARY, summary(results)):
+        print(f"  {label:<6} {p * 100:6.2f}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Lazy reader for the Markdown corpora (yuyuz_md, sfc_yuhaku_md)
+Each file is scanned once for its front matter and a heading index (byte
+offset of every ATX heading). The index is kept in memory and in
+corpus_index.json, keyed by path and validated by mtime and size, so later
+runs fetch one section (say one character's block in page 57) by seeking
+to it instead of reading and re-scanning the whole document.
+
+A section is the heading's block: everything after the heading line up to
+the next heading of the same or a higher level (so a '## 幽助' section
+includes its '###' subsections).
+
+    python corpus_reader.py yuyuz_md 057 幽助
+    python corpus_reader.py yuyuz_md 024 --headings
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from spec_tables import find_page, split_front_matter
+
+SCRIPT_DIR = Path(__file__).parent
+INDEX_PATH = SCRIPT_DIR / "corpus_index.json"
+INDEX_VERSION = 1
+
+HEADING = re.compile(rb'^(#{1,6})\s+(.*?)\s*$')
+
+def scan_file(path):
+    """Index entry for a file: front matter, body offset and [level, title, start, end] headings"""
+    with open(path, "rb") as f:
+        data = f.read()
+    front, body = split_front_matter(data.decode("utf-8"))
+    body_offset = len(data) - len(body.encode("utf-8"))
+
+    headings = []
+    offset = body_offset
+    for line in data[body_offset:].splitlines(keepends=True):
+        match = HEADING.match(line.rstrip(b"\r\n"))
+        if match:
+            headings.append([len(match.group(1)), match.group(2).decode("utf-8"), offset, offset + len(line)])
+        offset += len(line)
+
+    # Block end: the next heading at the same or a higher level
+    ends = []
+    for i, (level, _, _, _) in enumerate(headings):
+        end = len(data)
+        for later in headings[i + 1:]:
+            if later[0] <= level:
+                end = later[2]
+                break
+        ends.append(end)
+    return {
+        "front_matter": front,
+        "body_offset": body_offset,
+        "size": len(data),
+        "headings": [h + [end] for h, end in zip(headings, ends)],
+    }
+
+class CorpusReader:
+    """Front matter and sections of the files in one or more corpus directories"""
+    def __init__(self, index_path=INDEX_PATH):
+        self.index_path = Path(index_path) if index_path else None
+        self.entries = {}
+        self.dirty = False
+        if self.index_path and self.index_path.exists():
+            try:
+                stored = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except ValueError:
+                stored = {}
+            if stored.get("version") == INDEX_VERSION:
+                self.entries = stored["files"]
+
+    def entry(self, path):
+        """Index entry for a path, rescanning it if its mtime or size changed"""
+        path = Path(path).resolve()
+        stat = os.stat(path)
+        key = str(path)
+        entry = self.entries.get(key)
+        if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            entry = scan_file(path)
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self.entries[key] = entry
+            self.dirty = True
+        return entry
+
+    def save(self):
+        """Write the index back if any file was rescanned"""
+        if self.index_path and self.dirty:
+            self.index_path.write_text(json.dumps({"version": INDEX_VERSION, "files": self.entries},
+                                                  ensure_ascii=False), encoding="utf-8")
+            self.dirty = False
+
+    def front_matter(self, path):
+        """Front matter fields ({} if none)"""
+        return self.entry(path)["front_matter"]
+
+    def headings(self, path):
+        """[(level, title)] in document order"""
+        return [(level, title) for level, title, _, _, _ in self.entry(path)["headings"]]
+
+    def read_range(self, path, start, end):
+        """Decoded bytes start..end of a file"""
+        with open(path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start).decode("utf-8")
+
+    def body(self, path):
+        """Everything after the front matter"""
+        entry = self.entry(path)
+        return self.read_range(path, entry["body_offset"], entry["size"])
+
+    def section(self, path, title, level=None, occurrence=0):
+        """Block under a heading with this title (and level), or None; occurrence picks among repeats"""
+        matches = [(start, end) for h_level, h_title, _, start, end in self.entry(path)["headings"]
+                   if h_title == title and level in (None, h_level)]
+        if occurrence >= len(matches):
+            return None
+        return self.read_range(path, *matches[occurrence])
+
+    def sections(self, path, level):
+        """[(title, block)] for every heading at a level, in document order"""
+        return [(title, self.read_range(path, start, end))
+                for h_level, title, _, start, end in self.entry(path)["headings"] if h_level == level]
+
+_reader = None
+
+def default_reader():
+    """Process-wide reader backed by corpus_index.json"""
+    global _reader
+    if _reader is None:
+        _reader = CorpusReader()
+    return _reader
+
+def main():
+    """Print a page's front matter, headings or one section"""
+    parser = argparse.ArgumentParser(description="Read front matter and sections from the corpus")
+    parser.add_argument("directory", help="yuyuz_md or sfc_yuhaku_md")
+    parser.add_argument("page", help="Page id (057) or file name")
+    parser.add_argument("section", nargs="?", help="Heading title")
+    parser.add_argument("--level", type=int, help="Heading level of the section")
+    parser.add_argument("--headings", action="store_true", help="List headings")
+    args = parser.parse_args()
+
+    path = find_page(args.directory, int(args.page)) if args.page.isdigit() else Path(args.directory) / args.page
+    if path is None or not path.exists():
+        print(f"No page {args.page} in {args.directory}", file=sys.stderr)
+        return 1
+
+    reader = default_reader()
+    if args.section:
+        text = reader.section(path, args.section, args.level)
+        if text is None:
+            print(f"No section {args.section} in {path.name}", file=sys.stderr)
+            return 1
+        print(text)
+    elif args.headings:
+        for level, title in reader.headings(path):
+            print(f"{'  ' * (level - 1)}{'#' * level} {title}")
+    else:
+        print(json.dumps(reader.front_matter(path), ensure_ascii=False, indent=2))
+    reader.save()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Batched damage / balance-damage tables over the full correction space
+Evaluates 威力 (or 奪バランス値) x touki (97 levels) x RNG (192-255) x balance
+correction (256 levels) x defense x hit type with the game's integer
+arithmetic, as NumPy broadcasts over whole grids.
+
+Values are 8.8 fixed point like the game: the high byte is whole HP (or
+balance), the low byte is the fraction that accumulates at 7E0E2A/7E102A.
+
+Corrected stats are cached per base value as memory-mapped .npy files in
+damage_cache/, so AI and balance tools can load them instead of recomputing.
+
+    python damage_table.py                      # build caches and pair tables
+    python damage_table.py yusuke hiei --touki 96 --move down_x
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).parent
+CHARACTER_DIR = SCRIPT_DIR.parent.parent / "public" / "data" / "characters"
+CACHE_DIR = SCRIPT_DIR / "damage_cache"
+
+TOUKI_MAX = 96
+
+# 019-闘気補正: touki 0-95 (touki 96 uses AB00 directly)
+TOUKI_TABLE = np.array([
+    0x02, 0x05, 0x07, 0x0A, 0x0F, 0x14, 0x17, 0x19, 0x1E, 0x21,
+    0x26, 0x2B, 0x2E, 0x33, 0x35, 0x38, 0x3D, 0x42, 0x45, 0x4A,
+    0x4C, 0x4F, 0x54, 0x59, 0x5C, 0x61, 0x63, 0x68, 0x6E, 0x70,
+    0x75, 0x78, 0x7D, 0x80, 0x85, 0x8A, 0x8C, 0x91, 0x97, 0x99,
+    0x9C, 0x9E, 0xA1, 0xA3, 0xA8, 0xAB, 0xAE, 0xB0, 0xB3, 0xB5,
+    0xB8, 0xBA, 0xBD, 0xC0, 0xC0, 0xC2, 0xC5, 0xC7, 0xCA, 0xCC,
+    0xCF, 0xD1, 0xD4, 0xD4, 0xD7, 0xD9, 0xD9, 0xDC, 0xDE, 0xE1,
+    0xE3, 0xE6, 0xE8, 0xE8, 0xEB, 0xEB, 0xEE, 0xEE, 0xF0, 0xF0,
+    0xF3, 0xF3, 0xF3, 0xF5, 0xF5, 0xF5, 0xF8, 0xF8, 0xF8, 0xFA,
+    0xFA, 0xFA, 0xFD, 0xFD, 0xFD, 0xFD,
+], dtype=np.uint32)
+
+# 020-バランス補正: balance 0-255 (0 means no correction, balance <= 8)
+BALANCE_TABLE = np.array(
+    [0] * 9 + [254] * 4 + [253] * 4 + [252] * 2 + [251] * 2 + [250] * 2 + [249] * 2
+    + list(range(248, 207, -1)) + [208, 207, 207, 206, 206, 205, 205]
+    + [204] * 24 + [201] * 16 + [198] * 16 + [195] * 16 + [192] * 16
+    + [188] * 16 + [186] * 8 + [183] * 16 + [181] * 16 + [179] * 16 + [175] * 23,
+    dtype=np.uint32,
+)
+
+# 021-乱数補正: normal range; the special range (後手 vs non-attacks) is 128-255
+RNG_NORMAL = np.arange(192, 256, dtype=np.uint32)
+RNG_SPECIAL = np.arange(128, 256, dtype=np.uint32)
+
+HIT_TYPES = ["direct", "graze", "block"]
+
+def touki_correct(values, touki):
+    """Touki correction: AB00 at MAX, otherwise AB x 闘気補正値 (8.8 fixed)"""
+    values = np.asarray(values, dtype=np.uint32)
+    touki = np.asarray(touki)
+    factor = np.where(touki >= TOUKI_MAX, 0x100, TOUKI_TABLE[np.minimum(touki, TOUKI_MAX - 1)])
+    return values * factor.astype(np.uint32)
+
+def mul16x8(values, factor):
+    """
+    16-bit x 8-bit multiply keeping the middle 16 bits, as in 020/021
+    The low byte sum drops its carry (繰り上がり桁は使用しない).
+    """
+    values = np.asarray(values, dtype=np.uint32)
+    factor = np.asarray(factor, dtype=np.uint32)
+    high = (values >> 8) * factor
+    low = (values & 0xFF) * factor
+    return (high & 0xFF00) | (((high & 0xFF) + (low >> 8)) & 0xFF)
+
+def rng_correct(values, rng):
+    """RNG correction (乱数補正値 192-255 or 128-255)"""
+    return mul16x8(values, rng)
+
+def balance_correct(values, balance):
+    """Balance correction of the attacker's balance; no change at balance <= 8"""
+    balance = np.asarray(balance)
+    factor = BALANCE_TABLE[np.clip(balance, 0, 255)]
+    return np.where(factor == 0, np.asarray(values, dtype=np.uint32), mul16x8(values, factor))
+
+def corrected_grid(value, rng=RNG_NORMAL):
+    """[touki 97, balance 256, rng] corrected stat for one base value"""
+    touki = np.arange(TOUKI_MAX + 1)[:, None, None]
+    balance = np.arange(256)[None, :, None]
+    stat = touki_correct(value, touki)
+    stat = rng_correct(stat, rng[None, None, :])
+    stat = balance_correct(stat, balance)
+    return stat.astype(np.uint16)
+
+def apply_defense(corrected, defense):
+    """Defender's 威力倍率 or 奪バランス値倍率 (x/256)"""
+    return (np.asarray(corrected, dtype=np.uint32) * np.uint32(defense)) >> 8
+
+def hp_hit(damage, hit):
+    """HP damage for a hit type: direct 1, graze 1/4, block 3/8"""
+    damage = np.asarray(damage, dtype=np.uint32)
+    if hit == "direct":
+        return damage
+    if hit == "graze":
+        return damage >> 2
+    if hit == "block":
+        return (damage * 3) >> 3
+    raise ValueError(f"Unknown hit type: {hit}")
+
+def balance_hit(damage, hit):
+    """Balance damage for a hit type: graze 1/2, direct and block in full"""
+    damage = np.asarray(damage, dtype=np.uint32)
+    if hit not in HIT_TYPES:
+        raise ValueError(f"Unknown hit type: {hit}")
+    return damage >> 1 if hit == "graze" else damage
+
+def apply_hp_damage(hp, fraction, damage):
+    """
+    Subtract 8.8 damage from HP with the 7E0E2A fractional accumulator
+    Returns (hp, fraction); an accumulator overflow past 255 costs 1 HP.
+    """
+    hp = np.asarray(hp, dtype=np.int32)
+    damage = np.asarray(damage, dtype=np.int32)
+    total = np.asarray(fraction, dtype=np.int32) + (damage & 0xFF)
+    return hp - (damage >> 8) - (total >> 8), total & 0xFF
+
+def cache_path(value, rng=RNG_NORMAL, cache_dir=CACHE_DIR):
+    """Cache file for one base value and RNG range"""
+    return Path(cache_dir) / f"stat_{int(value):03d}_r{int(rng[0])}.npy"
+
+def load_grid(value, rng=RNG_NORMAL, cache_dir=CACHE_DIR, rebuild=False):
+    """Memory-mapped corrected grid for a base value, building it if missing"""
+    path = cache_path(value, rng, cache_dir)
+    if rebuild or not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        grid = corrected_grid(value, rng)
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=grid.dtype, shape=grid.shape)
+        out[:] = grid
+        out.flush()
+        del out
+    return np.load(path, mmap_mode="r")
+
+def defense_byte(fraction):
+    """Stat JSON multiplier (0.227) as the game's x/256 byte (58)"""
+    return int(round(float(fraction) * 256))
+
+def load_characters(character_dir=CHARACTER_DIR):
+    """{id: {"stats": ..., "moves": [...]}} from public/data/characters"""
+    characters = {}
+    for stats_path in sorted(Path(character_dir).glob("*/stats.json")):
+        moves_path = stats_path.parent / "moves.json"
+        if not moves_path.exists():
+            continue
+        with open(stats_path, "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        with open(moves_path, "r", encoding="utf-8") as f:
+            moves = json.load(f)
+        characters[stats["id"]] = {"stats": stats, "moves": moves}
+    return characters
+
+def move_distribution(move, defender_stats, touki, balance=0, hit="direct",
+                      rng=RNG_NORMAL, cache_dir=CACHE_DIR):
+    """
+    (hp, balance) 8.8 damage for every RNG value of one move
+    defender_stats is the "stats" block of stats.json
+    """
+    power = load_grid(move.get("power") or 0, rng, cache_dir)[touki, balance]
+    drain = load_grid(move.get("balanceDrain") or 0, rng, cache_dir)[touki, balance]
+    hp = hp_hit(apply_defense(power, defense_byte(defender_stats["defense"])), hit)
+    bal = balance_hit(apply_defense(drain, defense_byte(defender_stats["balanceDefense"])), hit)
+    return hp, bal
+
+def pair_tables(characters, balance=0, rng=RNG_NORMAL, cache_dir=CACHE_DIR):
+    """
+    Mean damage over RNG for every attacker move x defender x hit x touki
+    Returns {"attackers", "moves", "defenders", "hp", "balance"} where hp and
+    balance are float32 [attacker, move, defender, hit, touki] in whole units
+    (NaN where an attacker has fewer moves).
+    """
+    ids = list(characters)
+    move_count = max(len(c["moves"]) for c in characters.values())
+    shape = (len(ids), move_count, len(ids), len(HIT_TYPES), TOUKI_MAX + 1)
+    hp_mean = np.full(shape, np.nan, dtype=np.float32)
+    bal_mean = np.full(shape, np.nan, dtype=np.float32)
+
+    for d, defender in enumerate(ids):
+        stats = characters[defender]["stats"]["stats"]
+        defense = defense_byte(stats["defense"])
+        balance_defense = defense_byte(stats["balanceDefense"])
+        for a, attacker in enumerate(ids):
+            for m, move in enumerate(characters[attacker]["moves"]):
+                power = load_grid(move.get("power") or 0, rng, cache_dir)[:, balance, :]
+                drain = load_grid(move.get("balanceDrain") or 0, rng, cache_dir)[:, balance, :]
+                hp_base = apply_defense(power, defense)
+                bal_base = apply_defense(drain, balance_defense)
+                for h, hit in enumerate(HIT_TYPES):
+                    hp_mean[a, m, d, h] = hp_hit(hp_base, hit).mean(axis=-1) / 256
+                    bal_mean[a, m, d, h] = balance_hit(bal_base, hit).mean(axis=-1) / 256
+
+    moves = [[mv["id"] for mv in characters[i]["moves"]] for i in ids]
+    return {"attackers": ids, "moves": moves, "defenders": ids, "hp": hp_mean, "balance": bal_mean}
+
+def save_pair_tables(tables, balance=0, cache_dir=CACHE_DIR):
+    """Save pair tables as .npy (loadable with mmap_mode='r') plus an index"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    np.save(cache_dir / f"pairs_b{balance:03d}_hp.npy", tables["hp"])
+    np.save(cache_dir / f"pairs_b{balance:03d}_balance.npy", tables["balance"])
+    index = {
+        "attackers": tables["attackers"],
+        "moves": tables["moves"],
+        "defenders": tables["defenders"],
+        "hit_types": HIT_TYPES,
+        "axes": ["attacker", "move", "defender", "hit", "touki"],
+    }
+    with open(cache_dir / "pairs_index.json", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+def main():
+    """Build the cache, or print one move's damage spread"""
+    parser = argparse.ArgumentParser(description="Damage tables over the correction space")
+    parser.add_argument("attacker", nargs="?", help="attacker id (e.g. yusuke)")
+    parser.add_argument("defender", nargs="?", help="defender id")
+    parser.add_argument("--move", help="move id (default: all moves)")
+    parser.add_argument("--touki", type=int, default=TOUKI_MAX)
+    parser.add_argument("--balance", type=int, default=0, help="attacker's balance (0-255)")
+    parser.add_argument("--hit", default="direct", choices=HIT_TYPES)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild cached grids")
+    args = parser.parse_args()
+
+    characters = load_characters()
+    if not characters:
+        print(f"No character data in {CHARACTER_DIR}")
+        return 1
+
+    if not args.attacker:
+        values = sorted({mv.get(key) or 0 for c in characters.values()
+                         for mv in c["moves"] for key in ("power", "balanceDrain")})
+        print(f"Building {len(values)} corrected grids in {CACHE_DIR}")
+        for value in values:
+            load_grid(value, rebuild=args.rebuild)
+        tables = pair_tables(characters, args.balance)
+        save_pair_tables(tables, args.balance)
+        print(f"Pair tables: {tables['hp'].shape} (attacker, move, defender, hit, touki)")
+        return 0
+
+    attacker = characters[args.attacker]
+    defender = characters[args.defender or args.attacker]["stats"]["stats"]
+    moves = [mv for mv in attacker["moves"] if not args.move or mv["id"] == args.move]
+    print(f"{args.attacker} -> {args.defender or args.attacker} "
+          f"touki {args.touki} balance {args.balance} {args.hit}")
+    for move in moves:
+        hp, bal = move_distribution(move, defender, args.touki, args.balance, args.hit)
+        print(f"  {move['id']:<16} HP {hp.min() / 256:6.2f}-{hp.max() / 256:6.2f} "
+              f"(mean {hp.mean() / 256:6.2f})  balance {bal.min() >> 8:>3}-{bal.max() >> 8:>3}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Expectimax CPU opponent over battle_engine states
+The AI picks the command with the best expected value; the opponent is a
+chance node (uniform over its commands, or its matchup_nash equilibrium mix)
+and each exchange is a chance node over the exact judgment outcomes.
+Values are cached in an LRU transposition table and the search deepens
+iteratively until the time budget runs out.
+
+--export writes a compact policy for the TS game: the best command for
+every point of a coarse state grid, as base64 action indices
+(src/data/aiPolicy.ts reads it).
+
+    python expectimax_ai.py 幽助 飛影 --budget 2
+    python expectimax_ai.py 幽助 飛影 --export ai_yusuke_hiei.json --depth 1
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+from collections import OrderedDict
+from itertools import product
+
+import numpy as np
+
+from battle_engine import (
+    KNOCKDOWN, REIKI_START, BattleEngine, Side, State, describe, initial_state, winner,
+)
+from damage_table import TOUKI_MAX
+from matchup_nash import BALANCE_WEIGHT, REIKI_WEIGHT, solve_all
+from roster import load_roster
+
+WIN_VALUE = 1000.0
+TABLE_SIZE = 200000
+
+# Export grid: whole HP, balance, own reiki, initiative (1 = the AI is 先手)
+EXPORT_AXES = [
+    ("hp", [24, 48, 72, 96]),
+    ("opponent_hp", [24, 48, 72, 96]),
+    ("balance", [0, 64, 128, 192]),
+    ("opponent_balance", [0, 64, 128, 192]),
+    ("reiki", [0, 5, 10, 15, 20, 25]),
+    ("first", [0, 1]),
+]
+NO_ACTION = 255
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is spent"""
+
+class TranspositionTable:
+    """state -> (depth, value) with least-recently-used eviction"""
+
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, state, depth):
+        """Cached value searched at least this deep, or None"""
+        entry = self.entries.get(state)
+        if entry is None or entry[0] < depth:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(state)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, state, depth, value):
+        """Store a value, evicting the oldest entries past the size limit"""
+        self.entries[state] = (depth, value)
+        self.entries.move_to_end(state)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+def uniform_opponent(engine, state, side, actions):
+    """Equal weight on every available command"""
+    return [1 / len(actions)] * len(actions)
+
+def nash_opponent(roster, names):
+    """
+    Opponent model from the matchup_nash equilibria of both initiative orders
+    Falls back to uniform when the mix has no available command.
+    """
+    me, opponent = names
+    results, _ = solve_all(roster, [(me, opponent), (opponent, me)])
+    mixes = {1: results[(opponent, me)]["first_mix"], 0: results[(me, opponent)]["second_mix"]}
+
+    def policy(engine, state, side, actions):
+        mix = mixes[int(state.first == side)]
+        weights = [mix.get(key, 0.0) for key in actions]
+        total = sum(weights)
+        if total <= 0:
+            return uniform_opponent(engine, state, side, actions)
+        return [w / total for w in weights]
+    return policy
+
+def evaluate(state, side):
+    """Heuristic value of a state for side (whole HP units)"""
+    result = winner(state)
+    me, other = state.sides[side], state.sides[1 - side]
+    if result is not None:
+        if result == -1:
+            return 0.0
+        margin = (me.hp - other.hp) / 256
+        return WIN_VALUE + margin if result == side else -WIN_VALUE + margin
+    return ((me.hp - other.hp) / 256
+            + BALANCE_WEIGHT * (min(other.balance, KNOCKDOWN) - min(me.balance, KNOCKDOWN))
+            + REIKI_WEIGHT * (me.reiki - other.reiki))
+
+class ExpectimaxAI:
+    """Iterative-deepening expectimax for one side of a BattleEngine"""
+
+    def __init__(self, engine, side=0, opponent_policy=uniform_opponent, table_size=TABLE_SIZE):
+        self.engine = engine
+        self.side = side
+        self.opponent_policy = opponent_policy
+        self.table = TranspositionTable(table_size)
+        self.deadline = None
+        self.nodes = 0
+
+    def _check_time(self):
+        """Abort the current iteration once past the deadline"""
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % 64 == 0 and time.time() > self.deadline:
+            raise SearchTimeout()
+
+    def action_values(self, state, depth):
+        """{command key: expected value} for the AI's commands"""
+        engine, side = self.engine, self.side
+        mine = engine.actions(state, side)
+        theirs = engine.actions(state, 1 - side)
+        weights = self.opponent_policy(engine, state, 1 - side, theirs)
+
+        values = {}
+        for key in mine:
+            total = 0.0
+            for answer, weight in zip(theirs, weights):
+                if weight <= 0:
+                    continue
+                keys = (key, answer) if side == 0 else (answer, key)
+                for p, next_state in engine.outcome(state, keys):
+                    total += weight * p * self.value(next_state, depth - 1)
+            values[key] = total
+        return values
+
+    def value(self, state, depth):
+        """Expectimax value of state for the AI"""
+        self._check_time()
+        if depth <= 0 or winner(state) is not None:
+            return evaluate(state, self.side)
+        cached = self.table.get(state, depth)
+        if cached is not None:
+            return cached
+        result = max(self.action_values(state, depth).values())
+        self.table.put(state, depth, result)
+        return result
+
+    def search(self, state, budget=1.0, max_depth=8):
+        """
+        Best command within a time budget (seconds)
+        Returns (key, value, completed depth); depth 1 always completes.
+        """
+        self.deadline = None
+        values = self.action_values(state, 1)
+        depth = 1
+        self.deadline = time.time() + budget
+        try:
+            for d in range(2, max_depth + 1):
+                values = self.action_values(state, d)
+                depth = d
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+        best = max(values, key=values.get)
+        return best, values[best], depth
+
+    def best_action(self, state, depth):
+        """Best command at a fixed depth (no time limit)"""
+        values = self.action_values(state, depth)
+        return max(values, key=values.get) if values else None
+
+def export_state(axes_values, side, touki=TOUKI_MAX):
+    """Engine state for one export grid point"""
+    hp, opponent_hp, balance, opponent_balance, reiki, first = axes_values
+    me = Side(hp << 8, touki, balance, reiki, None, False)
+    other = Side(opponent_hp << 8, touki, opponent_balance, REIKI_START, None, False)
+    sides = (me, other) if side == 0 else (other, me)
+    return State(sides, side if first else 1 - side)
+
+def export_policy(ai, depth=1, axes=EXPORT_AXES):
+    """Compact policy dict: axes, action list and base64 uint8 action indices"""
+    engine, side = ai.engine, ai.side
+    moves = engine.moves[side]
+    index = {move["key"]: i for i, move in enumerate(moves)}
+    shape = [len(values) for _, values in axes]
+    policy = np.full(shape, NO_ACTION, dtype=np.uint8)
+
+    for point in product(*(range(n) for n in shape)):
+        state = export_state([axes[a][1][i] for a, i in enumerate(point)], side)
+        key = ai.best_action(state, depth)
+        if key is not None:
+            policy[point] = index[key]
+
+    return {
+        "version": 1,
+        "names": list(engine.names),
+        "side": side,
+        "depth": depth,
+        "actions": [{"key": m["key"], "command": m["command"], "name": m["name"]} for m in moves],
+        "axes": [{"name": name, "values": values} for name, values in axes],
+        "policy": base64.b64encode(policy.tobytes()).decode("ascii"),
+    }
+
+def main():
+    """Pick a command for the opening state, or export a policy grid"""
+    parser = argparse.ArgumentParser(description="Expectimax CPU opponent")
+    parser.add_argument("me", help="AI character")
+    parser.add_argument("opponent", help="opponent character")
+    parser.add_argument("--budget", type=float, default=1.0, help="search time in seconds")
+    parser.add_argument("--second", action="store_true", help="the AI starts as 後手")
+    parser.add_argument("--opponent-model", default="uniform", choices=["uniform", "nash"])
+    parser.add_argument("--export", help="write a policy grid JSON to this path")
+    parser.add_argument("--depth", type=int, default=1, help="search depth for --export")
+    args = parser.parse_args()
+
+    roster = load_roster()
+    names = (args.me, args.opponent)
+    engine = BattleEngine(roster, names)
+    opponent = nash_opponent(roster, names) if args.opponent_model == "nash" else uniform_opponent
+    ai = ExpectimaxAI(engine, 0, opponent)
+
+    if args.export:
+        start = time.time()
+        policy = export_policy(ai, args.depth)
+        with open(args.export, "w", encoding="utf-8") as f:
+            json.dump(policy, f, ensure_ascii=False)
+        points = int(np.prod([len(axis["values"]) for axis in policy["axes"]]))
+        print(f"Wrote {points} states to {args.export} in {time.time() - start:.1f}s")
+        return 0
+
+    state = initial_state(first=1 if args.second else 0)
+    print(describe(state, names))
+    key, value, depth = ai.search(state, args.budget)
+    print(f"best: {key} (value {value:.2f}, depth {depth}, {ai.nodes} nodes, "
+          f"table {len(ai.table.entries)} entries, {ai.table.hits} hits)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
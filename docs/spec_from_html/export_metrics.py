@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing and metrics for the atwiki exporters
+Records durations, bytes, retries, cache hits and status per page
+Writes a JSON report and prints the slowest pages and stages at the end of a run
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Pipeline stages in the order a page goes through them
+STAGES = ["fetch", "decode", "parse", "clean", "image", "convert", "write"]
+
+class PageMetrics:
+    """Metrics collected for a single page"""
+
+    def __init__(self, page_id, title):
+        self.page_id = page_id
+        self.title = title
+        self.durations = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.images = 0
+        self.cache_hit = False
+        self.status = "pending"
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage; repeated stages (e.g. several images) accumulate"""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+    def total_time(self):
+        """Sum of all recorded stage durations"""
+        return sum(self.durations.values())
+
+    def to_dict(self):
+        """JSON-friendly representation"""
+        return {
+            "id": self.page_id,
+            "title": self.title,
+            "status": self.status,
+            "cache_hit": self.cache_hit,
+            "retries": self.retries,
+            "images": self.images,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "total_s": round(self.total_time(), 6),
+            "stages_s": {k: round(v, 6) for k, v in self.durations.items()},
+        }
+
+class RunMetrics:
+    """Collects PageMetrics for a whole exporter run"""
+
+    def __init__(self, run_name):
+        self.run_name = run_name
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.wall_time = None
+        self.pages = {}
+
+    def page(self, page_id, title=""):
+        """Get (or create) the metrics record for a page"""
+        if page_id not in self.pages:
+            self.pages[page_id] = PageMetrics(page_id, title)
+        return self.pages[page_id]
+
+    def add(self, page_metrics):
+        """Merge a PageMetrics produced elsewhere (e.g. in a worker process)"""
+        existing = self.pages.get(page_metrics.page_id)
+        if existing is None:
+            self.pages[page_metrics.page_id] = page_metrics
+            return page_metrics
+
+        for name, elapsed in page_metrics.durations.items():
+            existing.durations[name] = existing.durations.get(name, 0.0) + elapsed
+        existing.bytes_in += page_metrics.bytes_in
+        existing.bytes_out += page_metrics.bytes_out
+        existing.retries += page_metrics.retries
+        existing.images += page_metrics.images
+        existing.cache_hit = existing.cache_hit or page_metrics.cache_hit
+        if page_metrics.status != "pending":
+            existing.status = page_metrics.status
+        return existing
+
+    def finish(self):
+        """Stop the wall clock"""
+        self.wall_time = time.perf_counter() - self._start
+
+    def stage_totals(self):
+        """Total seconds spent in each stage across all pages"""
+        totals = {}
+        for page in self.pages.values():
+            for name, elapsed in page.durations.items():
+                totals[name] = totals.get(name, 0.0) + elapsed
+        ordered = [s for s in STAGES if s in totals]
+        ordered += sorted(s for s in totals if s not in STAGES)
+        return {name: totals[name] for name in ordered}
+
+    def status_counts(self):
+        """Number of pages per final status"""
+        counts = {}
+        for page in self.pages.values():
+            counts[page.status] = counts.get(page.status, 0) + 1
+        return counts
+
+    def report(self):
+        """Build the full JSON report"""
+        if self.wall_time is None:
+            self.finish()
+
+        pages = [self.pages[k].to_dict() for k in sorted(self.pages)]
+        return {
+            "run": self.run_name,
+            "started_at": self.started_at.isoformat(),
+            "wall_time_s": round(self.wall_time, 6),
+            "pages_total": len(pages),
+            "cache_hits": sum(1 for p in pages if p["cache_hit"]),
+            "retries": sum(p["retries"] for p in pages),
+            "bytes_in": sum(p["bytes_in"] for p in pages),
+            "bytes_out": sum(p["bytes_out"] for p in pages),
+            "status": self.status_counts(),
+            "stages_s": {k: round(v, 6) for k, v in self.stage_totals().items()},
+            "pages": pages,
+        }
+
+    def write_report(self, path):
+        """Write the JSON report to disk"""
+        path = Path(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def print_summary(self, top=5):
+        """Print the slowest stages and pages"""
+        report = self.report()
+
+        print("\n" + "=" * 60)
+        print("Run Metrics")
+        print("=" * 60)
+        print(f"Wall time: {report['wall_time_s']:.2f}s")
+        print(f"Pages: {report['pages_total']} "
+              f"(cache hits: {report['cache_hits']}, retries: {report['retries']})")
+        print(f"Transferred: {report['bytes_in'] / 1024:.1f} KiB in, "
+              f"{report['bytes_out'] / 1024:.1f} KiB written")
+        print("Status: " + ", ".join(f"{k}={v}" for k, v in sorted(report["status"].items())))
+
+        stage_totals = report["stages_s"]
+        if stage_totals:
+            busy = sum(stage_totals.values()) or 1.0
+            print("\nTime by stage:")
+            for name, elapsed in sorted(stage_totals.items(), key=lambda kv: -kv[1]):
+                print(f"  {name:<8} {elapsed:8.2f}s  {elapsed / busy * 100:5.1f}%")
+
+        slowest = sorted(self.pages.values(), key=lambda p: -p.total_time())[:top]
+        slowest = [p for p in slowest if p.total_time() > 0]
+        if slowest:
+            print(f"\nSlowest {len(slowest)} pages:")
+            for page in slowest:
+                worst = max(page.durations.items(), key=lambda kv: kv[1])
+                print(f"  {page.page_id:>4} {page.title[:20]:<20} "
+                      f"{page.total_time():6.2f}s  (slowest stage: {worst[0]} {worst[1]:.2f}s)")
+
+@contextmanager
+def track(page_metrics, name):
+    """Time a stage when metrics are enabled; no-op when page_metrics is None"""
+    if page_metrics is None:
+        yield None
+        return
+    with page_metrics.stage(name):
+        yield page_metrics
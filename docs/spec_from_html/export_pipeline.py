@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Two-stage exporter pipeline
+I/O stage: one thread fetches pages (with rate limiting) into a bounded queue
+CPU stage: a process pool cleans and converts the fetched HTML to Markdown
+Results are written back in the main process as they complete
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from export_metrics import PageMetrics
+
+# Sentinel put on the queue when the fetch stage has no more pages
+_DONE = object()
+
+def default_workers():
+    """Size the CPU stage to the machine's core count"""
+    return os.cpu_count() or 1
+
+def _fetch_stage(pages, fetch_page, work, metrics, delay):
+    """Fetch every page and hand the payloads to the CPU stage"""
+    try:
+        for page_id in sorted(pages.keys()):
+            title = pages[page_id]
+            page_metrics = metrics.page(page_id, title) if metrics else None
+            try:
+                payload = fetch_page(page_id, title, page_metrics)
+            except Exception as e:
+                print(f"  Error fetching page {page_id}: {e}")
+                if page_metrics:
+                    page_metrics.status = "error"
+                payload = None
+
+            # Blocks when the CPU stage falls behind (bounded queue)
+            work.put((page_id, title, payload))
+
+            # Rate limit every network attempt, failed ones included; only
+            # cache hits (True) skip it
+            if payload is not True:
+                time.sleep(delay)
+    finally:
+        work.put(_DONE)
+
+def run_pipeline(pages, fetch_page, render_page, write_page, metrics=None,
+                 workers=None, queue_size=None, delay=0.7):
+    """
+    Run the fetch -> render -> write pipeline over {page_id: title}
+
+    fetch_page(page_id, title, page_metrics) runs in the I/O thread and returns
+    a picklable payload, True for a cache hit, or None on failure. Every
+    result but a cache hit is followed by a delay-second pause.
+    render_page(page_id, title, payload) runs in a worker process and returns
+    (result, PageMetrics); it must be a module-level function.
+    write_page(page_id, title, result, page_metrics) runs in the main process
+    and returns True on success.
+
+    Returns (success_count, failed_pages)
+    """
+    workers = workers or default_workers()
+    queue_size = queue_size or workers * 2
+    work = queue.Queue(maxsize=queue_size)
+
+    fetcher = threading.Thread(
+        target=_fetch_stage,
+        args=(pages, fetch_page, work, metrics, delay),
+        daemon=True,
+    )
+    fetcher.start()
+
+    success_count = 0
+    failed_pages = []
+    pending = {}
+
+    def finish(done):
+        nonlocal success_count
+        for future in done:
+            page_id, title = pending.pop(future)
+            page_metrics = metrics.page(page_id, title) if metrics else None
+            try:
+                result, worker_metrics = future.result()
+                if page_metrics is not None and worker_metrics is not None:
+                    page_metrics = metrics.add(worker_metrics)
+                ok = result is not None and write_page(page_id, title, result, page_metrics)
+            except Exception as e:
+                print(f"  Error converting page {page_id}: {e}")
+                if page_metrics:
+                    page_metrics.status = "error"
+                ok = False
+
+            if ok:
+                success_count += 1
+            else:
+                failed_pages.append((page_id, title))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            item = work.get()
+            if item is _DONE:
+                break
+
+            page_id, title, payload = item
+            if payload is True:
+                success_count += 1
+                continue
+            if payload is None:
+                failed_pages.append((page_id, title))
+                continue
+
+            # Keep at most queue_size renders in flight so memory stays bounded
+            if len(pending) >= queue_size:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                finish(done)
+
+            pending[pool.submit(render_page, page_id, title, payload)] = (page_id, title)
+
+            # Write out anything that already finished
+            done, _ = wait(pending, timeout=0, return_when=FIRST_COMPLETED)
+            finish(done)
+
+        if pending:
+            done, _ = wait(pending)
+            finish(done)
+
+    fetcher.join()
+    failed_pages.sort()
+    return success_count, failed_pages
+
+def new_worker_metrics(page_id, title):
+    """PageMetrics for use inside a worker process (merged back by run_pipeline)"""
+    return PageMetrics(page_id, title)
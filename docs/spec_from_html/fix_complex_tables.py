@@ -7,6 +7,8 @@ Specifically handles the character template tables with proper formatting
 from pathlib import Path
 import re
 
+from corpus_reader import default_reader
+
 def create_fixed_page_29():
     """Create a properly formatted version of page 29 (個別雛形)"""
 
@@ -96,21 +98,14 @@ fetched_at: "2025-09-30T01:13:12.120955"
 def fix_character_page_tables(page_path):
     """Fix tables in a character page to match the template format"""
 
-    with open(page_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    reader = default_reader()
 
     # Check if this is a character page with the broken table format
-    if '## 基本性能' not in content or '## 戦闘コマンド' not in content:
+    titles = {title for level, title in reader.headings(page_path) if level == 2}
+    reader.save()
+    if '基本性能' not in titles or '戦闘コマンド' not in titles:
         return None
 
-    # Extract the front matter
-    front_matter = ""
-    if content.startswith('---'):
-        parts = content.split('---', 2)
-        if len(parts) >= 3:
-            front_matter = f"---{parts[1]}---\n\n"
-            content = parts[2]
-
     # For now, just flag pages that need manual fixing
     # since the actual data extraction would require parsing the original HTML
     return None  # Return None to indicate we need to reprocess from HTML
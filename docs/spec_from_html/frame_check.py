@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Derived-column check for the page 57 frame tables
+Every row carries three sums of its base columns:
+    森+準備F        = 森 + 準備F
+    準備F+発動F     = 準備F + 発動F
+    森+準備F+発動F  = 森 + 準備F + 発動F
+All tables are stacked into one [rows, 9] matrix (NaN for blank cells,
+open-ended 発動F like 385~ counts as its number) and the identities are
+checked in one pass. Each violating row gets a diagnosis from the pattern
+of residuals: a single wrong cell (base or derived) shows up as a unique
+pattern and its corrected value follows from the sums. Rows that fit no
+single-cell pattern are ambiguous.
+
+Also reads the pipe tables hand-typed in the fix_page_57 scripts.
+character_compiler.py runs the check before emitting frames: diagnosed
+cells are replaced by their corrected value, ambiguous rows stop the build.
+
+    python frame_check.py
+    python frame_check.py fix_page_57.py fix_all_characters_page57.py
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from spec_tables import FRAME_COLUMNS, FRAME_PAGE, frame_tables, markdown_sections
+
+SCRIPT_DIR = Path(__file__).parent
+FRAME_PATH = SCRIPT_DIR / "yuyuz_md" / FRAME_PAGE
+
+FOREST, PREP, ACTIVATION, FOREST_PREP, PREP_ACTIVATION, TOTAL = (
+    FRAME_COLUMNS.index(c) for c in ("森", "準備F", "発動F", "森+準備F", "準備F+発動F", "森+準備F+発動F"))
+
+IDENTITIES = ["森+準備F", "準備F+発動F", "森+準備F+発動F"]
+
+# Residual pattern (which identities fail) -> the single cell that explains it
+# and the residual that corrects it: value - residual (derived) or + (base)
+DIAGNOSES = {
+    (True, False, False): ("森+準備F", FOREST_PREP, 0, -1),
+    (False, True, False): ("準備F+発動F", PREP_ACTIVATION, 1, -1),
+    (False, False, True): ("森+準備F+発動F", TOTAL, 2, -1),
+    (True, False, True): ("森", FOREST, 0, 1),
+    (False, True, True): ("発動F", ACTIVATION, 1, 1),
+    (True, True, True): ("準備F", PREP, 0, 1),
+}
+
+def cell_value(text):
+    """Frame count of a cell; NaN for blanks and '-'"""
+    text = text.strip().rstrip("~")
+    return float(text) if text.isdigit() else np.nan
+
+def pipe_frame_tables(text):
+    """{character: [frame row dicts]} from '## name' sections with Markdown pipe tables"""
+    result = {}
+    # Fix scripts open their sections inside string literals (return """## 桑原)
+    text = text.replace('"""', '"""\n')
+    for level, heading, content in markdown_sections(text):
+        if level != 2:
+            continue
+        rows = []
+        seen = {}
+        category = button = ""
+        for line in content.splitlines():
+            if not line.startswith("|"):
+                continue
+            cells = [c.strip().strip("*") for c in line.strip().strip("|").split("|")]
+            if len(cells) < 3 + len(FRAME_COLUMNS) or cells[0] == "分類" or cells[3].startswith(("-", "森")):
+                continue
+            category = cells[0] or category
+            button = cells[1] or button
+            state = cells[2] or "-"
+            key = f"{category}/{button}/{state}"
+            seen[key] = seen.get(key, 0) + 1
+            row = {
+                "key": key if seen[key] == 1 else f"{key}#{seen[key]}",
+                "category": category,
+                "button": button,
+                "state": state,
+            }
+            row.update(zip(FRAME_COLUMNS, cells[3:3 + len(FRAME_COLUMNS)]))
+            rows.append(row)
+        if rows:
+            result[heading] = rows
+    return result
+
+def frame_matrix(tables):
+    """([(character, row)], [rows, 9] float matrix) for every row of every table"""
+    labels = [(character, row) for character, rows in tables.items() for row in rows]
+    matrix = np.array([[cell_value(row[c]) for c in FRAME_COLUMNS] for _, row in labels],
+                      dtype=float).reshape(-1, len(FRAME_COLUMNS))
+    return labels, matrix
+
+def residuals(matrix):
+    """[rows, 3] derived minus recomputed for each identity (NaN when a cell is blank)"""
+    forest, prep, activation = matrix[:, FOREST], matrix[:, PREP], matrix[:, ACTIVATION]
+    return np.stack([
+        matrix[:, FOREST_PREP] - (forest + prep),
+        matrix[:, PREP_ACTIVATION] - (prep + activation),
+        matrix[:, TOTAL] - (forest + prep + activation),
+    ], axis=1)
+
+def check_tables(tables):
+    """
+    One dict per violating row: character, key, state, failed identities,
+    suspect column and its corrected value (None when ambiguous)
+    """
+    labels, matrix = frame_matrix(tables)
+    res = residuals(matrix)
+    failed = np.nan_to_num(res) != 0
+    problems = []
+    for i in np.flatnonzero(failed.any(axis=1)):
+        character, row = labels[i]
+        pattern = tuple(bool(f) for f in failed[i])
+        suspect, value = None, None
+        if pattern in DIAGNOSES:
+            column, index, identity, sign = DIAGNOSES[pattern]
+            # A single-cell error moves every affected residual by the same amount
+            if np.all(res[i][list(pattern)] == res[i][identity]):
+                suspect = column
+                value = int(matrix[i, index] + sign * res[i][identity])
+        problems.append({
+            "character": character,
+            "key": row["key"],
+            "state": row["state"],
+            "failed": [name for name, f in zip(IDENTITIES, pattern) if f],
+            "cells": {c: row[c] for c in FRAME_COLUMNS},
+            "suspect": suspect,
+            "value": value,
+        })
+    return problems
+
+def repairs(problems):
+    """{(character, key): {column: corrected text}} for the diagnosed problems"""
+    fixes = {}
+    for problem in problems:
+        if problem["suspect"]:
+            fixes.setdefault((problem["character"], problem["key"]), {})[problem["suspect"]] = str(problem["value"])
+    return fixes
+
+def load_tables(path):
+    """Frame tables from page 57 (HTML tables) or a fix script (pipe tables)"""
+    text = Path(path).read_text(encoding="utf-8")
+    return frame_tables(text) if "<table" in text else pipe_frame_tables(text)
+
+def format_problem(problem):
+    """One report line for a violation"""
+    failed = ", ".join(problem["failed"])
+    if problem["suspect"]:
+        cell = problem["cells"][problem["suspect"]]
+        hint = f"{problem['suspect']} {cell} -> {problem['value']}"
+    else:
+        hint = "ambiguous"
+    return f"{problem['character']} {problem['key']}: {failed} ({hint})"
+
+def main():
+    """Check page 57 (or the given files) and exit non-zero on ambiguous rows"""
+    parser = argparse.ArgumentParser(description="Page 57 derived-column check")
+    parser.add_argument("paths", nargs="*", default=[str(FRAME_PATH)],
+                        help="Page 57 Markdown or fix scripts with pipe tables")
+    parser.add_argument("--strict", action="store_true", help="Fail on diagnosed rows too")
+    args = parser.parse_args()
+
+    status = 0
+    for path in args.paths:
+        tables = load_tables(path)
+        problems = check_tables(tables)
+        rows = sum(len(rows) for rows in tables.values())
+        print(f"{Path(path).name}: {len(tables)} tables, {rows} rows, {len(problems)} violations")
+        for problem in problems:
+            print(f"  {format_problem(problem)}")
+        if any(p["suspect"] is None for p in problems) or (args.strict and problems):
+            status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
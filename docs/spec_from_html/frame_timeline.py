@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Frame timeline engine for page 57 (モーションフレーム)
+Builds NumPy arrays over character x move x ground/aerial x stage from the
+page 57 frame tables and answers timing questions for every pair at once:
+- frames until a move activates on each stage (準備移行F + 準備F)
+- whether touki reaches MAX before activation (normal / UP / DOWN)
+- reaction margins between any two moves on a stage
+
+The arrays are saved to an .npz index next to this script and rebuilt when
+page 57 changes, so lookups are plain array indexing.
+
+    python frame_timeline.py 幽助 霊撃/X --state 空
+    python frame_timeline.py 幽助 霊撃/A --vs 桑原 --stage 暗 --mode up
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from spec_tables import FRAME_PAGE, frame_tables
+
+SCRIPT_DIR = Path(__file__).parent
+FRAME_PATH = SCRIPT_DIR / "yuyuz_md" / FRAME_PAGE
+INDEX_PATH = SCRIPT_DIR / "frame_timeline.npz"
+
+STAGES = ["森", "暗", "断", "時"]
+STAGE_NAMES = {"森": "森", "暗": "暗黒ドーム", "断": "断首台の丘", "時": "時空の狭間"}
+STATES = ["地", "空"]
+
+# Frames to reach MAX touki (018-基本仕様 / 02_motion_frame.md)
+TOUKI_MODES = ["normal", "up", "down"]
+TOUKI_MAX_FRAMES = {
+    "パンチ": (61, 21, 90),
+    "防御": (73, 24, 107),
+    "技": (96, 32, 142),
+    "霊撃": (121, 41, 179),
+}
+CHARGE_CLASSES = list(TOUKI_MAX_FRAMES)
+
+# Page 57 row category -> touki charge class (None: no charge)
+CATEGORY_CHARGE = {
+    "パンチ": "パンチ",
+    "技": "技",
+    "霊撃": "霊撃",
+    "霊撃力UP": "霊撃",
+    "アイテム": None,
+    "封じ行動": None,
+}
+
+MISSING = -1
+
+def _frames(value):
+    """Parse a frame cell; returns (frames, open_ended) with MISSING for blanks"""
+    value = value.strip()
+    open_ended = value.endswith("~")
+    value = value.rstrip("~")
+    if not value.isdigit():
+        return MISSING, False
+    return int(value), open_ended
+
+def prep_frames(row):
+    """
+    準備F for a row, cross-checked against the summed columns
+    atwiki has typos in 準備F (仙水 霊撃/A reads 44100); when 森+準備F - 森 and
+    準備F+発動F - 発動F agree on a different value, the sums win.
+    """
+    prep = _frames(row["準備F"])[0]
+    forest = _frames(row["森"])[0]
+    activation = _frames(row["発動F"])[0]
+    with_forest = _frames(row["森+準備F"])[0]
+    with_activation = _frames(row["準備F+発動F"])[0]
+    if MISSING in (forest, activation, with_forest, with_activation):
+        return prep
+    derived = with_forest - forest
+    if derived == with_activation - activation and derived != prep:
+        return derived
+    return prep
+
+def move_id(row, seen):
+    """Move id 'category/button' for a frame row, disambiguating repeats"""
+    base = f"{row['category']}/{row['button']}"
+    key = (base, row["state"])
+    count = seen.get(key, 0) + 1
+    seen[key] = count
+    return base if count == 1 else f"{base}#{count}"
+
+def build_arrays(tables):
+    """
+    Dense timeline arrays from frame_tables() output
+    Rows with state '-' apply to both ground and aerial.
+    """
+    characters = list(tables)
+    moves = []
+    move_index = {}
+    entries = []
+    for c, character in enumerate(characters):
+        seen = {}
+        for row in tables[character]:
+            move = move_id(row, seen)
+            if move not in move_index:
+                move_index[move] = len(moves)
+                moves.append(move)
+            states = [0, 1] if row["state"] not in STATES else [STATES.index(row["state"])]
+            entries.append((c, move_index[move], states, row))
+
+    shape = (len(characters), len(moves), len(STATES))
+    transition = np.full(shape + (len(STAGES),), MISSING, dtype=np.int16)
+    prep = np.full(shape, MISSING, dtype=np.int16)
+    activation = np.full(shape, MISSING, dtype=np.int16)
+    open_ended = np.zeros(shape, dtype=bool)
+
+    for c, m, states, row in entries:
+        stage_frames = [_frames(row[stage])[0] for stage in STAGES]
+        prep_value = prep_frames(row)
+        act_frames, act_open = _frames(row["発動F"])
+        for t in states:
+            transition[c, m, t] = stage_frames
+            prep[c, m, t] = prep_value
+            activation[c, m, t] = act_frames
+            open_ended[c, m, t] = act_open
+
+    charge_class = np.array([
+        CHARGE_CLASSES.index(CATEGORY_CHARGE[m.split("/")[0]])
+        if CATEGORY_CHARGE.get(m.split("/")[0]) else MISSING
+        for m in moves
+    ], dtype=np.int8)
+
+    return {
+        "characters": np.array(characters),
+        "moves": np.array(moves),
+        "transition": transition,
+        "prep": prep,
+        "activation": activation,
+        "open_ended": open_ended,
+        "charge_class": charge_class,
+    }
+
+class FrameTimeline:
+    """Vectorized queries over the page 57 timeline arrays"""
+
+    def __init__(self, arrays):
+        self.characters = [str(c) for c in arrays["characters"]]
+        self.moves = [str(m) for m in arrays["moves"]]
+        self.transition = arrays["transition"]
+        self.prep = arrays["prep"]
+        self.activation = arrays["activation"]
+        self.open_ended = arrays["open_ended"]
+        self.charge_class = arrays["charge_class"]
+        self._character_index = {c: i for i, c in enumerate(self.characters)}
+        self._move_index = {m: i for i, m in enumerate(self.moves)}
+
+        # [C, M, T, S]: frames touki can be charged before the move activates
+        valid = (self.transition >= 0) & (self.prep[..., None] >= 0)
+        self.valid = valid
+        self.ready = np.where(valid, self.transition + self.prep[..., None], MISSING).astype(np.int16)
+        has_act = valid & (self.activation[..., None] >= 0)
+        self.total = np.where(has_act, self.ready + self.activation[..., None], MISSING).astype(np.int16)
+
+        # [M, mode]: MAX frames per move (MISSING for moves without charge)
+        table = np.array([TOUKI_MAX_FRAMES[c] for c in CHARGE_CLASSES], dtype=np.int16)
+        self.max_frames = np.where(
+            (self.charge_class >= 0)[:, None], table[self.charge_class.clip(0)], MISSING,
+        ).astype(np.int16)
+
+    def index(self, character, move, state="地", stage="森"):
+        """Array indices (c, m, t, s) for names"""
+        try:
+            return (
+                self._character_index[character],
+                self._move_index[move],
+                STATES.index(state),
+                STAGES.index(stage),
+            )
+        except (KeyError, ValueError) as e:
+            raise KeyError(f"Unknown character/move/state/stage: {e}") from None
+
+    def charge_feasible(self, mode="normal"):
+        """[C, M, T, S] True where touki reaches MAX before activation"""
+        need = self.max_frames[:, TOUKI_MODES.index(mode)]
+        return self.valid & (need >= 0)[None, :, None, None] & \
+            (self.ready >= need[None, :, None, None])
+
+    def charge_slack(self, mode="normal"):
+        """[C, M, T, S] ready frames minus MAX frames (negative: short of MAX)"""
+        need = self.max_frames[:, TOUKI_MODES.index(mode)]
+        slack = self.ready - need[None, :, None, None]
+        return np.where(self.valid & (need >= 0)[None, :, None, None], slack, np.iinfo(np.int16).min)
+
+    def touki_at_activation(self, mode="normal"):
+        """[C, M, T, S] touki (0-96) charged by activation at a linear rate"""
+        need = self.max_frames[:, TOUKI_MODES.index(mode)].astype(np.int32)
+        need = np.where(need > 0, need, 1)[None, :, None, None]
+        touki = np.minimum(96, (self.ready.astype(np.int32) * 96) // need)
+        ok = self.valid & (self.max_frames[:, TOUKI_MODES.index(mode)] >= 0)[None, :, None, None]
+        return np.where(ok, touki, MISSING).astype(np.int16)
+
+    def reaction_margins(self, stage="森", state="地"):
+        """
+        [C, M, C, M] frames by which move (c1, m1) activates after (c2, m2)
+        Positive: the second move lands first, so it is inside the first move's
+        reaction window. Pairs with missing frame data are MISSING-masked.
+        """
+        s = STAGES.index(stage)
+        t = STATES.index(state)
+        ready = self.ready[:, :, t, s].astype(np.int32)
+        margins = ready[:, :, None, None] - ready[None, None, :, :]
+        mask = (ready >= 0)[:, :, None, None] & (ready >= 0)[None, None, :, :]
+        return np.ma.masked_array(margins, mask=~mask)
+
+    def responses(self, character, move, opponent, stage="森", state="地"):
+        """[(move, margin)] of the opponent's moves that activate first"""
+        c, m, t, s = self.index(character, move, state, stage)
+        o = self._character_index[opponent]
+        window = self.ready[c, m, t, s]
+        if window < 0:
+            return []
+        theirs = self.ready[o, :, t, s]
+        order = np.argsort(theirs)
+        return [(self.moves[i], int(window - theirs[i]))
+                for i in order if 0 <= theirs[i] < window]
+
+def build_index(frame_path=FRAME_PATH, index_path=INDEX_PATH):
+    """Parse page 57 and save the timeline arrays"""
+    text = Path(frame_path).read_text(encoding="utf-8")
+    arrays = build_arrays(frame_tables(text))
+    np.savez(index_path, **arrays)
+    return arrays
+
+def load_timeline(frame_path=FRAME_PATH, index_path=INDEX_PATH, rebuild=False):
+    """FrameTimeline from the saved index, rebuilding it if page 57 is newer"""
+    index_path = Path(index_path)
+    stale = (
+        rebuild
+        or not index_path.exists()
+        or Path(frame_path).stat().st_mtime > index_path.stat().st_mtime
+    )
+    if stale:
+        return FrameTimeline(build_index(frame_path, index_path))
+    with np.load(index_path) as data:
+        return FrameTimeline({name: data[name] for name in data.files})
+
+def main():
+    """Print timing for one move, or the opponent moves that beat it"""
+    parser = argparse.ArgumentParser(description="Page 57 frame timeline queries")
+    parser.add_argument("character", nargs="?", help="character name (page 57 heading)")
+    parser.add_argument("move", nargs="?", help="move id, e.g. パンチ/AX or 霊撃/X")
+    parser.add_argument("--state", default="地", choices=STATES)
+    parser.add_argument("--stage", default="森", choices=STAGES)
+    parser.add_argument("--mode", default="normal", choices=TOUKI_MODES)
+    parser.add_argument("--vs", help="list this opponent's moves that activate first")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index")
+    args = parser.parse_args()
+
+    timeline = load_timeline(rebuild=args.rebuild)
+    if not args.character:
+        print(f"{len(timeline.characters)} characters, {len(timeline.moves)} moves")
+        print(f"Index: {INDEX_PATH}")
+        return 0
+
+    if not args.move:
+        c = timeline.characters.index(args.character)
+        for m, move in enumerate(timeline.moves):
+            if timeline.valid[c, m].any():
+                print(f"  {move}")
+        return 0
+
+    c, m, t, _ = timeline.index(args.character, args.move, args.state, args.stage)
+    feasible = timeline.charge_feasible(args.mode)
+    touki = timeline.touki_at_activation(args.mode)
+    print(f"{args.character} {args.move} ({args.state}) touki {args.mode}")
+    for s, stage in enumerate(STAGES):
+        ready = timeline.ready[c, m, t, s]
+        if ready < 0:
+            print(f"  {STAGE_NAMES[stage]}: no frame data")
+            continue
+        total = timeline.total[c, m, t, s]
+        suffix = "~" if timeline.open_ended[c, m, t] else ""
+        print(f"  {STAGE_NAMES[stage]}: activates at {ready}F, ends {total}F{suffix}, "
+              f"touki {touki[c, m, t, s]}/96{' (MAX)' if feasible[c, m, t, s] else ''}")
+
+    if args.vs:
+        print(f"\n{args.vs} moves activating before it on {STAGE_NAMES[args.stage]}:")
+        for move, margin in timeline.responses(args.character, args.move, args.vs, args.stage, args.state):
+            print(f"  {move:<20} {margin:>4}F earlier")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Port of the 防御判定シミュレーター pages
+(simulators/防御判定シミュレーター攻撃側先手_simulator_guard.htm and
+防御判定シミュレーター防御側先手_simulator_guard2.htm): one side attacks,
+the other takes a non-attack (defensive) action, and the result is what the
+defender receives.
+
+Each page iteration draws two RNG bytes: 128-255 for the 後手 (the
+non-attack scenario of 09_rng_system.md) and 192-255 for the 先手. The
+outcome only depends on that pair, so both modes evaluate every pair once
+over a [128, 64] grid and weight it:
+- "simulator": by how often the page's 65535 iterations (first press,
+  LCG from z = 0) draw each pair, which matches the web tool to the digit
+- "uniform": every pair equally likely (independent uniform RNG)
+Rates may be arrays; the grid is evaluated for all of them at once.
+Balance correction (not on the pages, which assume balance 0) can be given
+per side; it applies after the RNG correction like in judgment_sim.
+
+Page arithmetic kept as is: with the attacker first, the defender's evasion
+is scaled by 255/256 and loses its low byte before the RNG correction, and
+neither page rounds the divisor (unlike the attack page).
+
+    python guard_sim.py 56 54
+    python guard_sim.py 56 54 --defender-first --mode uniform
+"""
+
+import argparse
+import functools
+import sys
+
+import numpy as np
+
+from damage_table import RNG_NORMAL, RNG_SPECIAL, TOUKI_MAX, balance_correct, mul16x8, touki_correct
+from judgment_sim import RESULT_LABELS, RESULTS, lcg_cycle, rng_byte, rng_byte_wide
+
+ORDERS = ["attacker_first", "defender_first"]
+
+# Page buckets x = 1..5: [(share, defender receives)]
+GUARD_BUCKETS = {
+    "attacker_first": [
+        [(1.0, "direct")],
+        [(0.6, "graze"), (0.4, "direct")],
+        [(0.125, "direct"), (0.75, "graze"), (0.125, "evade")],
+        [(0.6, "evade"), (0.4, "graze")],
+        [(1.0, "evade")],
+    ],
+    "defender_first": [
+        [(1.0, "evade")],
+        [(0.6, "evade"), (0.4, "graze")],
+        [(0.125, "direct"), (0.75, "graze"), (0.125, "evade")],
+        [(0.6, "graze"), (0.4, "direct")],
+        [(1.0, "direct")],
+    ],
+}
+
+ITERATIONS = 65535
+# Rates evaluated per grid pass (bounds the [batch, 128, 64] temporaries)
+BATCH_ROWS = 256
+
+def _receive_matrix(order):
+    """[5, 3] share of each defender result per bucket"""
+    matrix = np.zeros((len(GUARD_BUCKETS[order]), len(RESULTS)))
+    for b, outcomes in enumerate(GUARD_BUCKETS[order]):
+        for share, result in outcomes:
+            matrix[b, RESULTS.index(result)] += share
+    return matrix
+
+RECEIVES = {order: _receive_matrix(order) for order in ORDERS}
+
+def guard_ratio(numerator, denominator):
+    """
+    (numerator >> 2) / (denominator / 256), rounded half up (JS toFixed(0))
+    The divisor is not rounded; a zero divisor gives inf or NaN like the page.
+    """
+    numerator = np.asarray(numerator, dtype=np.int64) >> 2
+    denominator = np.asarray(denominator, dtype=np.int64)
+    safe = np.where(denominator == 0, 1, denominator)
+    value = ((512 * numerator + safe) // (2 * safe)).astype(float)
+    return np.where(denominator == 0, np.where(numerator > 0, np.inf, np.nan), value)
+
+def guard_part(value):
+    """Bucket index 0-4 (page x - 1); -1 for NaN, which the page never counts"""
+    value = np.asarray(value, dtype=float)
+    part = np.full(value.shape, -1, dtype=np.int64)
+    part = np.where(value <= 27, 4, part)
+    part = np.where(value >= 28, 3, part)
+    part = np.where(value >= 54, 2, part)
+    part = np.where(value >= 72, 1, part)
+    part = np.where(value >= 104, 0, part)
+    return part
+
+def guard_grid(success, evasion, order="attacker_first", success_touki=TOUKI_MAX,
+               evasion_touki=TOUKI_MAX, success_balance=0, evasion_balance=0):
+    """
+    [..., 128, 64] bucket index for every (後手 RNG 128-255, 先手 RNG 192-255)
+    success is the attacker's 成功率, evasion the defender's 回避率; each is
+    lowered by its own side's balance (the attacker faces a non-attack, the
+    defender an attack).
+    """
+    success = touki_correct(np.asarray(success)[..., None, None], success_touki)
+    evasion = touki_correct(np.asarray(evasion)[..., None, None], evasion_touki)
+    wide = RNG_SPECIAL[:, None]
+    normal = RNG_NORMAL[None, :]
+    if order == "attacker_first":
+        attack = balance_correct(mul16x8(success, normal), success_balance)
+        defense = balance_correct(mul16x8(mul16x8(evasion, 0xFF) & 0xFF00, wide), evasion_balance)
+        return guard_part(guard_ratio(attack, defense))
+    if order == "defender_first":
+        attack = balance_correct(mul16x8(success, wide), success_balance)
+        defense = balance_correct(mul16x8(evasion, normal), evasion_balance)
+        return guard_part(guard_ratio(defense, attack))
+    raise ValueError(f"Unknown order: {order}")
+
+@functools.lru_cache(maxsize=None)
+def simulator_weights():
+    """[128, 64] share of the page's iterations drawing each RNG pair"""
+    states = lcg_cycle()
+    draws = np.arange(ITERATIONS * 2, dtype=np.int64).reshape(ITERATIONS, 2) % 65536
+    wide = rng_byte_wide(states[draws[:, 0]]) - 128
+    normal = rng_byte(states[draws[:, 1]]) - 192
+    weights = np.zeros((128, 64))
+    np.add.at(weights, (wide, normal), 1)
+    weights /= ITERATIONS
+    weights.setflags(write=False)
+    return weights
+
+def uniform_weights():
+    """[128, 64] independent uniform RNG"""
+    return np.full((128, 64), 1 / (128 * 64))
+
+def guard_buckets(success, evasion, order="attacker_first", mode="simulator",
+                  success_touki=TOUKI_MAX, evasion_touki=TOUKI_MAX,
+                  success_balance=0, evasion_balance=0):
+    """[..., 5] bucket probabilities; rates, touki and balances broadcast together"""
+    weights = simulator_weights() if mode == "simulator" else uniform_weights()
+    values = (success, evasion, success_touki, evasion_touki, success_balance, evasion_balance)
+    shape = np.broadcast_shapes(*(np.shape(a) for a in values))
+    args = [np.broadcast_to(a, shape).reshape(-1) for a in values]
+    flat = np.zeros((len(args[0]), len(GUARD_BUCKETS[order])))
+    for start in range(0, len(flat), BATCH_ROWS):
+        rows = slice(start, start + BATCH_ROWS)
+        grid = guard_grid(args[0][rows], args[1][rows], order,
+                          *(a[rows][:, None, None] for a in args[2:]))
+        for b in range(flat.shape[1]):
+            flat[rows, b] = ((grid == b) * weights).sum(axis=(-2, -1))
+    return flat.reshape(shape + (flat.shape[1],))
+
+def guard_receives(buckets, order="attacker_first"):
+    """[..., direct/graze/evade] the defender receives, from buckets"""
+    return np.asarray(buckets) @ RECEIVES[order]
+
+def main():
+    """Print the outcome table like the web simulator"""
+    parser = argparse.ArgumentParser(description="Guard judgment simulator")
+    parser.add_argument("success", type=int, help="攻撃成功率")
+    parser.add_argument("evasion", type=int, help="防御回避率")
+    parser.add_argument("--defender-first", action="store_true", help="防御側先手 (simulator_guard2)")
+    parser.add_argument("--mode", default="simulator", choices=["simulator", "uniform"])
+    args = parser.parse_args()
+
+    order = "defender_first" if args.defender_first else "attacker_first"
+    buckets = guard_buckets(args.success, args.evasion, order, args.mode)
+    for outcomes, p in zip(GUARD_BUCKETS[order], buckets):
+        label = "　".join(
+            f"防御{RESULT_LABELS[result]}" + (f"({share * 100:g}%)" if share < 1 else "")
+            for share, result in outcomes
+        )
+        print(f"  {label:<40} {p * 100:6.2f}%")
+
+    print()
+    for result, p in zip(RESULTS, guard_receives(buckets, order)):
+        print(f"  防御{RESULT_LABELS[result]:<4} {p * 100:6.2f}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
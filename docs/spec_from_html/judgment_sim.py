@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Port of the 攻撃判定シミュレーター (simulators/攻撃判定シミュレーター_simulator.htm)
+Two ways to get the outcome distribution of an attack-vs-attack exchange:
+- "simulator": replays the page's 65535 iterations of its 16-bit LCG, so the
+  percentages match the web tool to the digit
+- "uniform": every RNG byte independent and uniform, which makes the two
+  half-judgments independent and the distribution exact
+
+Stats are 10進数 rates as on the wiki (touki and balance at MAX unless given).
+
+    python judgment_sim.py 56 54 50 48
+    python judgment_sim.py 122 102 128 84 --mode uniform
+"""
+
+import argparse
+import functools
+import sys
+
+import numpy as np
+
+from damage_table import BALANCE_TABLE, TOUKI_MAX, balance_correct, mul16x8, touki_correct
+
+RNG_NORMAL = np.arange(192, 256, dtype=np.uint32)
+
+# What each player receives
+RESULTS = ["direct", "graze", "evade"]
+RESULT_LABELS = {"direct": "直撃", "graze": "かすり", "evade": "回避"}
+
+# Outcome buckets (x / 2 in the page script): [(share, first receives, second receives)]
+ATTACK_BUCKETS = [
+    [(1.0, "direct", "direct")],
+    [(0.6, "graze", "evade"), (0.4, "direct", "graze")],
+    [(1.0, "direct", "evade")],
+    [(0.6, "evade", "graze"), (0.4, "graze", "direct")],
+    [(0.125, "direct", "direct"), (0.75, "graze", "graze"), (0.125, "evade", "evade")],
+    [(0.6, "graze", "evade"), (0.4, "direct", "graze")],
+    [(1.0, "evade", "direct")],
+    [(0.6, "evade", "graze"), (0.4, "graze", "direct")],
+    [(1.0, "evade", "evade")],
+]
+
+def _bucket_matrix(side):
+    """[9, 3] share of each result per bucket for one side (0 first, 1 second)"""
+    matrix = np.zeros((len(ATTACK_BUCKETS), len(RESULTS)))
+    for b, outcomes in enumerate(ATTACK_BUCKETS):
+        for share, first, second in outcomes:
+            matrix[b, RESULTS.index((first, second)[side])] += share
+    return matrix
+
+FIRST_RECEIVES = _bucket_matrix(0)
+SECOND_RECEIVES = _bucket_matrix(1)
+
+_lcg_cycle = None
+
+def lcg_cycle():
+    """
+    States z1..z65536 of the page's LCG starting from z = 0
+    The shift/add code reduces to z = (z * 5 + 1) mod 65536 (full period).
+    """
+    global _lcg_cycle
+    if _lcg_cycle is None:
+        states = np.empty(65536, dtype=np.uint32)
+        z = 0
+        for i in range(65536):
+            z = (z * 5 + 1) & 0xFFFF
+            states[i] = z
+        _lcg_cycle = states
+    return _lcg_cycle
+
+def rng_byte(states):
+    """乱数補正値 192-255 drawn from LCG states"""
+    return 192 | ((np.asarray(states, dtype=np.uint32) >> 2) & 63)
+
+def rng_byte_wide(states):
+    """乱数補正値 128-255 (non-attack 後手, collision) drawn from LCG states"""
+    return 128 | ((np.asarray(states, dtype=np.uint32) >> 2) & 127)
+
+def ratio(success, evasion):
+    """
+    (success >> 2) / round(evasion / 256), rounded half up (JS toFixed(0))
+    Inputs are RNG-corrected 16-bit values; a zero divisor gives inf or NaN
+    like the page, and NaN fails every threshold comparison.
+    """
+    success = np.asarray(success, dtype=np.int64)
+    divisor = (np.asarray(evasion, dtype=np.int64) + 128) >> 8
+    numerator = success >> 2
+    safe = np.where(divisor == 0, 1, divisor)
+    value = ((2 * numerator + safe) // (2 * safe)).astype(float)
+    return np.where(divisor == 0, np.where(numerator > 0, np.inf, np.nan), value)
+
+def first_part(ag):
+    """Bucket offset from the second player's attack on the first (ag)"""
+    ag = np.asarray(ag, dtype=float)
+    part = np.zeros(ag.shape, dtype=np.int64)
+    part = np.where(ag <= 59, 6, part)
+    part = np.where(ag >= 60, 3, part)
+    part = np.where(ag >= 89, 0, part)
+    return part
+
+def second_part(ad):
+    """Bucket offset from the first player's attack on the second (ad)"""
+    ad = np.asarray(ad, dtype=float)
+    part = np.zeros(ad.shape, dtype=np.int64)
+    part = np.where(ad <= 50, 2, part)
+    part = np.where((ad >= 51) & (ad < 80), 1, part)
+    return part
+
+def buckets_simulator(first_success, first_evasion, second_success, second_evasion):
+    """Bucket probabilities exactly as the page computes them (65535 iterations)"""
+    iterations = 65535
+    states = lcg_cycle()
+    draws = np.arange(iterations * 4, dtype=np.int64) % 65536
+    rng = rng_byte(states[draws]).reshape(iterations, 4)
+
+    # Draw order on the page: 後手回避, 先手成功, 先手回避, 後手成功
+    # (stat * 256) x rng keeping the middle 16 bits is stat x rng, wrapped to 16 bits
+    def correct(stat, r):
+        return int(stat) * r.astype(np.int64) & 0xFFFF
+
+    ad = ratio(correct(first_success, rng[:, 1]), correct(second_evasion, rng[:, 0]))
+    ag = ratio(correct(second_success, rng[:, 3]), correct(first_evasion, rng[:, 2]))
+    bucket = first_part(ag) + second_part(ad)
+    return np.bincount(bucket, minlength=len(ATTACK_BUCKETS)) / iterations
+
+@functools.lru_cache(maxsize=None)
+def part_table(success, evasion, success_touki=TOUKI_MAX, evasion_touki=TOUKI_MAX,
+               part=second_part):
+    """
+    [256, 3] distribution of one half-judgment for every balance of the
+    evading side, under independent uniform RNG (memoized)
+    Balance correction applies to the evading side since the opponent is
+    attacking. Columns follow the part's bucket offsets in ascending order.
+    """
+    # Balances sharing a 補正値 give the same result; evaluate each value once
+    factors, first_balance, inverse = np.unique(BALANCE_TABLE, return_index=True, return_inverse=True)
+
+    s = mul16x8(touki_correct(success, success_touki), RNG_NORMAL)           # [Rs]
+    e = mul16x8(touki_correct(evasion, evasion_touki), RNG_NORMAL)           # [Re]
+    e = balance_correct(e[None, :], first_balance[:, None])                  # [F, Re]
+
+    # The ratio only sees round(evasion / 256); evaluate each divisor once
+    divisors, div_index = np.unique((e + 128) >> 8, return_inverse=True)
+    offsets = part(ratio(s[None, :], divisors[:, None] << 8))                # [D, Rs]
+    values = part_offsets(part)
+    per_divisor = np.stack([(offsets == v).mean(axis=1) for v in values], axis=-1)
+    probs = per_divisor[div_index.reshape(e.shape)].mean(axis=1)             # [F, 3]
+    table = probs[inverse.reshape(-1)]
+    table.setflags(write=False)
+    return table
+
+def part_offsets(part):
+    """Bucket offsets a part function can return, ascending"""
+    return np.unique(part(np.array([0.0, 55.0, 70.0, 100.0, np.nan])))
+
+def part_probabilities(success, evasion, success_touki=TOUKI_MAX, evasion_touki=TOUKI_MAX,
+                       evasion_balance=0, part=second_part):
+    """(offsets, [..., 3] probabilities) for the evading side's balance(s)"""
+    table = part_table(int(success), int(evasion), int(success_touki), int(evasion_touki), part)
+    return part_offsets(part), table[np.clip(np.asarray(evasion_balance), 0, 255)]
+
+def buckets_uniform(first_success, first_evasion, second_success, second_evasion,
+                    first_touki=TOUKI_MAX, second_touki=TOUKI_MAX,
+                    first_balance=0, second_balance=0):
+    """
+    Exact bucket probabilities with independent uniform RNG
+    second_balance may be an array of balances (leading axis of the result).
+    """
+    g_values, g_probs = part_probabilities(
+        second_success, first_evasion, second_touki, first_touki, first_balance, first_part)
+    d_values, d_probs = part_probabilities(
+        first_success, second_evasion, first_touki, second_touki, second_balance, second_part)
+
+    shape = np.broadcast_shapes(np.shape(first_balance), np.shape(second_balance))
+    buckets = np.zeros(shape + (len(ATTACK_BUCKETS),))
+    for gi, g in enumerate(g_values):
+        for di, d in enumerate(d_values):
+            buckets[..., int(g + d)] += g_probs[..., gi] * d_probs[..., di]
+    return buckets
+
+def receives(buckets):
+    """(first, second) [..., direct/graze/evade] probabilities from buckets"""
+    buckets = np.asarray(buckets)
+    return buckets @ FIRST_RECEIVES, buckets @ SECOND_RECEIVES
+
+def main():
+    """Print the outcome table like the web simulator"""
+    parser = argparse.ArgumentParser(description="Attack judgment simulator")
+    parser.add_argument("first_success", type=int, help="先手成功率")
+    parser.add_argument("first_evasion", type=int, help="先手回避率")
+    parser.add_argument("second_success", type=int, help="後手成功率")
+    parser.add_argument("second_evasion", type=int, help="後手回避率")
+    parser.add_argument("--mode", default="simulator", choices=["simulator", "uniform"])
+    args = parser.parse_args()
+
+    stats = (args.first_success, args.first_evasion, args.second_success, args.second_evasion)
+    if args.mode == "simulator":
+        buckets = buckets_simulator(*stats)
+    else:
+        buckets = buckets_uniform(*stats)
+
+    for outcomes, p in zip(ATTACK_BUCKETS, buckets):
+        label = "　".join(
+            f"先手{RESULT_LABELS[a]}：後手{RESULT_LABELS[b]}"
+            + (f"({share * 100:g}%)" if share < 1 else "")
+            for share, a, b in outcomes
+        )
+        print(f"  {label:<60} {p * 100:6.2f}%")
+
+    first, second = receives(buckets)
+    print()
+    for side, probs in (("先手", first), ("後手", second)):
+        for result, p in zip(RESULTS, probs):
+            print(f"  {side}{RESULT_LABELS[result]:<4} {p * 100:6.2f}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Exact turns-to-knockdown calculator
+Dynamic programming over the defender's balance (0-255, knockdown at 256).
+Each turn the attacker (先手) picks a move from a policy, the defender answers
+with its own attack policy, the attack judgment decides direct/graze/evade
+for the defender (balance lowers the defender's evasion), and the balance
+damage for that hit type is added. Judgment and damage distributions are the
+exact ones from judgment_sim and damage_table; transition matrices are
+memoized per (attacker move, defender).
+
+Only attack-vs-attack exchanges are modelled (both sides pick attacks), as
+in the attack judgment simulator. Reiki costs are ignored.
+
+    python knockdown.py 幽助 飛影
+    python knockdown.py 幽助 飛影 --policy 霊撃/↓X/霊丸
+    python knockdown.py --table
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from damage_table import TOUKI_MAX, apply_defense, balance_hit, load_grid
+from judgment_sim import RESULTS, buckets_uniform, receives
+from roster import is_attack, load_roster
+
+KNOCKDOWN = 256
+MAX_TURNS = 300
+
+def attack_moves(fighter, include_buffed=False):
+    """Attack moves with balance damage (霊撃力UP rows only when asked)"""
+    return [m for m in fighter["moves"]
+            if is_attack(m) and (include_buffed or m["category"] != "霊撃力UP")]
+
+def uniform_policy(moves):
+    """{move key: probability} spreading evenly over moves"""
+    return {m["key"]: 1 / len(moves) for m in moves} if moves else {}
+
+class KnockdownModel:
+    """Memoized judgment, damage and transition tables for one roster"""
+
+    def __init__(self, roster, touki=TOUKI_MAX):
+        self.roster = roster
+        self.touki = touki
+        self._received = {}
+        self._shifts = {}
+        self._matrices = {}
+
+    def move(self, fighter, key):
+        """Move record by key"""
+        for move in self.roster[fighter]["moves"]:
+            if move["key"] == key:
+                return move
+        raise KeyError(f"{fighter} has no move {key}")
+
+    def received(self, attack, answer):
+        """[256, 3] direct/graze/evade the defender receives, by defender balance"""
+        key = (attack["success"], attack["evasion"], answer["success"], answer["evasion"])
+        if key not in self._received:
+            buckets = buckets_uniform(
+                attack["success"], attack["evasion"], answer["success"], answer["evasion"],
+                first_touki=self.touki, second_touki=self.touki,
+                second_balance=np.arange(KNOCKDOWN),
+            )
+            self._received[key] = receives(buckets)[1]
+        return self._received[key]
+
+    def shifts(self, drain, balance_defense):
+        """
+        [3, 256, 257] balance transition for each hit type
+        Column 256 collects every outcome at or past knockdown.
+        """
+        key = (drain, balance_defense, self.touki)
+        if key in self._shifts:
+            return self._shifts[key]
+
+        corrected = load_grid(drain)[self.touki, 0]
+        base = apply_defense(corrected, balance_defense)
+        offsets = np.arange(KNOCKDOWN + 1)[None, :] - np.arange(KNOCKDOWN)[:, None]
+        result = np.zeros((len(RESULTS), KNOCKDOWN, KNOCKDOWN + 1))
+        for h, hit in enumerate(RESULTS):
+            if hit == "evade":
+                damage = np.zeros(1, dtype=np.int64)
+            else:
+                damage = (balance_hit(base, hit) >> 8).astype(np.int64)
+            pmf = np.bincount(damage, minlength=KNOCKDOWN + 1) / len(damage)
+            # Probability of landing on each balance, lumping >= 256 into the last column
+            tail = np.concatenate([np.cumsum(pmf[::-1])[::-1], [0.0]])
+            inside = np.where((offsets >= 0) & (offsets < len(pmf)),
+                              pmf[np.clip(offsets, 0, len(pmf) - 1)], 0.0)
+            inside[:, KNOCKDOWN] = tail[np.clip(KNOCKDOWN - np.arange(KNOCKDOWN), 0, len(tail) - 1)]
+            result[h] = inside
+        self._shifts[key] = result
+        return result
+
+    def move_matrix(self, attacker, key, defender, defender_policy=None):
+        """[256, 257] one-turn transition for an attacker move vs a defender policy"""
+        policy = defender_policy or uniform_policy(attack_moves(self.roster[defender]))
+        cache_key = (attacker, key, defender, tuple(sorted(policy.items())))
+        if cache_key in self._matrices:
+            return self._matrices[cache_key]
+
+        attack = self.move(attacker, key)
+        received = np.zeros((KNOCKDOWN, len(RESULTS)))
+        for answer_key, p in policy.items():
+            received += p * self.received(attack, self.move(defender, answer_key))
+
+        shifts = self.shifts(attack["drain"], self.roster[defender]["balance_defense"])
+        matrix = np.einsum("bh,hbj->bj", received, shifts)
+        self._matrices[cache_key] = matrix
+        return matrix
+
+    def policy_matrix(self, attacker, policy, defender, defender_policy=None):
+        """Transition for a mixed attacker policy {key: probability}"""
+        matrix = np.zeros((KNOCKDOWN, KNOCKDOWN + 1))
+        for key, p in policy.items():
+            matrix += p * self.move_matrix(attacker, key, defender, defender_policy)
+        return matrix
+
+    def turns_distribution(self, attacker, policy, defender, defender_policy=None,
+                           start=0, max_turns=MAX_TURNS):
+        """
+        Exact P(knockdown on turn t) for t = 1..max_turns
+        policy is {key: probability} (mixed) or a list of keys played in order
+        and repeated. Returns (pmf, tail) where pmf[t - 1] is turn t and tail is
+        the probability of no knockdown within max_turns.
+        """
+        if isinstance(policy, dict):
+            matrices = [self.policy_matrix(attacker, policy, defender, defender_policy)]
+        else:
+            matrices = [self.move_matrix(attacker, key, defender, defender_policy) for key in policy]
+
+        state = np.zeros(KNOCKDOWN)
+        state[start] = 1.0
+        pmf = np.zeros(max_turns)
+        for turn in range(max_turns):
+            step = state @ matrices[turn % len(matrices)]
+            pmf[turn] = step[KNOCKDOWN]
+            state = step[:KNOCKDOWN]
+            if state.sum() < 1e-12:
+                break
+        return pmf, max(0.0, 1.0 - pmf.sum())
+
+    def expected_turns(self, attacker, policy, defender, defender_policy=None, start=0):
+        """Exact expected turns to knockdown for a mixed policy (inf if unreachable)"""
+        matrix = self.policy_matrix(attacker, policy, defender, defender_policy)
+        # Balance never decreases, so solve the triangular system from the top down
+        expected = np.zeros(KNOCKDOWN + 1)
+        for b in range(KNOCKDOWN - 1, start - 1, -1):
+            stay = matrix[b, b]
+            if stay >= 1.0 - 1e-12:
+                expected[b] = np.inf
+                continue
+            onward = matrix[b, b + 1:KNOCKDOWN] @ expected[b + 1:KNOCKDOWN] \
+                if b + 1 < KNOCKDOWN else 0.0
+            expected[b] = (1.0 + onward) / (1.0 - stay)
+        return expected[start]
+
+def roster_table(model, best=False):
+    """
+    {(attacker, defender): (expected turns, policy label)} for the whole roster
+    best=True picks the single move with the fewest expected turns, otherwise
+    the attacker mixes uniformly over its attack moves.
+    """
+    table = {}
+    for attacker, fighter in model.roster.items():
+        moves = attack_moves(fighter)
+        for defender in model.roster:
+            if not moves or not attack_moves(model.roster[defender]):
+                table[(attacker, defender)] = (np.inf, "-")
+                continue
+            if best:
+                results = [(model.expected_turns(attacker, {m["key"]: 1.0}, defender), m["key"])
+                           for m in moves]
+                table[(attacker, defender)] = min(results)
+            else:
+                turns = model.expected_turns(attacker, uniform_policy(moves), defender)
+                table[(attacker, defender)] = (turns, "uniform")
+    return table
+
+def main():
+    """Print a turn distribution, or the roster table"""
+    parser = argparse.ArgumentParser(description="Turns-to-knockdown calculator")
+    parser.add_argument("attacker", nargs="?")
+    parser.add_argument("defender", nargs="?")
+    parser.add_argument("--policy", help="comma-separated move keys played in order")
+    parser.add_argument("--touki", type=int, default=TOUKI_MAX)
+    parser.add_argument("--table", action="store_true", help="roster x roster expected turns")
+    parser.add_argument("--best", action="store_true", help="table: best single move instead of uniform")
+    args = parser.parse_args()
+
+    roster = load_roster()
+    model = KnockdownModel(roster, args.touki)
+
+    if args.table or not args.attacker:
+        start = time.time()
+        table = roster_table(model, args.best)
+        names = list(roster)
+        print("attacker \\ defender: " + " ".join(f"{n[:4]:>5}" for n in names))
+        for attacker in names:
+            cells = " ".join(f"{table[(attacker, d)][0]:5.1f}" for d in names)
+            print(f"{attacker[:8]:<10} {cells}")
+        print(f"\n{len(table)} pairs in {time.time() - start:.1f}s")
+        return 0
+
+    defender = args.defender or args.attacker
+    if args.policy:
+        policy = [key.strip() for key in args.policy.split(",")]
+    else:
+        policy = uniform_policy(attack_moves(roster[args.attacker]))
+
+    pmf, tail = model.turns_distribution(args.attacker, policy, defender)
+    expected = (model.expected_turns(args.attacker, policy, defender)
+                if isinstance(policy, dict) else (np.arange(1, len(pmf) + 1) * pmf).sum())
+    print(f"{args.attacker} -> {defender}: expected {expected:.2f} turns to knockdown")
+    cumulative = 0.0
+    for turn, p in enumerate(pmf, start=1):
+        cumulative += p
+        if p < 1e-4:
+            continue
+        print(f"  turn {turn:>3}: {p * 100:6.2f}%  (cumulative {cumulative * 100:6.2f}%)")
+    if tail > 1e-9:
+        print(f"  no knockdown within {len(pmf)} turns: {tail * 100:.4f}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Link-graph crawler for the two atwiki sites
+/list misses pages (yuyuz has no 003-012, 017, 049, 058-059), so pages only
+reachable through links are never exported. This crawls breadth-first over
+in-wiki links (/yuyuz/pages/{id}.html and /sfcyuhakutokubetsu/pages/{id}.html,
+relative or absolute) starting from both /list pages:
+- the frontier is deduplicated: a page is queued once, across both wikis
+- pages already exported to yuyuz_md / sfc_yuhaku_md are expanded from
+  their Markdown links instead of being fetched again
+- each level is fetched by a thread pool behind a shared rate limit
+  (one request start per --delay seconds over all threads, retries with
+  backoff, --max-pages cap)
+- the visited set (with each page's out-links) is saved to crawl_state.json
+  after every level, so an interrupted or repeated crawl resumes
+
+The verified {id: title} pages per wiki (fetched or exported, plus the /list
+entries) are the page manifest: bulk_export.py and sfc_bulk_export.py merge
+them into the /list pages. Linked pages not fetched yet (failures, beyond
+--max-pages, --offline) stay out of it until a later crawl reaches them.
+
+    python link_crawler.py
+    python link_crawler.py --offline            # only the exported Markdown
+    python link_crawler.py --workers 8 --delay 0.2 --max-pages 200
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from bs4 import BeautifulSoup
+
+from corpus_reader import default_reader
+
+HOST = "https://w.atwiki.jp"
+# Wiki name -> exported Markdown directory
+WIKIS = {
+    "yuyuz": Path("yuyuz_md"),
+    "sfcyuhakutokubetsu": Path("sfc_yuhaku_md"),
+}
+STATE_PATH = Path("crawl_state.json")
+STATE_VERSION = 1
+
+PAGE_LINK = re.compile(r'/(yuyuz|sfcyuhakutokubetsu)/pages/(\d+)\.html')
+MARKDOWN_LINK = re.compile(r'\[([^\]]*)\]\((\S+?)(?:\s+"[^"]*")?\)')
+MISSING_MARKER = "指定されたページ番号は存在しません"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+MAX_RETRIES = 3
+
+def node_key(wiki, page_id):
+    """State key for a page ('yuyuz/57')"""
+    return f"{wiki}/{page_id}"
+
+def parse_key(key):
+    """(wiki, page id) from a state key"""
+    wiki, page_id = key.split("/")
+    return wiki, int(page_id)
+
+def links_in_html(html_content):
+    """{(wiki, id): link text} for the wiki page links in an HTML page"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    links = {}
+    for link in soup.find_all("a", href=True):
+        match = PAGE_LINK.search(link["href"])
+        if match:
+            node = (match.group(1), int(match.group(2)))
+            links[node] = links.get(node) or link.get_text(strip=True)
+    return links
+
+def links_in_markdown(text):
+    """{(wiki, id): link text} for the wiki page links in exported Markdown (and its HTML tables)"""
+    links = {}
+    for text_match in MARKDOWN_LINK.finditer(text):
+        match = PAGE_LINK.search(text_match.group(2))
+        if match:
+            node = (match.group(1), int(match.group(2)))
+            links[node] = links.get(node) or text_match.group(1).strip()
+    if "<a " in text:
+        for node, link_text in links_in_html(text).items():
+            links[node] = links.get(node) or link_text
+    return links
+
+def page_title(html_content):
+    """Page name from <title> ('name - wiki - atwiki'), or ''"""
+    match = re.search(r'<title>(.*?)</title>', html_content, re.S)
+    return match.group(1).split(" - ")[0].strip() if match else ""
+
+def exported_pages(wiki):
+    """{id: (title, links)} for the pages already exported to Markdown"""
+    reader = default_reader()
+    pages = {}
+    for path in sorted(WIKIS[wiki].glob("[0-9][0-9][0-9]-*.md")):
+        page_id = int(path.name[:3])
+        title = reader.front_matter(path).get("title") or path.stem[4:]
+        pages[page_id] = (title, links_in_markdown(reader.body(path)))
+    reader.save()
+    return pages
+
+class RateLimiter:
+    """At most one request start per interval, shared by all threads"""
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def wait(self):
+        """Block until this thread may start a request"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+class Crawler:
+    """Breadth-first crawl over both wikis with a persistent visited set"""
+    def __init__(self, state_path=STATE_PATH, host=HOST, workers=4, delay=0.5, max_pages=500):
+        self.state_path = Path(state_path)
+        self.host = host
+        self.workers = workers
+        self.max_pages = max_pages
+        self.limiter = RateLimiter(delay)
+        self.local = threading.local()
+        self.fetched = 0
+        self.state = {"version": STATE_VERSION, "titles": {}, "visited": {}, "listed": [], "missing": []}
+        if self.state_path.exists():
+            stored = json.loads(self.state_path.read_text(encoding="utf-8"))
+            if stored.get("version") == STATE_VERSION:
+                self.state = stored
+                self.state.setdefault("listed", [])
+
+    def save(self):
+        """Write the crawl state"""
+        self.state["updated_at"] = datetime.now().isoformat()
+        self.state_path.write_text(json.dumps(self.state, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    def get(self, url):
+        """Response text, None if the page does not exist; raises after MAX_RETRIES failures"""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.headers.update(HEADERS)
+        for attempt in range(MAX_RETRIES):
+            self.limiter.wait()
+            try:
+                response = session.get(url, timeout=20)
+                if response.status_code == 404:
+                    return None
+                response.raise_for_status()
+                response.encoding = response.apparent_encoding
+                return response.text
+            except requests.RequestException:
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                time.sleep(2 * (attempt + 1))
+
+    def fetch(self, node):
+        """(node, links, title, exists) for one page; links is None when the fetch failed"""
+        wiki, page_id = node
+        url = f"{self.host}/{wiki}/pages/{page_id}.html"
+        try:
+            html_content = self.get(url)
+        except requests.RequestException as e:
+            print(f"  Failed to fetch {url}: {e}")
+            return node, None, "", False
+        if html_content is None or MISSING_MARKER in html_content:
+            return node, {}, "", False
+        return node, links_in_html(html_content), page_title(html_content), True
+
+    def record(self, node, links, title=""):
+        """Mark a page visited with its out-links; returns the linked nodes"""
+        for linked, text in links.items():
+            if text:
+                self.state["titles"].setdefault(node_key(*linked), text)
+        if title:
+            self.state["titles"][node_key(*node)] = title
+        self.state["visited"][node_key(*node)] = sorted(node_key(*linked) for linked in links)
+        return set(links)
+
+    def seed(self, offline=False, refresh=False):
+        """Starting frontier: /list links, exported pages' links and the resumed visited set's links"""
+        frontier = set()
+        listed = set(self.state["listed"])
+        if refresh:
+            self.state["visited"], self.state["missing"] = {}, []
+        for wiki in WIKIS:
+            for page_id, (title, links) in exported_pages(wiki).items():
+                frontier |= self.record((wiki, page_id), links, title)
+            if not offline:
+                try:
+                    list_html = self.get(f"{self.host}/{wiki}/list")
+                except requests.RequestException as e:
+                    print(f"  Failed to fetch {wiki}/list: {e}")
+                    list_html = None
+                if list_html:
+                    links = links_in_html(list_html)
+                    frontier |= set(links)
+                    listed |= {node_key(*linked) for linked in links}
+                    for linked, text in links.items():
+                        if text:
+                            # /list titles are the canonical page names
+                            self.state["titles"][node_key(*linked)] = text
+        self.state["listed"] = sorted(listed)
+        for links in self.state["visited"].values():
+            frontier |= {parse_key(key) for key in links}
+        return frontier
+
+    def crawl(self, offline=False, refresh=False):
+        """Crawl until the frontier is empty (or max_pages fetched); returns the number of levels"""
+        visited = self.state["visited"]
+        missing = set(self.state["missing"])
+        frontier = {node for node in self.seed(offline, refresh)
+                    if node_key(*node) not in visited and node_key(*node) not in missing}
+        levels = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while frontier and not offline and self.fetched < self.max_pages:
+                batch = sorted(frontier)[:self.max_pages - self.fetched]
+                levels += 1
+                print(f"level {levels}: fetching {len(batch)} pages")
+                discovered = set()
+                for node, links, title, exists in pool.map(self.fetch, batch):
+                    self.fetched += 1
+                    if links is None:
+                        continue
+                    if not exists:
+                        missing.add(node_key(*node))
+                        continue
+                    discovered |= self.record(node, links, title)
+                self.state["missing"] = sorted(missing)
+                self.save()
+                frontier = {node for node in discovered
+                            if node_key(*node) not in visited and node_key(*node) not in missing}
+        self.save()
+        return levels
+
+    def pages(self, wiki):
+        """{id: title} of the verified pages of a wiki: visited or on /list (the page manifest)"""
+        missing = set(self.state["missing"])
+        known = set(self.state["visited"]) | set(self.state["listed"])
+        pages = {}
+        for key in known - missing:
+            key_wiki, page_id = parse_key(key)
+            if key_wiki == wiki:
+                pages[page_id] = self.state["titles"].get(key) or f"page{page_id}"
+        return dict(sorted(pages.items()))
+
+def crawled_pages(wiki, state_path=STATE_PATH):
+    """Page manifest {id: title} from a previous crawl ({} if none)"""
+    if not Path(state_path).exists():
+        return {}
+    return Crawler(state_path).pages(wiki)
+
+def main():
+    """Crawl both wikis and report the pages missing from the exports"""
+    parser = argparse.ArgumentParser(description="Discover wiki pages through their links")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent fetches")
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds between request starts (all threads)")
+    parser.add_argument("--max-pages", type=int, default=500, help="Stop after this many fetches")
+    parser.add_argument("--offline", action="store_true", help="Only follow links in the exported Markdown")
+    parser.add_argument("--refresh", action="store_true", help="Forget the visited set and crawl again")
+    parser.add_argument("--host", default=HOST, help="atwiki host")
+    parser.add_argument("--state", default=str(STATE_PATH), help="Crawl state JSON")
+    args = parser.parse_args()
+
+    crawler = Crawler(args.state, args.host, args.workers, args.delay, args.max_pages)
+    start = time.perf_counter()
+    levels = crawler.crawl(args.offline, args.refresh)
+    print(f"{crawler.fetched} pages fetched over {levels} levels in {time.perf_counter() - start:.1f}s")
+
+    for wiki, directory in WIKIS.items():
+        pages = crawler.pages(wiki)
+        exported = {int(path.name[:3]) for path in directory.glob("[0-9][0-9][0-9]-*.md")}
+        new = sorted(set(pages) - exported)
+        print(f"{wiki}: {len(pages)} pages known, {len(exported)} exported, {len(new)} not exported")
+        for page_id in new:
+            print(f"  {page_id:3d}: {pages[page_id]}")
+    print(f"wrote {args.state}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
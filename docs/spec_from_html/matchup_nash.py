@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Mixed-strategy equilibria for character matchups
+Each turn is a simultaneous choice of commands. The payoff to the 先手 (row)
+is the expected HP swing plus weighted balance and reiki swings of one
+opening turn of battle_engine, so every command pair is judged by its own
+table: attack (judgment_sim), guard in either order (guard_sim) or
+collision (collision_sim). The reiki swing charges each command's cost
+against the crystal ball orbs it earns. Matrices are solved as zero-sum
+games by fictitious play.
+
+All pairs are solved with a process pool; equilibria are cached in
+matchup_cache.json keyed by a hash of the stats that went into the matrix,
+so only matchups whose inputs changed are recomputed.
+
+    python matchup_nash.py                    # all pairs
+    python matchup_nash.py 幽助 飛影           # one matchup with the mixes
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from battle_engine import DAMAGE_BUCKETS, KNOCKDOWN, ORBS, BattleEngine, initial_state
+from damage_table import TOUKI_MAX
+from roster import load_roster
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_PATH = SCRIPT_DIR / "matchup_cache.json"
+
+# A full balance bar (256) counts as much as a full HP bar (96)
+BALANCE_WEIGHT = 96 / 256
+# A full reiki bar (25) counts as much as a full HP bar, so 霊撃 are not free
+REIKI_WEIGHT = 96 / 25
+ITERATIONS = 20000
+
+def matchup_inputs(first, second, touki=TOUKI_MAX, balance_weight=BALANCE_WEIGHT,
+                   reiki_weight=REIKI_WEIGHT):
+    """Plain-data description of one matchup (what the cache hash covers)"""
+    def side(fighter):
+        return {
+            "name": fighter["name"],
+            "defense": fighter["defense"],
+            "balance_defense": fighter["balance_defense"],
+            "moves": [
+                {field: m[field] for field in ("key", "category", "command", "name", "kind", "cost",
+                                               "success", "evasion", "power", "drain")}
+                for m in fighter["moves"]
+            ],
+        }
+    return {
+        "first": side(first),
+        "second": side(second),
+        "touki": touki,
+        "balance_weight": balance_weight,
+        "reiki_weight": reiki_weight,
+        "orbs": ORBS,
+        "damage_buckets": DAMAGE_BUCKETS,
+        "iterations": ITERATIONS,
+    }
+
+def inputs_hash(inputs):
+    """Stable hash of matchup inputs"""
+    text = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def payoff_matrices(inputs):
+    """
+    (rows, cols, hp, balance, reiki): the 先手 and 後手 command keys and the
+    [rows, cols] expected swings for the 先手 over one opening turn
+    Positive means the 先手 comes out ahead.
+    """
+    first, second = inputs["first"], inputs["second"]
+    # Mirror matches share one roster entry
+    roster = {first["name"]: first, second["name"]: second}
+    engine = BattleEngine(roster, (first["name"], second["name"]), inputs["orbs"],
+                          inputs["damage_buckets"])
+    state = initial_state(inputs["touki"], first=0)
+    rows, cols = engine.actions(state, 0), engine.actions(state, 1)
+    hp = np.zeros((len(rows), len(cols)))
+    bal = np.zeros((len(rows), len(cols)))
+    reiki = np.zeros((len(rows), len(cols)))
+
+    for i, row in enumerate(rows):
+        for j, col in enumerate(cols):
+            for p, next_state in engine.outcome(state, (row, col)):
+                mine, theirs = next_state.sides
+                hp[i, j] += p * (mine.hp - theirs.hp) / 256
+                bal[i, j] += p * (min(theirs.balance, KNOCKDOWN) - min(mine.balance, KNOCKDOWN))
+                reiki[i, j] += p * (mine.reiki - theirs.reiki)
+    return rows, cols, hp, bal, reiki
+
+def fictitious_play(payoff, iterations=ITERATIONS):
+    """
+    Zero-sum equilibrium of a payoff matrix (row maximizes)
+    Returns (row mix, column mix, value, gap) where gap is the distance
+    between the guaranteed lower and upper bounds of the game value.
+    """
+    rows, cols = payoff.shape
+    row_counts = np.zeros(rows)
+    col_counts = np.zeros(cols)
+    row_totals = np.zeros(rows)
+    col_totals = np.zeros(cols)
+    i, j = 0, 0
+    for _ in range(iterations):
+        row_counts[i] += 1
+        col_counts[j] += 1
+        row_totals += payoff[:, j]
+        col_totals += payoff[i, :]
+        i = int(np.argmax(row_totals))
+        j = int(np.argmin(col_totals))
+
+    x = row_counts / iterations
+    y = col_counts / iterations
+    lower = float((x @ payoff).min())
+    upper = float((payoff @ y).max())
+    return x, y, (lower + upper) / 2, upper - lower
+
+def solve_matchup(inputs):
+    """Equilibrium for one matchup (runs in a worker process)"""
+    rows, cols, hp, bal, reiki = payoff_matrices(inputs)
+    if not rows or not cols:
+        return {"value": None, "first_mix": {}, "second_mix": {}, "gap": None}
+
+    payoff = hp + inputs["balance_weight"] * bal + inputs["reiki_weight"] * reiki
+    x, y, value, gap = fictitious_play(payoff, inputs["iterations"])
+    return {
+        "value": round(value, 4),
+        "gap": round(gap, 4),
+        "first_mix": {key: round(float(p), 4) for key, p in zip(rows, x) if p >= 1e-3},
+        "second_mix": {key: round(float(p), 4) for key, p in zip(cols, y) if p >= 1e-3},
+        "hp_value": round(float(x @ hp @ y), 4),
+        "balance_value": round(float(x @ bal @ y), 4),
+        "reiki_value": round(float(x @ reiki @ y), 4),
+    }
+
+def load_cache(path=CACHE_PATH):
+    """Cached equilibria by input hash"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_cache(cache, path=CACHE_PATH):
+    """Write the equilibrium cache"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1)
+
+def solve_all(roster, pairs=None, workers=None, cache_path=CACHE_PATH, **options):
+    """
+    {(first, second): result} for the given pairs (default: every ordered pair)
+    Cached results are reused; the rest are solved in a process pool.
+    """
+    pairs = pairs or [(a, b) for a in roster for b in roster]
+    cache = load_cache(cache_path)
+
+    jobs = {}
+    results = {}
+    for pair in pairs:
+        inputs = matchup_inputs(roster[pair[0]], roster[pair[1]], **options)
+        key = inputs_hash(inputs)
+        if key in cache:
+            results[pair] = cache[key]
+        else:
+            jobs[pair] = (key, inputs)
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            solved = pool.map(solve_matchup, [inputs for _, inputs in jobs.values()], chunksize=4)
+            for (pair, (key, _)), result in zip(jobs.items(), solved):
+                cache[key] = result
+                results[pair] = result
+        save_cache(cache, cache_path)
+
+    return results, len(jobs)
+
+def main():
+    """Solve all matchups, or print one matchup's mixes"""
+    parser = argparse.ArgumentParser(description="Matchup equilibria")
+    parser.add_argument("first", nargs="?", help="先手 character")
+    parser.add_argument("second", nargs="?", help="後手 character")
+    parser.add_argument("--touki", type=int, default=TOUKI_MAX)
+    parser.add_argument("--balance-weight", type=float, default=BALANCE_WEIGHT)
+    parser.add_argument("--reiki-weight", type=float, default=REIKI_WEIGHT, help="HP units per reiki")
+    parser.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    roster = load_roster()
+    options = {"touki": args.touki, "balance_weight": args.balance_weight, "reiki_weight": args.reiki_weight}
+
+    if args.first:
+        second = args.second or args.first
+        results, solved = solve_all(roster, [(args.first, second)], args.workers, **options)
+        result = results[(args.first, second)]
+        print(f"{args.first} (先手) vs {second} (後手): value {result['value']} "
+              f"(HP {result.get('hp_value')}, balance {result.get('balance_value')}, "
+              f"reiki {result.get('reiki_value')}, gap {result['gap']})")
+        for side, name in (("first_mix", args.first), ("second_mix", second)):
+            print(f"  {name}:")
+            for key, p in sorted(result[side].items(), key=lambda item: -item[1]):
+                print(f"    {key:<30} {p * 100:5.1f}%")
+        return 0
+
+    start = time.time()
+    results, solved = solve_all(roster, workers=args.workers, **options)
+    names = list(roster)
+    print("先手 \\ 後手 " + " ".join(f"{n[:4]:>6}" for n in names))
+    for first in names:
+        cells = []
+        for second in names:
+            value = results[(first, second)]["value"]
+            cells.append(f"{value:6.2f}" if value is not None else f"{'-':>6}")
+        print(f"{first[:8]:<10} " + " ".join(cells))
+    print(f"\n{len(results)} matchups ({solved} solved, {len(results) - solved} cached) "
+          f"in {time.time() - start:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped store of attack judgment outcomes for every matchup
+For each ordered character pair (row, column), initiative (row is 先手 or
+後手) and pair of attack commands, the store holds the joint probability of
+what each side receives: [row result, column result] over direct/graze/evade
+(judgment_sim, uniform RNG, touki MAX, balance 0).
+
+Layout: a fixed header, a JSON index (characters, move keys, shape, input
+hash) and one float32 tensor [C, C, 2, M, M, 3, 3] at a 64-byte aligned
+offset. Each character pair is one fixed-stride block, so a pair, an
+attacker row or one move against every reply is a plain slice of the memory
+map; MatchupStore returns those slices as views without copying. Moves past
+a character's own count are NaN padding.
+
+serve runs a small local JSON endpoint for the character-data viewer:
+    /characters                          names, move keys, result labels
+    /pair?a=幽助&b=飛影&first=1           [M, M, 3, 3] for one pair
+    /move?name=幽助&key=...               one move vs every defender's replies
+    /attacker?name=幽助&format=raw        raw float32 block (X-Shape header)
+
+    python matchup_store.py build
+    python matchup_store.py show 幽助 飛影
+    python matchup_store.py serve --port 8765
+"""
+
+import argparse
+import hashlib
+import json
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from damage_table import TOUKI_MAX
+from judgment_sim import ATTACK_BUCKETS, RESULTS, buckets_uniform
+from roster import is_attack, load_roster
+
+SCRIPT_DIR = Path(__file__).parent
+STORE_PATH = SCRIPT_DIR / "matchup_store.bin"
+
+MAGIC = b"YYMS"
+VERSION = 1
+# magic, version, reserved, index bytes, data offset
+HEADER = struct.Struct("<4sHHIQ")
+ALIGN = 64
+DTYPE = np.dtype("<f4")
+PORT = 8765
+
+def _joint_matrix():
+    """[9, 3, 3] share of each (first receives, second receives) per bucket"""
+    matrix = np.zeros((len(ATTACK_BUCKETS), len(RESULTS), len(RESULTS)))
+    for b, outcomes in enumerate(ATTACK_BUCKETS):
+        for share, first, second in outcomes:
+            matrix[b, RESULTS.index(first), RESULTS.index(second)] += share
+    return matrix
+
+JOINT = _joint_matrix()
+
+def store_moves(fighter):
+    """Attack commands in the store (no 霊撃力UP)"""
+    return [m for m in fighter["moves"] if is_attack(m) and m["category"] != "霊撃力UP"]
+
+def store_inputs(roster, touki=TOUKI_MAX):
+    """Plain-data description of the store contents (what the hash covers)"""
+    return {
+        "touki": touki,
+        "characters": [
+            [name, [[m["key"], m["success"], m["evasion"]] for m in store_moves(roster[name])]]
+            for name in sorted(roster)
+        ],
+    }
+
+def inputs_hash(inputs):
+    """Stable hash of store inputs"""
+    text = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def pair_block(job):
+    """[2, M, M, 3, 3] outcomes for one ordered pair (worker)"""
+    row_moves, col_moves, width, touki = job
+    block = np.full((2, width, width, len(RESULTS), len(RESULTS)), np.nan, dtype=DTYPE)
+    for i, (_, s1, e1) in enumerate(row_moves):
+        for j, (_, s2, e2) in enumerate(col_moves):
+            block[0, i, j] = np.tensordot(buckets_uniform(s1, e1, s2, e2, touki, touki), JOINT, 1)
+            # Row is 後手: the column's move is judged first; swap back to [row, column]
+            swapped = np.tensordot(buckets_uniform(s2, e2, s1, e1, touki, touki), JOINT, 1)
+            block[1, i, j] = swapped.T
+    return block
+
+def build_store(roster, path=STORE_PATH, touki=TOUKI_MAX, workers=None):
+    """Compute every pair and write the store file; returns the index"""
+    inputs = store_inputs(roster, touki)
+    characters = [name for name, _ in inputs["characters"]]
+    moves = [moves for _, moves in inputs["characters"]]
+    width = max((len(m) for m in moves), default=0)
+    shape = (len(characters), len(characters), 2, width, width, len(RESULTS), len(RESULTS))
+    index = {
+        "characters": characters,
+        "moves": [[m[0] for m in row] for row in moves],
+        "results": RESULTS,
+        "shape": list(shape),
+        "dtype": DTYPE.str,
+        "touki": touki,
+        "hash": inputs_hash(inputs),
+    }
+
+    jobs = [(moves[a], moves[b], width, touki)
+            for a in range(len(characters)) for b in range(len(characters))]
+    index_bytes = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    offset = -(-(HEADER.size + len(index_bytes)) // ALIGN) * ALIGN
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(index_bytes), offset))
+        f.write(index_bytes)
+        f.write(b"\0" * (offset - f.tell()))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for block in pool.map(pair_block, jobs, chunksize=8):
+                f.write(block.tobytes())
+    return index
+
+def read_index(path=STORE_PATH):
+    """(index, data offset) from a store file"""
+    with open(path, "rb") as f:
+        magic, version, _, length, offset = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a matchup store")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported store version {version}")
+        return json.loads(f.read(length).decode("utf-8")), offset
+
+class MatchupStore:
+    """Zero-copy slices of a memory-mapped store file"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = Path(path)
+        self.index, offset = read_index(self.path)
+        self.characters = self.index["characters"]
+        self.moves = self.index["moves"]
+        self.tensor = np.memmap(self.path, dtype=np.dtype(self.index["dtype"]), mode="r",
+                                offset=offset, shape=tuple(self.index["shape"]))
+        self._character_index = {c: i for i, c in enumerate(self.characters)}
+        self._move_index = [{k: i for i, k in enumerate(keys)} for keys in self.moves]
+
+    def character(self, name):
+        """Character index"""
+        try:
+            return self._character_index[name]
+        except KeyError:
+            raise KeyError(f"Unknown character: {name}") from None
+
+    def move(self, name, key):
+        """(character index, move index)"""
+        c = self.character(name)
+        try:
+            return c, self._move_index[c][key]
+        except KeyError:
+            raise KeyError(f"Unknown move for {name}: {key}") from None
+
+    def attacker(self, name):
+        """[C, 2, M, M, 3, 3] one character against every opponent"""
+        return self.tensor[self.character(name)]
+
+    def pair(self, name, opponent, first=True):
+        """[M, M, 3, 3] one pair with the row character as 先手 (or 後手)"""
+        return self.tensor[self.character(name), self.character(opponent), 0 if first else 1]
+
+    def replies(self, name, key, first=True):
+        """[C, M, 3, 3] one move against every reply of every opponent"""
+        c, m = self.move(name, key)
+        return self.tensor[c, :, 0 if first else 1, m]
+
+    def outcome(self, name, key, opponent, reply, first=True):
+        """[3, 3] joint outcome (name receives, opponent receives)"""
+        c, m = self.move(name, key)
+        o, r = self.move(opponent, reply)
+        return self.tensor[c, o, 0 if first else 1, m, r]
+
+    def stale(self, roster, touki=TOUKI_MAX):
+        """True when the roster no longer matches what the store was built from"""
+        return self.index["hash"] != inputs_hash(store_inputs(roster, touki))
+
+def load_store(path=STORE_PATH, roster=None, rebuild=False, workers=None):
+    """MatchupStore, building the file first if missing, stale or asked to"""
+    path = Path(path)
+    if not rebuild and path.exists() and roster is None:
+        return MatchupStore(path)
+    roster = roster if roster is not None else load_roster()
+    if rebuild or not path.exists() or MatchupStore(path).stale(roster):
+        build_store(roster, path, workers=workers)
+    return MatchupStore(path)
+
+def _rounded(values):
+    """Nested lists with NaN padding as null"""
+    return [None if np.isnan(v) else round(float(v), 6) for v in values] if values.ndim == 1 \
+        else [_rounded(v) for v in values]
+
+def make_handler(store):
+    """HTTP handler class serving one store"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type="application/json; charset=utf-8", headers=()):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, data, status=200):
+            self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            first = query.get("first", "1") != "0"
+
+            def param(name):
+                if name not in query:
+                    raise KeyError(f"missing parameter {name}")
+                return query[name]
+            try:
+                if url.path == "/characters":
+                    self._json({"characters": [{"name": c, "moves": m}
+                                               for c, m in zip(store.characters, store.moves)],
+                                "results": store.index["results"], "touki": store.index["touki"]})
+                elif url.path == "/pair":
+                    a, b = param("a"), param("b")
+                    self._json({"a": a, "b": b, "first": first,
+                                "a_moves": store.moves[store.character(a)],
+                                "b_moves": store.moves[store.character(b)],
+                                "outcomes": _rounded(store.pair(a, b, first))})
+                elif url.path == "/move":
+                    name, key = param("name"), param("key")
+                    replies = store.replies(name, key, first)
+                    self._json({"name": name, "key": key, "first": first, "defenders": {
+                        c: {"moves": store.moves[i],
+                            "outcomes": _rounded(replies[i, :len(store.moves[i])])}
+                        for i, c in enumerate(store.characters)}})
+                elif url.path == "/attacker" and query.get("format") == "raw":
+                    block = store.attacker(param("name"))
+                    self._send(200, memoryview(block).cast("B"), "application/octet-stream",
+                               [("X-Shape", ",".join(map(str, block.shape))),
+                                ("X-Dtype", store.index["dtype"])])
+                else:
+                    self._json({"error": f"unknown endpoint {url.path}"}, 404)
+            except KeyError as e:
+                self._json({"error": str(e).strip("'\"")}, 400)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(store, host="127.0.0.1", port=PORT):
+    """Serve the store over HTTP until interrupted"""
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    print(f"Serving {store.path} on http://{host}:{port}/characters")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    """Build, query or serve the matchup store"""
+    parser = argparse.ArgumentParser(description="Memory-mapped matchup outcome store")
+    parser.add_argument("command", choices=["build", "show", "serve"])
+    parser.add_argument("first", nargs="?", help="row character (show)")
+    parser.add_argument("second", nargs="?", help="column character (show)")
+    parser.add_argument("--path", type=Path, default=STORE_PATH)
+    parser.add_argument("--second-first", action="store_true", help="show with the row as 後手")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.time()
+        index = build_store(load_roster(), args.path, workers=args.workers)
+        print(f"Wrote {args.path} {tuple(index['shape'])} ({args.path.stat().st_size / 1e6:.1f} MB) "
+              f"in {time.time() - start:.1f}s")
+        return 0
+
+    store = load_store(args.path, rebuild=False, workers=args.workers)
+    if args.command == "serve":
+        serve(store, args.host, args.port)
+        return 0
+
+    if not args.first:
+        parser.error("show needs a character")
+    second = args.second or args.first
+    first = not args.second_first
+    block = store.pair(args.first, second, first)
+    theirs = store.moves[store.character(second)]
+    print(f"{args.first} ({'先手' if first else '後手'}) vs {second}: "
+          f"P(row direct) / P(column direct)")
+    for i, key in enumerate(store.moves[store.character(args.first)]):
+        cells = [f"{block[i, j, 0].sum():.2f}/{block[i, j, :, 0].sum():.2f}" for j in range(len(theirs))]
+        print(f"  {key:<28} " + " ".join(cells))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
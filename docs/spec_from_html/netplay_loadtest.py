@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Load tester for netplay_relay
+Opens --rooms rooms with two clients each, plays --turns lockstep turns of
+random PlayerTurnInputs in every room at once and reports the turn-commit
+latency each client sees (input sent -> commit received) as p50/p95/p99/max,
+plus commit throughput and the relay's own stats. Clients answer pings like
+a real client so the relay's RTT bookkeeping is exercised too.
+
+--spawn runs the relay in this process (same event loop), which is the
+quickest way to size it; without it the tester targets a running relay.
+Past ~500 rooms raise the open file limit (ulimit -n).
+
+    python netplay_loadtest.py --spawn --rooms 1000 --turns 20
+    python netplay_loadtest.py --host 192.168.0.10 --rooms 2000 --turns 50 --think 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import numpy as np
+
+from netplay_relay import PORT, RelayServer
+from replay import BUTTONS, DIRECTIONS
+
+CONNECT_CONCURRENCY = 200
+
+def random_input(rng):
+    """Random PlayerTurnInput dict (same shape as replay.record_match)"""
+    command = None
+    if rng.random() < 0.9:
+        command = {"direction": DIRECTIONS[rng.integers(4)], "button": BUTTONS[rng.integers(4)],
+                   "timestamp": int(rng.integers(0, 180))}
+    charging = bool(rng.random() < 0.8)
+    return {
+        "toukiCharge": {
+            "isCharging": charging,
+            "direction": DIRECTIONS[rng.integers(4)] if charging else None,
+            "chargeFrames": int(rng.integers(0, 200)) if charging else 0,
+        },
+        "command": command,
+        "useItem": False,
+    }
+
+class Client:
+    """One simulated player connection"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.messages = asyncio.Queue()
+        self.task = asyncio.create_task(self.read())
+
+    async def read(self):
+        """Answer pings; queue everything else"""
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                await self.messages.put({"type": "closed"})
+                return
+            message = json.loads(line)
+            if message["type"] == "ping":
+                self.send({"type": "pong", "t": message["t"]})
+            else:
+                await self.messages.put(message)
+
+    def send(self, message):
+        """Write one message line"""
+        self.writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    async def expect(self, kind):
+        """Next queued message, which must be of this type"""
+        message = await self.messages.get()
+        if message["type"] != kind:
+            raise RuntimeError(f"expected {kind}, got {message}")
+        return message
+
+    async def close(self):
+        """Close the connection and stop reading"""
+        self.task.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def connect(host, port, gate):
+    """Client connection, limited to CONNECT_CONCURRENCY handshakes at a time"""
+    async with gate:
+        reader, writer = await asyncio.open_connection(host, port)
+    return Client(reader, writer)
+
+async def play_room(host, port, turns, think, seed, gate, latencies):
+    """Create a room, join it and play turns; latencies get appended (seconds)"""
+    rng = np.random.default_rng(seed)
+    host_client = await connect(host, port, gate)
+    guest = await connect(host, port, gate)
+    clients = (host_client, guest)
+    try:
+        host_client.send({"type": "create"})
+        room = (await host_client.expect("created"))["room"]
+        guest.send({"type": "join", "room": room})
+        await guest.expect("joined")
+        for client in clients:
+            await client.expect("start")
+
+        for turn in range(turns):
+            if think:
+                await asyncio.sleep(float(rng.uniform(0, think)))
+            sent = []
+            for client in clients:
+                client.send({"type": "input", "turn": turn, "input": random_input(rng)})
+                sent.append(time.perf_counter())
+            for client, at in zip(clients, sent):
+                commit = await client.expect("commit")
+                if commit["turn"] != turn:
+                    raise RuntimeError(f"room {room}: commit for turn {commit['turn']}, expected {turn}")
+                latencies.append(time.perf_counter() - at)
+        host_client.send({"type": "leave"})
+    finally:
+        for client in clients:
+            await client.close()
+
+async def relay_stats(host, port):
+    """The relay's stats message"""
+    reader, writer = await asyncio.open_connection(host, port)
+    client = Client(reader, writer)
+    client.send({"type": "stats"})
+    stats = await client.expect("stats")
+    await client.close()
+    return stats
+
+async def run(args):
+    """Run the load test; returns (latencies, elapsed, failures, relay stats)"""
+    server = relay = None
+    if args.spawn:
+        relay = RelayServer(args.ping)
+        server = await relay.start(args.host, args.port)
+
+    gate = asyncio.Semaphore(args.ramp)
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(play_room(args.host, args.port, args.turns, args.think, args.seed + n, gate, latencies)
+          for n in range(args.rooms)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failures = [r for r in results if isinstance(r, Exception)]
+    stats = await relay_stats(args.host, args.port)
+
+    if server is not None:
+        # Let the relay see the last disconnects before shutting down
+        while relay.connections:
+            await asyncio.sleep(0.01)
+        server.close()
+        await server.wait_closed()
+    return latencies, elapsed, failures, stats
+
+def main():
+    """Run the load test and print latency percentiles"""
+    parser = argparse.ArgumentParser(description="Netplay relay load tester")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=20, help="turns per room")
+    parser.add_argument("--think", type=float, default=0.0, help="max random delay before each turn (s)")
+    parser.add_argument("--ramp", type=int, default=CONNECT_CONCURRENCY, help="concurrent connects")
+    parser.add_argument("--ping", type=float, default=1.0, help="relay ping interval with --spawn (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="run the relay in this process")
+    args = parser.parse_args()
+
+    latencies, elapsed, failures, stats = asyncio.run(run(args))
+    print(f"{args.rooms} rooms x {args.turns} turns: {len(latencies) // 2} commits "
+          f"in {elapsed:.1f}s ({len(latencies) / 2 / elapsed:.0f} commits/s), {len(failures)} rooms failed")
+    if failures:
+        print(f"  first failure: {failures[0]!r}")
+    if latencies:
+        ms = np.array(latencies) * 1000
+        print("client commit latency (ms): " + ", ".join(
+            f"p{p} {np.percentile(ms, p):.2f}" for p in (50, 95, 99)) + f", max {ms.max():.2f}")
+    print("relay: " + ", ".join(f"{k} {v}" for k, v in stats.items() if k != "type"))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local lockstep input relay for netplay
+Rooms hold two players. Each turn both players send their PlayerTurnInput
+(src/types/PlayerInput.ts); once both inputs for the turn are in, the relay
+sends the pair to both players as a commit, so every client runs the same
+turn with the same inputs. The relay pings every connection to measure RTT,
+and each commit carries both players' RTT so clients can size their input
+delay.
+
+Protocol: one JSON object per line over TCP.
+  client -> relay   {"type": "create"}
+                    {"type": "join", "room": "ABCDE"}
+                    {"type": "input", "turn": 0, "input": {PlayerTurnInput}}
+                    {"type": "pong", "t": <echoed>}
+                    {"type": "stats"}
+                    {"type": "leave"}
+  relay -> client   created / joined (room, player 1|2), start,
+                    commit (turn, inputs [1P, 2P], rtt [ms, ms]), ping (t),
+                    stats, left, error (message)
+
+    python netplay_relay.py --port 7845
+"""
+
+import argparse
+import asyncio
+import json
+import secrets
+import string
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from replay import encode_input
+
+PORT = 7845
+PING_INTERVAL = 1.0
+ROOM_CODE_LENGTH = 5
+# Slow readers past this many buffered bytes are disconnected
+MAX_WRITE_BUFFER = 1 << 20
+# Commit latencies kept for percentiles
+LATENCY_WINDOW = 100000
+RTT_SMOOTHING = 0.2
+
+class Player:
+    """One connection"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.room = None
+        self.slot = None
+        self.rtt = None
+
+    def send(self, message):
+        """Queue a message; drop the connection if it stopped reading"""
+        if self.writer.is_closing():
+            return
+        self.writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.writer.close()
+
+class Room:
+    """Two players in lockstep"""
+
+    def __init__(self, code):
+        self.code = code
+        self.players = [None, None]
+        self.turn = 0
+        self.pending = [None, None]
+        self.first_input_at = None
+
+    def rtt(self):
+        """Smoothed RTT in ms per player (None until measured)"""
+        return [None if p is None or p.rtt is None else round(p.rtt * 1000, 2) for p in self.players]
+
+class RelayServer:
+    """Rooms, lockstep commits and RTT measurement"""
+
+    def __init__(self, ping_interval=PING_INTERVAL):
+        self.ping_interval = ping_interval
+        self.rooms = {}
+        self.connections = 0
+        self.commits = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def new_code(self):
+        """Unused room code"""
+        while True:
+            code = "".join(secrets.choice(string.ascii_uppercase) for _ in range(ROOM_CODE_LENGTH))
+            if code not in self.rooms:
+                return code
+
+    def stats(self):
+        """Relay counters and commit latency percentiles (ms)"""
+        result = {
+            "type": "stats",
+            "rooms": len(self.rooms),
+            "connections": self.connections,
+            "commits": self.commits,
+        }
+        if self.latencies:
+            values = np.array(self.latencies) * 1000
+            for p in (50, 95, 99):
+                result[f"p{p}_ms"] = round(float(np.percentile(values, p)), 3)
+        return result
+
+    def handle_message(self, player, message):
+        """Apply one client message"""
+        if not isinstance(message, dict):
+            raise ValueError("message must be a JSON object")
+        kind = message.get("type")
+        if kind == "pong":
+            sample = time.monotonic() - float(message.get("t", 0))
+            player.rtt = sample if player.rtt is None else \
+                (1 - RTT_SMOOTHING) * player.rtt + RTT_SMOOTHING * sample
+        elif kind == "create":
+            if player.room:
+                raise ValueError("already in a room")
+            room = Room(self.new_code())
+            self.rooms[room.code] = room
+            room.players[0], player.room, player.slot = player, room, 0
+            player.send({"type": "created", "room": room.code, "player": 1})
+        elif kind == "join":
+            room = self.rooms.get(message.get("room"))
+            if room is None or room.players[1] is not None:
+                raise ValueError("no such room or room is full")
+            if player.room:
+                raise ValueError("already in a room")
+            room.players[1], player.room, player.slot = player, room, 1
+            player.send({"type": "joined", "room": room.code, "player": 2})
+            for p in room.players:
+                p.send({"type": "start", "room": room.code, "turn": room.turn})
+        elif kind == "input":
+            self.handle_input(player, message)
+        elif kind == "stats":
+            player.send(self.stats())
+        elif kind == "leave":
+            self.leave(player)
+        else:
+            raise ValueError(f"unknown message type {kind!r}")
+
+    def handle_input(self, player, message):
+        """Store a turn input and commit when both are in"""
+        room = player.room
+        if room is None or None in room.players:
+            raise ValueError("room is not ready")
+        if message.get("turn") != room.turn:
+            raise ValueError(f"expected input for turn {room.turn}")
+        if room.pending[player.slot] is not None:
+            raise ValueError("input already sent for this turn")
+        turn_input = message.get("input")
+        try:
+            encode_input(turn_input)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise ValueError("malformed PlayerTurnInput")
+
+        room.pending[player.slot] = turn_input
+        if room.first_input_at is None:
+            room.first_input_at = time.monotonic()
+        if None in room.pending:
+            return
+
+        commit = {"type": "commit", "turn": room.turn, "inputs": room.pending, "rtt": room.rtt()}
+        for p in room.players:
+            p.send(commit)
+        self.latencies.append(time.monotonic() - room.first_input_at)
+        self.commits += 1
+        room.turn += 1
+        room.pending = [None, None]
+        room.first_input_at = None
+
+    def leave(self, player):
+        """Remove a player; the room closes and the other player is told"""
+        room = player.room
+        if room is None:
+            return
+        for other in room.players:
+            if other is not None and other is not player:
+                other.send({"type": "left", "room": room.code})
+                other.room = other.slot = None
+        self.rooms.pop(room.code, None)
+        player.room = player.slot = None
+
+    async def ping(self, player):
+        """Ping a connection until it closes"""
+        while not player.writer.is_closing():
+            player.send({"type": "ping", "t": time.monotonic()})
+            await asyncio.sleep(self.ping_interval)
+
+    async def handle(self, reader, writer):
+        """Serve one connection"""
+        player = Player(writer)
+        self.connections += 1
+        pinger = asyncio.create_task(self.ping(player))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line over the stream limit; the rest of it cannot be framed
+                    player.send({"type": "error", "message": "message too long"})
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    self.handle_message(player, json.loads(line))
+                except (TypeError, ValueError) as e:
+                    player.send({"type": "error", "message": str(e)})
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            pinger.cancel()
+            self.leave(player)
+            self.connections -= 1
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=PORT):
+        """Start listening; returns the asyncio server"""
+        return await asyncio.start_server(self.handle, host, port)
+
+async def serve(host, port, ping_interval, stats_interval):
+    """Run the relay until cancelled"""
+    relay = RelayServer(ping_interval)
+    server = await relay.start(host, port)
+    print(f"Relay listening on {host}:{port}")
+    async with server:
+        if stats_interval <= 0:
+            await asyncio.Event().wait()
+        while True:
+            await asyncio.sleep(stats_interval)
+            print(json.dumps(relay.stats()))
+
+def main():
+    """Run the relay"""
+    parser = argparse.ArgumentParser(description="Lockstep netplay relay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--ping", type=float, default=PING_INTERVAL, help="ping interval in seconds")
+    parser.add_argument("--stats", type=float, default=10.0, help="stats print interval in seconds (0: never)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.ping, args.stats))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
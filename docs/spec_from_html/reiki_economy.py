@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Crystal ball reward and reiki economy
+How many turns until a character can afford each 技/霊撃, from the reward
+rules in 023-霊界水晶玉報酬:
+- the ball holds 2-6 orbs or an item, and the next content follows the
+  current one (NEXT_CONTENT)
+- 完全成功 pays every orb, 半分成功 half rounded up, 失敗 one, 完全失敗 none
+- an item goes to the better success judgment and stays in the ball on a tie
+- reiki is capped at 25; 霊小/霊大 in the stock add 5/8 when used
+Success judgments come from battle_engine (exact attack judgment) for the
+command played while saving (the best free attack) against the opponent's
+attack mix.
+
+Two engines over (reiki, ball content, item stock):
+- Markov chain: exact expected turns from empty reiki to each move's cost
+- Monte Carlo: vectorized runs that use the move whenever it is affordable,
+  giving the turns per use of a 霊撃 chain
+Results are cached in reiki_cache.json per move set and judgment table.
+
+Appearance rates are not published (2 orbs and items are rare, 愛大 very
+rare), so CONTENT_WEIGHTS and ITEM_WEIGHTS are estimates.
+
+    python reiki_economy.py 幽助 飛影
+    python reiki_economy.py --opponent 戸愚呂弟 --runs 20000
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from battle_engine import (
+    ITEM_REIKI, REIKI_MAX, SUCCESS_JUDGMENTS, BattleEngine, initial_state, orbs_for,
+)
+from roster import is_attack, load_roster
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_PATH = SCRIPT_DIR / "reiki_cache.json"
+
+# Ball contents: orb counts, then an item
+CONTENTS = [2, 3, 4, 5, 6, "item"]
+ITEM_CONTENT = CONTENTS.index("item")
+
+# 023: next-turn contents predicted from the current one
+NEXT_CONTENT = {
+    2: [4, 5, 6],
+    "item": [4, 5, 6],
+    4: [2, 3, 4, 5, 6, "item"],
+    5: [2, 3, 4, 5, 6, "item"],
+    6: [3, 4, 5, "item"],
+    3: [3, 4, 5, 6, "item"],
+}
+OPENING_CONTENT = [3, 4, 5, 6]
+
+# Relative appearance weights (estimates; rare entries at a quarter)
+RARE_WEIGHT = 0.25
+CONTENT_WEIGHTS = {2: RARE_WEIGHT, 3: 1.0, 4: 1.0, 5: 1.0, 6: 1.0, "item": RARE_WEIGHT}
+ITEM_WEIGHTS = {"霊小": 1.0, "霊大": 1.0, "気小": 1.0, "気大": 1.0, "愛小": 1.0, "愛大": 0.1}
+
+# Item stock as far as reiki is concerned
+STOCKS = [None, "霊小", "霊大", "other"]
+
+RUNS = 10000
+TURNS = 300
+SEED = 0
+
+def content_matrix():
+    """[6, 6] next-content probabilities from the current content"""
+    matrix = np.zeros((len(CONTENTS), len(CONTENTS)))
+    for c, content in enumerate(CONTENTS):
+        weights = np.array([CONTENT_WEIGHTS[n] for n in NEXT_CONTENT[content]])
+        for n, w in zip(NEXT_CONTENT[content], weights / weights.sum()):
+            matrix[c, CONTENTS.index(n)] += w
+    return matrix
+
+def stock_distribution():
+    """[4] stock after receiving an item"""
+    total = sum(ITEM_WEIGHTS.values())
+    dist = np.zeros(len(STOCKS))
+    for item, weight in ITEM_WEIGHTS.items():
+        dist[STOCKS.index(item if item in ITEM_REIKI else "other")] += weight / total
+    return dist
+
+def steady_contents():
+    """Long-run ball content distribution (ignoring items kept on ties)"""
+    matrix = content_matrix()
+    dist = np.full(len(CONTENTS), 1 / len(CONTENTS))
+    for _ in range(200):
+        dist = dist @ matrix
+    return dist
+
+def judgment_table(engine, key, opponent_keys):
+    """[4, 4] P(my judgment, opponent judgment) for a command vs a uniform mix"""
+    state = initial_state()
+    table = np.zeros((len(SUCCESS_JUDGMENTS), len(SUCCESS_JUDGMENTS)))
+    for answer in opponent_keys:
+        for p, mine, theirs in engine.success_judgments(state, (key, answer)):
+            table[SUCCESS_JUDGMENTS.index(mine), SUCCESS_JUDGMENTS.index(theirs)] += p
+    return table / len(opponent_keys)
+
+def free_attack(engine, opponent_keys):
+    """Zero-cost attack with the most expected orbs, and its judgment table"""
+    best = None
+    for move in engine.moves[0]:
+        if move["cost"] or not is_attack(move):
+            continue
+        table = judgment_table(engine, move["key"], opponent_keys)
+        orbs = sum(table[i].sum() * orbs_for(j, 4) for i, j in enumerate(SUCCESS_JUDGMENTS))
+        if best is None or orbs > best[0]:
+            best = (orbs, move["key"], table)
+    return best[1], best[2]
+
+def item_transfer(table):
+    """(P mine better, P theirs better, P tie) from a judgment table"""
+    rank = np.arange(len(SUCCESS_JUDGMENTS))
+    better = rank[:, None] < rank[None, :]
+    return table[better].sum(), table[better.T].sum(), np.trace(table)
+
+def _step(reiki, content, stock, table, matrix, stock_dist, spent_stock):
+    """[(probability, reiki, content, stock)] for one turn"""
+    results = []
+    if CONTENTS[content] == "item":
+        mine, theirs, tie = item_transfer(table)
+        for n, q in enumerate(matrix[content]):
+            if q == 0:
+                continue
+            for s, r in enumerate(stock_dist):
+                results.append((mine * q * r, reiki, n, s))
+            results.append((theirs * q, reiki, n, spent_stock))
+        results.append((tie, reiki, content, spent_stock))
+    else:
+        orbs = CONTENTS[content]
+        gains = [orbs_for(j, orbs) for j in SUCCESS_JUDGMENTS]
+        mine = table.sum(axis=1)
+        for n, q in enumerate(matrix[content]):
+            if q == 0:
+                continue
+            for gain, p in zip(gains, mine):
+                results.append((p * q, min(REIKI_MAX, reiki + gain), n, spent_stock))
+    return results
+
+def expected_turns(cost, save_table, item_table, start_reiki=0, start_contents=None):
+    """
+    Exact expected turns until reiki >= cost (Markov chain)
+    Saves with the free attack and uses 霊 items from the stock on the way.
+    """
+    if start_reiki >= cost:
+        return 0.0
+    matrix = content_matrix()
+    stock_dist = stock_distribution()
+    states = [(r, c, s) for r in range(cost) for c in range(len(CONTENTS)) for s in range(len(STOCKS))]
+    index = {state: i for i, state in enumerate(states)}
+    transient = np.zeros((len(states), len(states)))
+
+    for (r, c, s), i in index.items():
+        if STOCKS[s] in ITEM_REIKI:
+            reiki, table, spent = min(REIKI_MAX, r + ITEM_REIKI[STOCKS[s]]), item_table, 0
+        else:
+            reiki, table, spent = r, save_table, s
+        for p, r2, c2, s2 in _step(reiki, c, s, table, matrix, stock_dist, spent):
+            if r2 < cost and p > 0:
+                transient[i, index[(r2, c2, s2)]] += p
+
+    turns = np.linalg.solve(np.eye(len(states)) - transient, np.ones(len(states)))
+    contents = steady_contents() if start_contents is None else start_contents
+    return float(sum(contents[c] * turns[index[(start_reiki, c, 0)]] for c in range(len(CONTENTS))))
+
+def simulate_chain(cost, use_table, save_table, item_table, runs=RUNS, turns=TURNS, seed=SEED):
+    """
+    Monte Carlo turns per use when the move is used whenever affordable
+    Runs start at the opening (reiki 20, 3-6 orbs, empty stock).
+    """
+    rng = np.random.default_rng(seed)
+    matrix_cdf = np.cumsum(content_matrix(), axis=1)
+    stock_cdf = np.cumsum(stock_distribution())
+    tables = [np.cumsum(t.ravel()) for t in (use_table, save_table, item_table)]
+    gains = np.array([[orbs_for(j, n) if n != "item" else 0 for j in SUCCESS_JUDGMENTS]
+                      for n in CONTENTS])
+    rank = np.arange(len(SUCCESS_JUDGMENTS))
+    item_reiki = np.array([ITEM_REIKI.get(s, 0) for s in STOCKS])
+
+    reiki = np.full(runs, 20)
+    content = rng.choice([CONTENTS.index(n) for n in OPENING_CONTENT], size=runs)
+    stock = np.zeros(runs, dtype=np.int64)
+    uses = np.zeros(runs, dtype=np.int64)
+
+    for _ in range(turns):
+        use = reiki >= cost
+        drink = ~use & (item_reiki[stock] > 0)
+        action = np.where(use, 0, np.where(drink, 2, 1))
+        uses += use
+        reiki = np.where(use, reiki - cost, reiki)
+        reiki = np.where(drink, np.minimum(REIKI_MAX, reiki + item_reiki[stock]), reiki)
+        stock = np.where(drink, 0, stock)
+
+        draw = rng.random(runs)
+        pair = np.zeros(runs, dtype=np.int64)
+        for a, cdf in enumerate(tables):
+            chosen = action == a
+            pair[chosen] = np.minimum(np.searchsorted(cdf, draw[chosen] * cdf[-1]), len(cdf) - 1)
+        mine, theirs = np.divmod(pair, len(SUCCESS_JUDGMENTS))
+
+        is_item = content == ITEM_CONTENT
+        reiki = np.minimum(REIKI_MAX, reiki + gains[content, mine])
+        won = is_item & (rank[mine] < rank[theirs])
+        new_stock = np.minimum(np.searchsorted(stock_cdf, rng.random(runs)), len(STOCKS) - 1)
+        stock = np.where(won, new_stock, stock)
+
+        next_content = np.minimum(
+            (rng.random(runs)[:, None] > matrix_cdf[content]).sum(axis=1), len(CONTENTS) - 1)
+        stays = is_item & (rank[mine] == rank[theirs])
+        content = np.where(stays, content, next_content)
+
+    return turns / max(uses.mean(), 1e-9)
+
+def move_set_key(costs, save_table, item_table, use_tables, runs, turns):
+    """Cache key for a move set and its judgment tables"""
+    payload = {
+        "costs": costs,
+        "save": np.round(save_table, 10).tolist(),
+        "item": np.round(item_table, 10).tolist(),
+        "use": [np.round(t, 10).tolist() for t in use_tables],
+        "content": {str(k): v for k, v in CONTENT_WEIGHTS.items()},
+        "items": ITEM_WEIGHTS,
+        "runs": runs,
+        "turns": turns,
+        "seed": SEED,
+    }
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def load_cache(path=CACHE_PATH):
+    """Cached economy results by move set"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_cache(cache, path=CACHE_PATH):
+    """Write the economy cache"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1)
+
+def character_economy(roster, name, opponent=None, runs=RUNS, turns=TURNS, cache=None):
+    """
+    {"save": key, "moves": [{key, cost, from_empty, per_use}]} for a character
+    Moves are the 技/霊撃 commands that cost reiki.
+    """
+    engine = BattleEngine(roster, (name, opponent or name))
+    opponent_keys = [m["key"] for m in engine.moves[1] if is_attack(m)] or \
+        [m["key"] for m in engine.moves[1]]
+    save_key, save_table = free_attack(engine, opponent_keys)
+    item_key = next((m["key"] for m in engine.moves[0] if m["name"] == "アイテム"), save_key)
+    item_table = judgment_table(engine, item_key, opponent_keys)
+
+    priced = [m for m in roster[name]["moves"]
+              if m["cost"] > 0 and m["category"] in ("技", "霊撃")]
+    use_tables = [judgment_table(engine, m["key"], opponent_keys) if m in engine.moves[0]
+                  else item_table for m in priced]
+
+    key = move_set_key([m["cost"] for m in priced], save_table, item_table, use_tables, runs, turns)
+    if cache is not None and key in cache:
+        return cache[key]
+
+    moves = []
+    for move, use_table in zip(priced, use_tables):
+        moves.append({
+            "key": move["key"],
+            "cost": move["cost"],
+            "from_empty": round(expected_turns(move["cost"], save_table, item_table), 3),
+            "per_use": round(simulate_chain(move["cost"], use_table, save_table, item_table,
+                                            runs, turns), 3),
+        })
+    result = {"save": save_key, "moves": moves}
+    if cache is not None:
+        cache[key] = result
+    return result
+
+def main():
+    """Print turns-to-afford tables per character"""
+    parser = argparse.ArgumentParser(description="Reiki economy simulator")
+    parser.add_argument("names", nargs="*", help="characters (default: all)")
+    parser.add_argument("--opponent", help="opponent character (default: mirror match)")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Monte Carlo runs")
+    parser.add_argument("--turns", type=int, default=TURNS, help="Monte Carlo turns per run")
+    args = parser.parse_args()
+
+    roster = load_roster()
+    cache = load_cache()
+    for name in args.names or list(roster):
+        result = character_economy(roster, name, args.opponent, args.runs, args.turns, cache)
+        print(f"{name} (saving with {result['save']})")
+        print(f"  {'command':<34} {'cost':>4} {'from 0':>7} {'per use':>8}")
+        for move in result["moves"]:
+            print(f"  {move['key']:<34} {move['cost']:>4} {move['from_empty']:>7.2f} "
+                  f"{move['per_use']:>8.2f}")
+    save_cache(cache)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Compact deterministic match replays for battle_engine
+File layout (little endian):
+  header   "YYRP", version u8, stage u8, orbs u8, reserved u8, seed u32,
+           then each character name as u8 length + UTF-8 bytes (1P, 2P)
+  records  16 bytes per turn until end of file:
+           1P input (6), 2P input (6), state hash u32 after the turn
+  input    flags u8      bit0 isCharging, bit1 command, bit2 useItem,
+                         bits4-6 charge direction (0 none, 1-4 → ← ↑ ↓)
+           command u8    low nibble direction (0-3 → ← ↑ ↓), high nibble
+                         button (0-3 A B X Y)
+           chargeFrames u16, command timestamp u16
+The inputs mirror PlayerTurnInput (src/types/PlayerInput.ts). Chance
+outcomes are drawn from the seed with the 16-bit LCG of the judgment
+simulators, so a replay re-executes exactly and every turn's state hash can
+be checked.
+
+    python replay.py record match.yyr 幽助 飛影 --turns 200 --seed 7
+    python replay.py show match.yyr
+    python replay.py verify replays/ --workers 4
+"""
+
+import argparse
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from battle_engine import BattleEngine, State, describe, initial_state, winner
+from damage_table import TOUKI_MAX
+from frame_timeline import STAGES, TOUKI_MAX_FRAMES
+from roster import load_roster, process_roster
+
+MAGIC = b"YYRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBI")
+
+DIRECTIONS = ["→", "←", "↑", "↓"]
+BUTTONS = ["A", "B", "X", "Y"]
+
+# Charge direction -> TOUKI_MAX_FRAMES class
+CHARGE_DIRECTIONS = {"→": "パンチ", "←": "防御", "↑": "技", "↓": "霊撃"}
+
+INPUT_DTYPE = np.dtype([
+    ("flags", "u1"),
+    ("command", "u1"),
+    ("charge_frames", "<u2"),
+    ("timestamp", "<u2"),
+])
+RECORD_DTYPE = np.dtype([("p1", INPUT_DTYPE), ("p2", INPUT_DTYPE), ("hash", "<u4")])
+
+CHUNK_TURNS = 4096
+NO_TIMESTAMP = 0xFFFF
+
+# Item stock values as stored in the state hash
+STOCK_CODES = {None: 0, "霊小": 1, "霊大": 2, "気小": 3, "気大": 4, "愛小": 5, "愛大": 6}
+
+class ReplayError(Exception):
+    """Malformed replay file"""
+
+def encode_input(turn_input):
+    """PlayerTurnInput dict -> INPUT_DTYPE tuple"""
+    charge = turn_input.get("toukiCharge") or {}
+    command = turn_input.get("command")
+    flags = 0
+    if charge.get("isCharging"):
+        flags |= 1
+    if command:
+        flags |= 2
+    if turn_input.get("useItem"):
+        flags |= 4
+    if charge.get("direction"):
+        flags |= (DIRECTIONS.index(charge["direction"]) + 1) << 4
+    code, timestamp = 0, NO_TIMESTAMP
+    if command:
+        code = DIRECTIONS.index(command["direction"]) | BUTTONS.index(command["button"]) << 4
+        timestamp = command["timestamp"]
+    return (flags, code, charge.get("chargeFrames", 0), timestamp)
+
+def decode_input(record):
+    """INPUT_DTYPE record -> PlayerTurnInput dict"""
+    flags, code = int(record["flags"]), int(record["command"])
+    direction = (flags >> 4) & 7
+    if direction > len(DIRECTIONS):
+        raise ReplayError(f"bad charge direction {direction}")
+    command = None
+    if flags & 2:
+        if (code & 0x0F) >= len(DIRECTIONS) or (code >> 4) >= len(BUTTONS):
+            raise ReplayError(f"bad command code {code:#04x}")
+        command = {
+            "direction": DIRECTIONS[code & 0x0F],
+            "button": BUTTONS[code >> 4],
+            "timestamp": int(record["timestamp"]),
+        }
+    return {
+        "toukiCharge": {
+            "isCharging": bool(flags & 1),
+            "direction": DIRECTIONS[direction - 1] if direction else None,
+            "chargeFrames": int(record["charge_frames"]),
+        },
+        "command": command,
+        "useItem": bool(flags & 4),
+    }
+
+def state_hash(state):
+    """CRC32 of the packed state"""
+    packed = bytearray()
+    for side in state.sides:
+        packed += struct.pack("<iBHBBB", side.hp, side.touki, side.balance, side.reiki,
+                              STOCK_CODES.get(side.item, 7), side.air)
+    packed.append(state.first)
+    return zlib.crc32(bytes(packed))
+
+class Replayer:
+    """Deterministic turn executor for one match"""
+
+    def __init__(self, roster, names, seed=0, orbs=None, touki=0):
+        self.engine = BattleEngine(roster, names) if orbs is None else BattleEngine(roster, names, orbs)
+        self.state = initial_state(touki)
+        self.z = seed & 0xFFFF
+        self.turn = 0
+
+    def draw(self):
+        """Uniform [0, 1) from two steps of z = (5z + 1) mod 65536"""
+        value = 0
+        for _ in range(2):
+            self.z = (self.z * 5 + 1) & 0xFFFF
+            value = value << 16 | self.z
+        return value / 2 ** 32
+
+    def command_key(self, side, turn_input):
+        """Engine command key for an input (無行動 when unavailable)"""
+        engine, state = self.engine, self.state
+        available = engine.actions(state, side)
+        command = turn_input["command"]
+        for move in engine.moves[side]:
+            if move["key"] not in available:
+                continue
+            if command and move["command"] == command["direction"] + command["button"]:
+                return move["key"]
+            if not command and turn_input["useItem"] and move["name"] == "アイテム":
+                return move["key"]
+        return next(m["key"] for m in engine.moves[side] if m["kind"] == "無行動")
+
+    def step(self, inputs):
+        """Execute one turn from (1P, 2P) PlayerTurnInput dicts; returns the new state"""
+        sides = list(self.state.sides)
+        for s, turn_input in enumerate(inputs):
+            charge = turn_input["toukiCharge"]
+            if charge["isCharging"] and charge["direction"]:
+                frames = TOUKI_MAX_FRAMES[CHARGE_DIRECTIONS[charge["direction"]]][0]
+                touki = min(TOUKI_MAX, charge["chargeFrames"] * TOUKI_MAX // frames)
+                sides[s] = sides[s]._replace(touki=touki)
+
+        times = [(i["command"] or {}).get("timestamp", NO_TIMESTAMP) for i in inputs]
+        first = 0 if times[0] <= times[1] else 1
+        self.state = State(tuple(sides), first)
+
+        keys = tuple(self.command_key(s, inputs[s]) for s in (0, 1))
+        self.state = self.engine.sample(self.state, keys, self.draw())
+        self.turn += 1
+        return self.state
+
+def write_header(f, names, seed=0, stage="森", orbs=4):
+    """Write a replay header"""
+    f.write(HEADER.pack(MAGIC, VERSION, STAGES.index(stage), orbs, 0, seed))
+    for name in names:
+        encoded = name.encode("utf-8")
+        f.write(struct.pack("<B", len(encoded)) + encoded)
+
+def read_header(f):
+    """{"names", "seed", "stage", "orbs"} from an open replay"""
+    raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ReplayError("truncated header")
+    magic, version, stage, orbs, _, seed = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ReplayError(f"bad magic {magic!r}")
+    if version != VERSION:
+        raise ReplayError(f"unsupported version {version}")
+    names = []
+    for _ in range(2):
+        length = f.read(1)
+        if not length:
+            raise ReplayError("truncated header")
+        names.append(f.read(length[0]).decode("utf-8"))
+    return {"names": names, "seed": seed, "stage": STAGES[stage], "orbs": orbs}
+
+def iter_records(f, chunk_turns=CHUNK_TURNS):
+    """Yield RECORD_DTYPE arrays of up to chunk_turns turns"""
+    while True:
+        raw = f.read(chunk_turns * RECORD_DTYPE.itemsize)
+        if not raw:
+            return
+        if len(raw) % RECORD_DTYPE.itemsize:
+            raise ReplayError("truncated turn record")
+        yield np.frombuffer(raw, dtype=RECORD_DTYPE)
+
+def record_match(roster, names, path, turns=200, seed=0, stage="森", orbs=4):
+    """
+    Play a seeded random match and write it as a replay
+    Inputs are random available commands with random timing and charge.
+    Returns the number of turns written (the match stops at a KO).
+    """
+    rng = np.random.default_rng(seed)
+    replayer = Replayer(roster, names, seed, orbs)
+    records = np.zeros(turns, dtype=RECORD_DTYPE)
+    written = 0
+    for turn in range(turns):
+        inputs = []
+        for side in (0, 1):
+            moves = [replayer.engine.move(side, key)
+                     for key in replayer.engine.actions(replayer.state, side)]
+            move = moves[rng.integers(len(moves))]
+            command = None
+            if len(move["command"]) == 2 and move["command"][0] in DIRECTIONS \
+                    and move["command"][1] in BUTTONS:
+                command = {"direction": move["command"][0], "button": move["command"][1],
+                           "timestamp": int(rng.integers(0, 180))}
+            charging = bool(rng.random() < 0.8)
+            inputs.append({
+                "toukiCharge": {
+                    "isCharging": charging,
+                    "direction": DIRECTIONS[rng.integers(4)] if charging else None,
+                    "chargeFrames": int(rng.integers(0, 200)) if charging else 0,
+                },
+                "command": command,
+                "useItem": move["name"] == "アイテム",
+            })
+        state = replayer.step(inputs)
+        records[turn] = (encode_input(inputs[0]), encode_input(inputs[1]), state_hash(state))
+        written += 1
+        if winner(state) is not None:
+            break
+
+    with open(path, "wb") as f:
+        write_header(f, names, seed, stage, orbs)
+        f.write(records[:written].tobytes())
+    return written
+
+def verify_replay(path, roster=None):
+    """
+    Re-execute a replay and check every turn's state hash
+    Returns {"path", "turns", "ok", "first_mismatch", "error"}.
+    """
+    roster = roster or process_roster()
+    result = {"path": str(path), "turns": 0, "ok": True, "first_mismatch": None, "error": None}
+    try:
+        with open(path, "rb") as f:
+            header = read_header(f)
+            replayer = Replayer(roster, header["names"], header["seed"], header["orbs"])
+            for chunk in iter_records(f):
+                for record in chunk:
+                    state = replayer.step((decode_input(record["p1"]), decode_input(record["p2"])))
+                    result["turns"] += 1
+                    if state_hash(state) != int(record["hash"]):
+                        result["ok"] = False
+                        result["first_mismatch"] = result["turns"]
+                        return result
+    except (ReplayError, KeyError, UnicodeDecodeError) as e:
+        result["ok"] = False
+        result["error"] = str(e)
+    return result
+
+def replay_paths(targets):
+    """Replay files from file and directory arguments"""
+    paths = []
+    for target in targets:
+        target = Path(target)
+        paths.extend(sorted(target.rglob("*.yyr")) if target.is_dir() else [target])
+    return paths
+
+def verify_archive(paths, workers=None):
+    """Verify many replays in a process pool; yields results in order"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(verify_replay, paths, chunksize=8)
+
+def main():
+    """Record, show or verify replays"""
+    parser = argparse.ArgumentParser(description="Match replays")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    rec = sub.add_parser("record", help="record a seeded random match")
+    rec.add_argument("path")
+    rec.add_argument("first")
+    rec.add_argument("second")
+    rec.add_argument("--turns", type=int, default=200)
+    rec.add_argument("--seed", type=int, default=0)
+    rec.add_argument("--stage", default="森", choices=STAGES)
+
+    show = sub.add_parser("show", help="print a replay turn by turn")
+    show.add_argument("path")
+
+    ver = sub.add_parser("verify", help="re-execute replays and check state hashes")
+    ver.add_argument("targets", nargs="+", help="replay files or directories")
+    ver.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.action == "record":
+        turns = record_match(load_roster(), (args.first, args.second), args.path,
+                             args.turns, args.seed, args.stage)
+        print(f"Wrote {turns} turns to {args.path}")
+        return 0
+
+    if args.action == "show":
+        roster = load_roster()
+        with open(args.path, "rb") as f:
+            header = read_header(f)
+            print(f"{header['names'][0]} vs {header['names'][1]}, stage {header['stage']}, "
+                  f"seed {header['seed']}")
+            replayer = Replayer(roster, header["names"], header["seed"], header["orbs"])
+            for chunk in iter_records(f):
+                for record in chunk:
+                    inputs = (decode_input(record["p1"]), decode_input(record["p2"]))
+                    keys = [replayer.command_key(s, inputs[s]) for s in (0, 1)]
+                    state = replayer.step(inputs)
+                    mark = "" if state_hash(state) == int(record["hash"]) else "  MISMATCH"
+                    print(f"{replayer.turn:4d} {keys[0]} / {keys[1]}{mark}")
+                    print(f"     {describe(state, header['names'])}")
+        return 0
+
+    paths = replay_paths(args.targets)
+    start = time.time()
+    turns = failed = 0
+    for result in verify_archive(paths, args.workers):
+        turns += result["turns"]
+        if not result["ok"]:
+            failed += 1
+            where = result["error"] or f"turn {result['first_mismatch']}"
+            print(f"FAIL {result['path']}: {where}")
+    elapsed = time.time() - start
+    print(f"{len(paths)} replays, {turns} turns, {failed} failed in {elapsed:.1f}s "
+          f"({turns / max(elapsed, 1e-9):.0f} turns/s)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
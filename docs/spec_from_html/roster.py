@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Numeric roster built from the character pages (024, 030-048)
+Turns spec_tables output into per-character stat blocks with integer rates
+(成功/回避/威力/奪バ) and x/256 defense bytes, for the analysis scripts.
+"""
+
+import re
+from pathlib import Path
+
+from spec_tables import load_directory
+
+SCRIPT_DIR = Path(__file__).parent
+MD_DIR = SCRIPT_DIR / "yuyuz_md"
+
+# 種類 values that count as attacks (飛び(霊), 飛び(蝕み), ... match by prefix)
+ATTACK_KINDS = ("パンチ", "飛び", "伸び", "接触", "地上", "衝撃波")
+
+# Basic stat labels per game mode
+STAT_LABELS = {
+    "normal": {
+        "defense": "防御力/威力倍率",
+        "defense_up": "防御力/防御力UP威力倍率",
+        "balance_defense": "バランス防御力/奪バランス値倍率",
+        "powered_punch": "気合いの入ったパンチ発生率/発生率",
+        "clean_hit": "クリーンヒット発生率/発生率",
+    },
+    "round_robin": {
+        "defense": "防御力(総当たり戦)/威力倍率",
+        "defense_up": "防御力(総当たり戦)/防御力UP威力倍率",
+        "balance_defense": "バランス防御力/奪バランス値倍率",
+        "powered_punch": "気合いの入ったパンチ発生率(総当たり戦)/発生率",
+        "clean_hit": "クリーンヒット発生率(総当たり戦)/発生率",
+    },
+}
+
+def parse_int(text):
+    """Leading integer of a cell ('050', '58/256(22.7%)', '187F'); 0 if none"""
+    match = re.match(r'^\s*(\d+)', text or "")
+    return int(match.group(1)) if match else 0
+
+def is_attack(move):
+    """True for moves the judgment treats as attacks"""
+    return move["kind"].startswith(ATTACK_KINDS)
+
+def fighter_moves(rows):
+    """Integer move records from 戦闘コマンド rows"""
+    moves = []
+    for row in rows:
+        moves.append({
+            "key": row["key"],
+            "category": row["category"],
+            "command": row["key"].split("/")[1],
+            "name": row["name"],
+            "kind": row["種類"],
+            "cost": parse_int(row["消費"]),
+            "success": parse_int(row["成功"]),
+            "evasion": parse_int(row["回避"]),
+            "power": parse_int(row["威力"]),
+            "drain": parse_int(row["奪バ"]),
+        })
+    return moves
+
+def build_fighter(tables, form=None, mode="normal"):
+    """Stat block for one form of a character page"""
+    name = tables["name"]
+    form = form or name
+    basic = tables["basic"].get(form) or next(iter(tables["basic"].values()), {})
+    labels = STAT_LABELS[mode]
+    # Forms without their own round-robin defense fall back to the normal value
+    defense = basic.get(labels["defense"]) or basic.get(STAT_LABELS["normal"]["defense"])
+    return {
+        "name": form,
+        "page": name,
+        "page_id": tables["page_id"],
+        "defense": parse_int(defense),
+        "balance_defense": parse_int(basic.get(labels["balance_defense"])),
+        "moves": fighter_moves(tables["commands"].get(form, [])),
+    }
+
+def load_roster(directory=MD_DIR, forms=False, mode="normal", snapshot=None):
+    """
+    {name: fighter} for every character page
+    With forms=True each 戦闘コマンド form (蔵馬2, 妖狐, 80%, ...) is its own entry.
+    """
+    snapshot = snapshot or load_directory(directory)
+    roster = {}
+    for tables in snapshot["characters"].values():
+        names = list(tables["commands"]) if forms else [tables["name"]]
+        for form in names:
+            if form in tables["commands"]:
+                roster[form] = build_fighter(tables, form, mode)
+    return roster
+
+_process_roster = None
+
+def process_roster():
+    """load_roster() once per process (for pool workers)"""
+    global _process_roster
+    if _process_roster is None:
+        _process_roster = load_roster()
+    return _process_roster
@@ -1,25 +1,33 @@
 #!/usr/bin/env python3
 """
 Bulk export script for sfcyuhakutokubetsu atwiki to Markdown with image support
-Fetches all pages from /list and converts them to Markdown
+Fetches all pages from /list and converts them to Markdown (plus pages link_crawler.py found through links)
 Downloads and saves images locally
+Fetching and image downloads run on one I/O thread; conversion runs in a process pool
 """
 
 import re
 import requests
 from bs4 import BeautifulSoup
-from markdownify import markdownify as md
 from pathlib import Path
 import time
 import sys
 from datetime import datetime
 import os
 from urllib.parse import urljoin, urlparse
+from export_metrics import RunMetrics, track
+from export_pipeline import new_worker_metrics, run_pipeline
+from atwiki_tables import convert_html
+from link_crawler import crawled_pages
 
 BASE = "https://w.atwiki.jp/sfcyuhakutokubetsu"
 LIST_URL = f"{BASE}/list"
 OUTPUT_DIR = Path("sfc_yuhaku_md")
 IMAGES_DIR = OUTPUT_DIR / "images"
+METRICS_PATH = Path("sfc_yuhaku_export_metrics.json")
+# "auto": tables with rowspan/colspan stay as clean HTML, simple ones become GFM
+# "gfm": every table becomes a pipe table with spans expanded
+TABLE_STYLE = "auto"
 
 def fetch_page_list():
     """Fetch the list of all wiki pages"""
@@ -56,7 +64,7 @@ def extract_page_info(html_content):
 
     return pages
 
-def fetch_single_page(page_id):
+def fetch_single_page(page_id, metrics=None):
     """Fetch a single page from atwiki"""
     url = f"{BASE}/pages/{page_id}.html"
 
@@ -67,20 +75,31 @@ def fetch_single_page(page_id):
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, timeout=20, headers=headers)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding
-            return response.text
+            with track(metrics, "fetch"):
+                response = requests.get(url, timeout=20, headers=headers)
+                response.raise_for_status()
+            if metrics:
+                metrics.bytes_in += len(response.content)
+            with track(metrics, "decode"):
+                response.encoding = response.apparent_encoding
+                return response.text
         except requests.RequestException as e:
             if attempt < max_retries - 1:
+                if metrics:
+                    metrics.retries += 1
                 print(f"  Retry {attempt + 1}/{max_retries} for page {page_id}")
                 time.sleep(2)
             else:
                 print(f"  Failed to fetch page {page_id}: {e}")
                 return None
 
-def download_image(img_url, page_id):
+def download_image(img_url, page_id, metrics=None):
     """Download an image and save it locally"""
+    with track(metrics, "image"):
+        return _download_image(img_url, page_id, metrics)
+
+def _download_image(img_url, page_id, metrics):
+    """Fetch one image and write it under IMAGES_DIR"""
     try:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -89,6 +108,9 @@ def download_image(img_url, page_id):
 
         response = requests.get(img_url, timeout=20, headers=headers)
         response.raise_for_status()
+        if metrics:
+            metrics.bytes_in += len(response.content)
+            metrics.images += 1
 
         # Extract filename from URL
         url_path = urlparse(img_url).path
@@ -118,7 +140,7 @@ def download_image(img_url, page_id):
         print(f"    Failed to download image {img_url}: {e}")
         return None
 
-def process_images(soup, page_id):
+def process_images(soup, page_id, metrics=None):
     """Find and download images, update their src to local paths"""
     images_found = []
 
@@ -145,7 +167,7 @@ def process_images(soup, page_id):
 
         # Check if this is a content image (from atwiki)
         if "atwiki" in img_url and ("attach" in img_url or "img.atwiki.jp" in img_url):
-            local_filename = download_image(img_url, page_id)
+            local_filename = download_image(img_url, page_id, metrics)
             if local_filename:
                 # Update the img src to local path
                 img["src"] = f"images/{local_filename}"
@@ -153,13 +175,27 @@ def process_images(soup, page_id):
 
     return images_found
 
-def clean_html(html_content, page_id):
+def clean_html(html_content, page_id, metrics=None):
     """Clean HTML by removing navigation, ads, and other non-content elements"""
-    soup = BeautifulSoup(html_content, "html.parser")
+    with track(metrics, "parse"):
+        soup = BeautifulSoup(html_content, "html.parser")
+
+    with track(metrics, "clean"):
+        content = _strip_non_content(soup)
+    if content is None:
+        return None, []
+
+    # Process images before converting to markdown
+    images_found = process_images(content, page_id, metrics)
+
+    return content, images_found
+
+def _strip_non_content(soup):
+    """Remove non-content elements and return the main content area"""
 
     # Check if page exists
     if "指定されたページ番号は存在しません" in str(soup):
-        return None, []
+        return None
 
     # Remove navigation and non-content elements
     selectors_to_remove = [
@@ -206,10 +242,7 @@ def clean_html(html_content, page_id):
         if not content:
             content = soup
 
-    # Process images before converting to markdown
-    images_found = process_images(content, page_id)
-
-    return content, images_found
+    return content
 
 def absolutize_urls(soup, base_url="https://w.atwiki.jp"):
     """Convert relative URLs to absolute URLs"""
@@ -224,9 +257,10 @@ def absolutize_urls(soup, base_url="https://w.atwiki.jp"):
     return soup
 
 def convert_to_markdown(soup):
-    """Convert cleaned HTML to Markdown"""
-    markdown_text = md(
-        str(soup),
+    """Convert cleaned HTML to Markdown (tables via the span-aware renderer)"""
+    markdown_text = convert_html(
+        soup,
+        table_style=TABLE_STYLE,
         heading_style="ATX",
         bullets="*",
         code_language="",
@@ -238,69 +272,140 @@ def convert_to_markdown(soup):
 
     return markdown_text
 
-def save_markdown(content, page_id, title, images_found):
-    """Save markdown content to file"""
-    # Sanitize title for filename
+def markdown_path(page_id, title):
+    """Output path for a page"""
     safe_title = re.sub(r'[<>:"/\\|?*]', '', title)
     safe_title = safe_title.strip()[:50]
-    filename = f"{page_id:03d}-{safe_title}.md"
+    return OUTPUT_DIR / f"{page_id:03d}-{safe_title}.md"
 
-    filepath = OUTPUT_DIR / filename
+def save_markdown(content, page_id, title, images_found, metrics=None):
+    """Save markdown content to file"""
+    filepath = markdown_path(page_id, title)
 
     # Write content
-    with open(filepath, "w", encoding="utf-8") as f:
-        # Add front matter
-        f.write("---\n")
-        f.write(f'source: "{BASE}/pages/{page_id}.html"\n')
-        f.write(f'id: {page_id}\n')
-        f.write(f'title: "{title}"\n')
-        f.write(f'fetched_at: "{datetime.now().isoformat()}"\n')
-        if images_found:
-            f.write('images:\n')
-            for original_url, local_file in images_found:
-                f.write(f'  - original: "{original_url}"\n')
-                f.write(f'    local: "images/{local_file}"\n')
-        f.write("---\n\n")
-        f.write(content)
+    with track(metrics, "write"):
+        with open(filepath, "w", encoding="utf-8") as f:
+            # Add front matter
+            f.write("---\n")
+            f.write(f'source: "{BASE}/pages/{page_id}.html"\n')
+            f.write(f'id: {page_id}\n')
+            f.write(f'title: "{title}"\n')
+            f.write(f'fetched_at: "{datetime.now().isoformat()}"\n')
+            if images_found:
+                f.write('images:\n')
+                for original_url, local_file in images_found:
+                    f.write(f'  - original: "{original_url}"\n')
+                    f.write(f'    local: "images/{local_file}"\n')
+            f.write("---\n\n")
+            f.write(content)
+            if metrics:
+                metrics.bytes_out += f.tell()
 
     return filepath
 
-def convert_page(page_id, title):
+def convert_page(page_id, title, metrics=None):
     """Convert a single page to Markdown"""
     print(f"Converting page {page_id}: {title}")
+    page_metrics = metrics.page(page_id, title) if metrics else None
 
     # Check if already exists
-    safe_title = re.sub(r'[<>:"/\\|?*]', '', title)
-    safe_title = safe_title.strip()[:50]
-    filename = f"{page_id:03d}-{safe_title}.md"
-    filepath = OUTPUT_DIR / filename
+    filepath = markdown_path(page_id, title)
+    filename = filepath.name
 
     if filepath.exists():
         print(f"  Skipping (already exists): {filename}")
+        if page_metrics:
+            page_metrics.cache_hit = True
+            page_metrics.status = "cached"
         return True
 
     # Fetch the page
-    html_content = fetch_single_page(page_id)
+    html_content = fetch_single_page(page_id, page_metrics)
     if not html_content:
         print(f"  Failed to fetch page")
+        if page_metrics:
+            page_metrics.status = "fetch_failed"
         return False
 
     # Clean the HTML and download images
-    cleaned_soup, images_found = clean_html(html_content, page_id)
+    cleaned_soup, images_found = clean_html(html_content, page_id, page_metrics)
     if not cleaned_soup:
         print(f"  Page is deleted or doesn't exist")
+        if page_metrics:
+            page_metrics.status = "missing"
         return False
 
     # Absolutize URLs (except images which are now local)
-    cleaned_soup = absolutize_urls(cleaned_soup)
+    with track(page_metrics, "clean"):
+        cleaned_soup = absolutize_urls(cleaned_soup)
 
     # Convert to Markdown
-    markdown_content = convert_to_markdown(cleaned_soup)
+    with track(page_metrics, "convert"):
+        markdown_content = convert_to_markdown(cleaned_soup)
 
     # Save the result
-    filepath = save_markdown(markdown_content, page_id, title, images_found)
+    filepath = save_markdown(markdown_content, page_id, title, images_found, page_metrics)
     print(f"  Saved: {filepath.name}")
+    if page_metrics:
+        page_metrics.status = "ok"
+
+    return True
+
+def fetch_stage(page_id, title, metrics=None):
+    """
+    I/O stage: fetch the page and download its images
+    Returns (cleaned_html, images_found), True if already converted, or None
+    """
+    print(f"Fetching page {page_id}: {title}")
+
+    filepath = markdown_path(page_id, title)
+    if filepath.exists():
+        print(f"  Skipping (already exists): {filepath.name}")
+        if metrics:
+            metrics.cache_hit = True
+            metrics.status = "cached"
+        return True
+
+    html_content = fetch_single_page(page_id, metrics)
+    if not html_content:
+        print(f"  Failed to fetch page {page_id}")
+        if metrics:
+            metrics.status = "fetch_failed"
+        return None
+
+    # Image downloads rewrite <img src>, so cleaning stays with the I/O stage here
+    cleaned_soup, images_found = clean_html(html_content, page_id, metrics)
+    if not cleaned_soup:
+        print(f"  Page {page_id} is deleted or doesn't exist")
+        if metrics:
+            metrics.status = "missing"
+        return None
+
+    return str(cleaned_soup), images_found
+
+def render_stage(page_id, title, payload):
+    """CPU stage (worker process): convert cleaned HTML to Markdown"""
+    cleaned_html, images_found = payload
+    metrics = new_worker_metrics(page_id, title)
+
+    with track(metrics, "parse"):
+        cleaned_soup = BeautifulSoup(cleaned_html, "html.parser")
 
+    with track(metrics, "clean"):
+        cleaned_soup = absolutize_urls(cleaned_soup)
+
+    with track(metrics, "convert"):
+        markdown_content = convert_to_markdown(cleaned_soup)
+
+    return (markdown_content, images_found), metrics
+
+def write_stage(page_id, title, result, metrics=None):
+    """Write stage (main process): save converted Markdown"""
+    markdown_content, images_found = result
+    filepath = save_markdown(markdown_content, page_id, title, images_found, metrics)
+    print(f"  Saved: {filepath.name}")
+    if metrics:
+        metrics.status = "ok"
     return True
 
 def main():
@@ -328,6 +433,13 @@ def main():
         print("No pages found")
         return 1
 
+    # Pages only reachable through links (from link_crawler.py, if it has run)
+    crawled = crawled_pages("sfcyuhakutokubetsu")
+    for page_id, title in crawled.items():
+        pages.setdefault(page_id, title)
+    if crawled:
+        print(f"Merged crawl results: {len(crawled)} pages known from links")
+
     print(f"\nFound {len(pages)} pages to convert")
 
     # Ask for confirmation
@@ -340,23 +452,12 @@ def main():
     print("\nStarting conversion...")
     print("=" * 60)
 
-    success_count = 0
-    failed_pages = []
-
-    for page_id in sorted(pages.keys()):
-        title = pages[page_id]
+    metrics = RunMetrics("sfcyuhakutokubetsu")
 
-        try:
-            if convert_page(page_id, title):
-                success_count += 1
-            else:
-                failed_pages.append((page_id, title))
-        except Exception as e:
-            print(f"  Error converting page {page_id}: {e}")
-            failed_pages.append((page_id, title))
-
-        # Rate limiting
-        time.sleep(0.7)
+    # Fetch on one thread (rate limited), convert across all cores
+    success_count, failed_pages = run_pipeline(
+        pages, fetch_stage, render_stage, write_stage, metrics, delay=0.7
+    )
 
     # Summary
     print("\n" + "=" * 60)
@@ -371,6 +472,12 @@ def main():
 
     print(f"\nOutput saved to: {OUTPUT_DIR.absolute()}")
 
+    # Metrics
+    metrics.finish()
+    metrics.print_summary()
+    metrics.write_report(METRICS_PATH)
+    print(f"\nMetrics report: {METRICS_PATH.absolute()}")
+
     return 0
 
 if __name__ == "__main__":
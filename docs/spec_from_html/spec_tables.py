@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Structured readers for the spec tables embedded in yuyuz_md
+- Page 57 (モーションフレーム): one frame table per character
+- Character pages (024, 030-048): 基本性能 and 戦闘コマンド tables, one per form
+Tables are expanded with atwiki_tables so rowspan/colspan cells are filled in.
+"""
+
+import re
+from pathlib import Path
+from bs4 import BeautifulSoup
+from atwiki_tables import expand_table, is_carried_row
+
+# Column names for page 57 frame rows (after category/button/state)
+FRAME_COLUMNS = [
+    "森", "暗", "断", "時", "準備F", "発動F",
+    "森+準備F", "準備F+発動F", "森+準備F+発動F",
+]
+
+# Column names for 戦闘コマンド rows
+COMMAND_COLUMNS = ["消費", "種類", "効果", "成功", "回避", "威力", "奪バ"]
+
+# Character page ids in roster order
+CHARACTER_PAGES = [24] + list(range(30, 49))
+
+FRAME_PAGE = "057-モーションフレーム.md"
+
+def split_front_matter(text):
+    """Split '---' front matter from the body; returns (fields, body)"""
+    if not text.startswith("---"):
+        return {}, text
+    parts = text.split("---", 2)
+    if len(parts) < 3:
+        return {}, text
+
+    fields = {}
+    for line in parts[1].splitlines():
+        match = re.match(r'^([A-Za-z_]+):\s*(.*)$', line)
+        if match:
+            value = match.group(2).strip()
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            elif value.isdigit():
+                value = int(value)
+            fields[match.group(1)] = value
+    return fields, parts[2]
+
+def markdown_sections(body):
+    """Split Markdown into (level, heading, content) at every ATX heading"""
+    sections = []
+    level, heading, lines = 0, "", []
+    for line in body.splitlines(keepends=True):
+        match = re.match(r'^(#{1,6})\s+(.*?)\s*$', line)
+        if match:
+            sections.append((level, heading, "".join(lines)))
+            level, heading, lines = len(match.group(1)), match.group(2), []
+        else:
+            lines.append(line)
+    sections.append((level, heading, "".join(lines)))
+    return sections
+
+def _tables(content):
+    """Expanded (grid, origin) for each top-level HTML table in a chunk of Markdown"""
+    if "<table" not in content:
+        return []
+    soup = BeautifulSoup(content, "html.parser")
+    return [expand_table(t) for t in soup.find_all("table") if t.find_parent("table") is None]
+
+def _flat(text):
+    """Join the one-character-per-line labels atwiki uses (パ<br>ン<br>チ)"""
+    return text.replace("\n", "")
+
+def _unique_key(seen, key):
+    """Disambiguate duplicate row keys within one table"""
+    count = seen.get(key, 0) + 1
+    seen[key] = count
+    return key if count == 1 else f"{key}#{count}"
+
+def frame_rows(grid, origin):
+    """Rows of one page 57 frame table as dicts"""
+    rows = []
+    seen = {}
+    # Two header rows: labels, then 森/暗/断/時
+    for r in range(2, len(grid)):
+        if is_carried_row(origin[r], r):
+            continue
+        cells = grid[r]
+        if len(cells) < 3 + len(FRAME_COLUMNS):
+            continue
+        category, button, state = _flat(cells[0]), cells[1] or "-", cells[2] or "-"
+        row = {
+            "key": _unique_key(seen, f"{category}/{button}/{state}"),
+            "category": category,
+            "button": button,
+            "state": state,
+        }
+        for name, value in zip(FRAME_COLUMNS, cells[3:3 + len(FRAME_COLUMNS)]):
+            row[name] = value
+        rows.append(row)
+    return rows
+
+def frame_tables(text, cache=None):
+    """
+    {character: [frame row dicts]} for page 57
+    cache ({heading: (content, rows)}, updated in place) skips re-parsing
+    sections whose text is unchanged.
+    """
+    _, body = split_front_matter(text)
+    result = {}
+    for level, heading, content in markdown_sections(body):
+        if level != 2:
+            continue
+        if cache is not None and heading in cache and cache[heading][0] == content:
+            result[heading] = cache[heading][1]
+            continue
+        tables = _tables(content)
+        if tables:
+            result[heading] = frame_rows(*tables[0])
+            if cache is not None:
+                cache[heading] = (content, result[heading])
+    return result
+
+def command_rows(grid, origin):
+    """Rows of one 戦闘コマンド table as dicts"""
+    rows = []
+    seen = {}
+    # Locate columns from the header row; some pages give 名称 colspan=2
+    header = grid[0] if grid else []
+    if all(column in header for column in COMMAND_COLUMNS):
+        positions = [header.index(column) for column in COMMAND_COLUMNS]
+        name_col = header.index("名称") if "名称" in header else 3
+    else:
+        positions = list(range(4, 4 + len(COMMAND_COLUMNS)))
+        name_col = 3
+
+    for r in range(1, len(grid)):
+        if is_carried_row(origin[r], r):
+            continue
+        cells = grid[r]
+        if len(cells) <= max(positions):
+            continue
+        category = _flat(cells[0])
+        direction, button, name = cells[1], cells[2], _flat(cells[name_col])
+        command = direction if direction == button else f"{direction}{button}"
+        row = {
+            "key": _unique_key(seen, f"{category}/{command}/{name}"),
+            "category": category,
+            "direction": direction,
+            "button": button,
+            "name": name,
+        }
+        for column, position in zip(COMMAND_COLUMNS, positions):
+            row[column] = cells[position].replace("\n", " ")
+        rows.append(row)
+    return rows
+
+def basic_stats(grid):
+    """{form_or_None: {"label/sublabel": value}} for a 基本性能 table"""
+    if not grid:
+        return {}
+    # Multi-form pages put form names across the first row
+    forms = [None]
+    start = 0
+    if not grid[0][0] and not grid[0][1]:
+        forms = [name or None for name in grid[0][2:]]
+        start = 1
+
+    result = {form: {} for form in forms}
+    for cells in grid[start:]:
+        label = f"{cells[0]}/{cells[1]}"
+        for form, value in zip(forms, cells[2:]):
+            result[form][label] = value
+    return result
+
+def character_tables(text):
+    """
+    Structured tables for a character page
+    Returns {"name", "page_id", "basic": {form: {...}}, "commands": {form: [rows]}}
+    """
+    fields, body = split_front_matter(text)
+    name = fields.get("title", "")
+    result = {"name": name, "page_id": fields.get("id"), "basic": {}, "commands": {}}
+
+    current_h2 = ""
+    for level, heading, content in markdown_sections(body):
+        if level == 2:
+            current_h2 = heading
+        tables = _tables(content)
+        if not tables:
+            continue
+
+        if current_h2 == "基本性能":
+            stats = basic_stats(tables[0][0])
+            for form, values in stats.items():
+                result["basic"][form or name] = values
+        elif current_h2 == "戦闘コマンド":
+            form = heading if level > 2 else name
+            result["commands"][form] = command_rows(*tables[0])
+    return result
+
+def find_page(directory, page_id):
+    """Path of the Markdown file for a page id, or None"""
+    matches = sorted(Path(directory).glob(f"{page_id:03d}-*.md"))
+    return matches[0] if matches else None
+
+def load_snapshot(read_file, names):
+    """
+    Structured tables for a snapshot
+    read_file(name) returns the file text or None; names lists the .md files
+    Returns {"frames": {character: rows}, "characters": {name: character_tables}}
+    """
+    snapshot = {"frames": {}, "characters": {}}
+    for name in names:
+        match = re.match(r'^(\d{3})-', name)
+        if not match:
+            continue
+        page_id = int(match.group(1))
+        if name != FRAME_PAGE and page_id not in CHARACTER_PAGES:
+            continue
+        text = read_file(name)
+        if text is None:
+            continue
+        if name == FRAME_PAGE:
+            snapshot["frames"] = frame_tables(text)
+        else:
+            tables = character_tables(text)
+            snapshot["characters"][tables["name"] or name] = tables
+    return snapshot
+
+def load_directory(directory):
+    """Structured tables for a directory of exported pages"""
+    directory = Path(directory)
+    names = sorted(p.name for p in directory.glob("*.md"))
+    return load_snapshot(lambda n: (directory / n).read_text(encoding="utf-8"), names)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Cell-level diff of the numeric spec tables between two snapshots
+Compares page 57 frame tables and character 戦闘コマンド / 基本性能 tables
+keyed by (character, form, move, column) and emits a JSON Lines change feed
+containing only the values that changed, so downstream JSON regeneration can
+target just the affected characters.
+
+Snapshots are directories of exported pages or git revisions:
+    python table_diff.py old_dir yuyuz_md
+    python table_diff.py git:HEAD~1 yuyuz_md --out changes.jsonl
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from spec_tables import load_directory, load_snapshot
+
+SCRIPT_DIR = Path(__file__).parent
+
+def load_git_snapshot(rev, directory):
+    """Structured tables for a directory as of a git revision"""
+    directory = Path(directory).resolve()
+    top = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"],
+        cwd=directory, capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    prefix = directory.relative_to(top).as_posix()
+
+    # -z keeps non-ASCII file names unquoted
+    listing = subprocess.run(
+        ["git", "ls-tree", "-z", "--name-only", rev, prefix + "/"],
+        cwd=top, capture_output=True, check=True,
+    ).stdout.decode("utf-8").split("\0")
+    names = sorted(Path(p).name for p in listing if p.endswith(".md"))
+
+    def read_file(name):
+        result = subprocess.run(
+            ["git", "show", f"{rev}:{prefix}/{name}"],
+            cwd=top, capture_output=True, check=False,
+        )
+        return result.stdout.decode("utf-8") if result.returncode == 0 else None
+
+    return load_snapshot(read_file, names)
+
+def load_any(spec, default_dir):
+    """Load a snapshot from 'git:<rev>' or a directory path"""
+    if spec.startswith("git:"):
+        return load_git_snapshot(spec[4:], default_dir)
+    return load_directory(spec)
+
+def flatten(snapshot):
+    """{(table, character, form, move, column): value} for every cell"""
+    cells = {}
+    for character, rows in snapshot["frames"].items():
+        for row in rows:
+            for column, value in row.items():
+                if column in ("key", "category", "button", "state"):
+                    continue
+                cells[("frames", character, "", row["key"], column)] = value
+
+    for character, tables in snapshot["characters"].items():
+        for form, values in tables["basic"].items():
+            for label, value in values.items():
+                cells[("basic", character, form, label, "値")] = value
+        for form, rows in tables["commands"].items():
+            for row in rows:
+                for column, value in row.items():
+                    if column in ("key", "category", "direction", "button", "name"):
+                        continue
+                    cells[("commands", character, form, row["key"], column)] = value
+    return cells
+
+def diff_snapshots(old, new):
+    """Change records for every cell whose value differs between snapshots"""
+    old_cells = flatten(old)
+    new_cells = flatten(new)
+
+    changes = []
+    for key in sorted(old_cells.keys() | new_cells.keys()):
+        before = old_cells.get(key)
+        after = new_cells.get(key)
+        if before == after:
+            continue
+        table, character, form, move, column = key
+        if before is None:
+            kind = "added"
+        elif after is None:
+            kind = "removed"
+        else:
+            kind = "changed"
+        changes.append({
+            "kind": kind,
+            "table": table,
+            "character": character,
+            "form": form,
+            "move": move,
+            "column": column,
+            "old": before,
+            "new": after,
+        })
+    return changes
+
+def affected(changes):
+    """{table: sorted characters} touched by a change feed"""
+    result = {}
+    for change in changes:
+        result.setdefault(change["table"], set()).add(change["character"])
+    return {table: sorted(chars) for table, chars in sorted(result.items())}
+
+def write_feed(changes, out):
+    """Write the change feed as JSON Lines"""
+    for change in changes:
+        out.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+def main():
+    """Diff two snapshots and print the change feed"""
+    parser = argparse.ArgumentParser(description="Diff spec tables between two snapshots")
+    parser.add_argument("old", help="directory or git:<rev>")
+    parser.add_argument("new", help="directory or git:<rev>")
+    parser.add_argument("--dir", default=str(SCRIPT_DIR / "yuyuz_md"),
+                        help="export directory used for git:<rev> snapshots")
+    parser.add_argument("--out", help="write the change feed here instead of stdout")
+    args = parser.parse_args()
+
+    old = load_any(args.old, args.dir)
+    new = load_any(args.new, args.dir)
+    changes = diff_snapshots(old, new)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            write_feed(changes, f)
+    else:
+        write_feed(changes, sys.stdout)
+
+    summary = affected(changes)
+    print(f"{len(changes)} changed cells", file=sys.stderr)
+    for table, characters in summary.items():
+        print(f"  {table}: {', '.join(characters)}", file=sys.stderr)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+AI-vs-AI round-robin (総当たり戦) tournaments on battle_engine
+Every unordered character pair plays --seeds matches, alternating 1P/2P
+by seed. A match is headless: each turn the initiative and the judgment
+draw come from the match seed and each side picks its command with the
+expectimax AI at a fixed depth (or uniformly at random), until a KO or
+--max-turns (a draw).
+
+Matches run in a process pool. Each finished match is appended to the
+checkpoint (one JSON line, with its AI settings) as it completes, so an
+interrupted run resumes with only the missing matches; results played
+with another --ai / --depth / --max-turns are not reused. Elo depends on
+the order results are scored, so they are scored in schedule order however
+they finish or sit in the checkpoint: a finished match is held back until
+every match scheduled before it is in. Progress is printed as matches finish.
+
+    python tournament.py --seeds 8
+    python tournament.py 幽助 桑原 飛影 --seeds 4 --ai random --checkpoint /tmp/t.jsonl
+    python tournament.py --report                 # tables from the checkpoint only
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+from battle_engine import BattleEngine, initial_state, winner
+from expectimax_ai import ExpectimaxAI
+from roster import load_roster, process_roster
+
+CHECKPOINT_PATH = Path("tournament_results.jsonl")
+MAX_TURNS = 200
+ELO_START = 1500.0
+ELO_K = 16.0
+# Print the standings after this many new results
+REPORT_EVERY = 50
+
+def schedule(names, seeds):
+    """[(1P, 2P, seed)] for every unordered pair, sides alternating by seed"""
+    return [(a, b, seed) if seed % 2 == 0 else (b, a, seed)
+            for a, b in combinations(names, 2) for seed in range(seeds)]
+
+def in_schedule_order(results, names, options):
+    """Checkpointed results of the round-robin under options, once each, in schedule order"""
+    seeds = max((result["seed"] for result in results), default=-1) + 1
+    position = {match_id(*job, *options): i for i, job in enumerate(schedule(names, seeds))}
+    found = {}
+    for result in results:
+        i = position.get(result_id(result))
+        if i is not None:
+            found.setdefault(i, result)
+    return [found[i] for i in sorted(found)]
+
+def match_id(first, second, seed, ai, depth, max_turns):
+    """Checkpoint key of a match (results under other AI settings never match)"""
+    return f"{first}|{second}|{seed}|{ai}|{depth}|{max_turns}"
+
+def result_id(result):
+    """match_id of a checkpointed result (None for results without their settings)"""
+    if not all(key in result for key in ("ai", "depth", "max_turns")):
+        return None
+    return match_id(*result["names"], result["seed"], result["ai"], result["depth"], result["max_turns"])
+
+def settings(ai, depth, max_turns):
+    """(ai, depth, max_turns) as keyed; depth only matters for expectimax"""
+    return ai, depth if ai == "expectimax" else 0, max_turns
+
+def play_match(roster, names, seed, ai="expectimax", depth=1, max_turns=MAX_TURNS):
+    """
+    One seeded headless match
+    Returns {"names", "seed", "ai", "depth", "max_turns", "winner" (0, 1, -1
+    double KO, None draw), "turns", "hp"}.
+    """
+    ai, depth, max_turns = settings(ai, depth, max_turns)
+    rng = np.random.default_rng(seed)
+    engine = BattleEngine(roster, names)
+    players = [ExpectimaxAI(engine, side) for side in (0, 1)] if ai == "expectimax" else None
+    state = initial_state()
+    result = None
+    turn = 0
+    while turn < max_turns and result is None:
+        state = state._replace(first=int(rng.integers(2)))
+        keys = []
+        for side in (0, 1):
+            if players:
+                keys.append(players[side].best_action(state, depth))
+            else:
+                actions = engine.actions(state, side)
+                keys.append(actions[rng.integers(len(actions))])
+        state = engine.sample(state, tuple(keys), rng.random())
+        result = winner(state)
+        turn += 1
+    return {
+        "names": list(names),
+        "seed": seed,
+        "ai": ai,
+        "depth": depth,
+        "max_turns": max_turns,
+        "winner": result,
+        "turns": turn,
+        "hp": [side.hp for side in state.sides],
+    }
+
+def run_match(job):
+    """Worker entry: (1P, 2P, seed, ai, depth, max_turns) -> match result"""
+    first, second, seed, ai, depth, max_turns = job
+    start = time.perf_counter()
+    result = play_match(process_roster(), (first, second), seed, ai, depth, max_turns)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def load_checkpoint(path):
+    """Finished match results in file order (torn lines from a killed run are skipped)"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    results = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                continue
+    return results
+
+class Standings:
+    """Elo ratings and pairwise win counts, updated one result at a time"""
+
+    def __init__(self, names, k=ELO_K):
+        self.names = list(names)
+        self.k = k
+        self.elo = {name: ELO_START for name in self.names}
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.points = np.zeros((len(self.names), len(self.names)))
+        self.games = np.zeros((len(self.names), len(self.names)), dtype=int)
+        self.matches = 0
+
+    def add(self, result):
+        """Score a match (win 1, draw or double KO 0.5) into both tables"""
+        first, second = result["names"]
+        if first not in self.index or second not in self.index:
+            return
+        score = {0: 1.0, 1: 0.0}.get(result["winner"], 0.5)
+        expected = 1 / (1 + 10 ** ((self.elo[second] - self.elo[first]) / 400))
+        self.elo[first] += self.k * (score - expected)
+        self.elo[second] -= self.k * (score - expected)
+        i, j = self.index[first], self.index[second]
+        self.points[i, j] += score
+        self.points[j, i] += 1 - score
+        self.games[i, j] += 1
+        self.games[j, i] += 1
+        self.matches += 1
+
+    def win_rates(self):
+        """[n, n] row character's score share against the column (NaN if unplayed)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.points / self.games
+
+    def ranking(self):
+        """[(name, elo, overall score share)] best first"""
+        totals = self.points.sum(axis=1) / np.maximum(self.games.sum(axis=1), 1)
+        rows = [(name, self.elo[name], totals[self.index[name]]) for name in self.names]
+        return sorted(rows, key=lambda row: -row[1])
+
+    def to_dict(self):
+        """JSON summary: ranking and win-rate table"""
+        rates = self.win_rates()
+        return {
+            "matches": self.matches,
+            "ranking": [{"name": name, "elo": round(elo, 1), "score": round(float(score), 3)}
+                        for name, elo, score in self.ranking()],
+            "win_rates": {a: {b: None if np.isnan(rates[i, j]) else round(float(rates[i, j]), 3)
+                              for j, b in enumerate(self.names) if i != j}
+                          for i, a in enumerate(self.names)},
+        }
+
+def print_ranking(standings, top=None):
+    """Elo table"""
+    for rank, (name, elo, score) in enumerate(standings.ranking()[:top], 1):
+        print(f"  {rank:2d}. {name:8s} {elo:7.1f}  {score * 100:5.1f}%")
+
+def print_win_rates(standings):
+    """Row-vs-column win-rate matrix in percent"""
+    rates = standings.win_rates()
+    print("        " + " ".join(f"{name[:3]:>4s}" for name in standings.names))
+    for i, name in enumerate(standings.names):
+        cells = ["   -" if i == j or np.isnan(rates[i, j]) else f"{rates[i, j] * 100:4.0f}"
+                 for j in range(len(standings.names))]
+        print(f"  {name[:5]:5s} " + " ".join(cells))
+
+def run_tournament(names, seeds, checkpoint=CHECKPOINT_PATH, workers=None, ai="expectimax",
+                   depth=1, max_turns=MAX_TURNS, report_every=REPORT_EVERY):
+    """Play every missing match of the schedule; returns the Standings"""
+    options = settings(ai, depth, max_turns)
+    standings = Standings(names)
+    jobs = [job + options for job in schedule(names, seeds)]
+    position = {match_id(*job): i for i, job in enumerate(jobs)}
+    # Results not scored yet, by schedule position
+    held = {}
+    for result in load_checkpoint(checkpoint):
+        i = position.get(result_id(result))
+        if i is not None:
+            held.setdefault(i, result)
+    pending = [i for i in range(len(jobs)) if i not in held]
+    print(f"{len(jobs)} matches scheduled, {len(held)} in the checkpoint, {len(pending)} to play")
+
+    scored = 0
+    def score():
+        """Score held results up to the first match still missing"""
+        nonlocal scored
+        while scored in held:
+            standings.add(held.pop(scored))
+            scored += 1
+
+    score()
+    if not pending:
+        return standings
+
+    # Terminate a torn last line so appended results start on their own line
+    if Path(checkpoint).exists() and not Path(checkpoint).read_bytes().endswith(b"\n"):
+        with open(checkpoint, "a", encoding="utf-8") as out:
+            out.write("\n")
+
+    start = time.perf_counter()
+    with open(checkpoint, "a", encoding="utf-8") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_match, jobs[i]): i for i in pending}
+        for count, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            held[futures[future]] = result
+            score()
+            if count % report_every == 0 or count == len(pending):
+                elapsed = time.perf_counter() - start
+                print(f"{count}/{len(pending)} played in {elapsed:.1f}s ({count / elapsed:.1f}/s), "
+                      f"{standings.matches}/{len(jobs)} scored")
+                print_ranking(standings, top=5)
+    return standings
+
+def main():
+    """Run (or resume) a round-robin and print the Elo and win-rate tables"""
+    parser = argparse.ArgumentParser(description="AI-vs-AI round-robin tournament")
+    parser.add_argument("names", nargs="*", help="Characters (default: the whole roster)")
+    parser.add_argument("--seeds", type=int, default=4, help="Matches per pair")
+    parser.add_argument("--ai", default="expectimax", choices=["expectimax", "random"])
+    parser.add_argument("--depth", type=int, default=1, help="Expectimax search depth")
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS, help="Turns before a draw")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: CPU count)")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH), help="Results JSON lines")
+    parser.add_argument("--output", help="Write the final tables as JSON")
+    parser.add_argument("--report", action="store_true", help="Only print the tables from the checkpoint")
+    args = parser.parse_args()
+
+    names = args.names or list(load_roster())
+    if args.report:
+        # Only results played with this --ai / --depth / --max-turns
+        options = settings(args.ai, args.depth, args.max_turns)
+        standings = Standings(names)
+        for result in in_schedule_order(load_checkpoint(args.checkpoint), names, options):
+            standings.add(result)
+    else:
+        standings = run_tournament(names, args.seeds, args.checkpoint, args.workers, args.ai,
+                                   args.depth, args.max_turns)
+
+    print(f"\n{standings.matches} matches")
+    print_ranking(standings)
+    print()
+    print_win_rates(standings)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(standings.to_dict(), f, ensure_ascii=False, indent=1)
+        print(f"\nwrote {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
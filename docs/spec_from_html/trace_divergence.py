@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Per-turn divergence between an emulator WRAM trace and battle_engine
+The trace (wram_trace layout, memory-mapped) is cut into turns at the frames
+where the judgment bytes 7E046C/7E046E are written. For each turn the
+commands (7E0E66/7E1066), touki and the state before the turn are fed to
+the engine, and the trace's judgments and the HP/balance after the turn are
+checked against what the engine allows:
+- first_judgment/second_judgment: the joint result has probability > 0
+- p1_hp/p2_hp/p1_balance/p2_balance: inside the damage range over every
+  RNG value for the observed hit type
+The first diverging field of each turn is reported.
+
+Chunks of frames are processed in a process pool; each worker maps the
+file itself and reads only the columns it needs, so traces larger than
+memory are fine.
+
+    python trace_divergence.py trace.bin 幽助 飛影
+    python trace_divergence.py trace.bin 幽助 飛影 --base 7E0400 --size 2417 --workers 4
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from battle_engine import KNOCKDOWN, BattleEngine, Side, State, is_down
+from damage_table import (
+    TOUKI_MAX, TOUKI_TABLE, apply_defense, apply_hp_damage, balance_hit, hp_hit, load_grid,
+)
+from roster import is_attack, load_roster, process_roster
+from wram_trace import WRAM_BASE, WRAM_SIZE, load_address_map, open_trace
+
+# 7E0E66/7E1066 command codes 00-13, in BattleCommand order (GameState.ts)
+COMMAND_CODES = [d + b for d in "→←↑↓" for b in "ABXY"] + [f"霊撃力UP↓{b}" for b in "ABXY"]
+
+# 7E046C/7E046E codes -> result the opponent receives
+JUDGMENT_RESULTS = {0x00: "direct", 0x02: "graze", 0x04: "evade", 0x06: "evade"}
+
+FIELDS = [
+    "p1_hp", "p1_damage_fraction", "p1_touki", "p1_balance", "p1_command", "p1_airtime_lo",
+    "p2_hp", "p2_damage_fraction", "p2_touki", "p2_balance", "p2_command", "p2_airtime_lo",
+    "first_touki_a", "first_judgment", "second_judgment",
+]
+
+# Turns closer together than this are one judgment write
+MIN_TURN_FRAMES = 30
+# Frames after the judgment write at which HP/balance are read
+SETTLE_FRAMES = 60
+# Frames a worker reads before its chunk to find the previous turn
+LOOKBACK_FRAMES = 3000
+CHUNK_FRAMES = 200000
+
+def _hex(value):
+    """Parse a hex CLI argument with or without 0x"""
+    return int(value, 16)
+
+def resolution_frames(first, second, offset=0):
+    """
+    Frames where a judgment byte changes to a judgment code, at least
+    MIN_TURN_FRAMES apart (clearing the byte between turns is not a turn)
+    """
+    valid = np.isin(first, list(JUDGMENT_RESULTS)) & np.isin(second, list(JUDGMENT_RESULTS))
+    changed = np.flatnonzero(((first[1:] != first[:-1]) | (second[1:] != second[:-1]))
+                             & valid[1:]) + 1
+    frames = []
+    for frame in changed:
+        if not frames or frame - frames[-1] >= MIN_TURN_FRAMES:
+            frames.append(int(frame))
+    return np.array(frames, dtype=np.int64) + offset
+
+def damage_range(move, attacker_touki, attacker_balance, defender, result):
+    """((hp min, hp max) 8.8, (balance min, balance max)) over every RNG value"""
+    if result == "evade" or not is_attack(move):
+        return (0, 0), (0, 0)
+    balance = min(attacker_balance, 255)
+    hp = hp_hit(apply_defense(load_grid(move["power"])[attacker_touki, balance],
+                              defender["defense"]), result)
+    bal = balance_hit(apply_defense(load_grid(move["drain"])[attacker_touki, balance],
+                                    defender["balance_defense"]), result) >> 8
+    return (int(hp.min()), int(hp.max())), (int(bal.min()), int(bal.max()))
+
+def touki_byte(touki):
+    """Touki correction byte as stored at 7E2802 (00 at MAX, the 0x100 case)"""
+    return int(TOUKI_TABLE[touki]) if touki < TOUKI_MAX else 0
+
+def command_move(engine, side, code):
+    """Engine command for a command code, or None when the engine lacks it"""
+    if code >= len(COMMAND_CODES):
+        return None
+    command = COMMAND_CODES[code]
+    for move in engine.moves[side]:
+        if move["command"] == command:
+            return move
+    return None
+
+def check_turn(engine, before, after, touki, codes, judgments, first):
+    """
+    (field, expected, actual) for the first diverging field of a turn, or None
+    before/after are {field: value} rows; judgments are the 046C/046E codes.
+    """
+    moves = [command_move(engine, s, codes[s]) for s in (0, 1)]
+    for s in (0, 1):
+        if moves[s] is None:
+            return (f"p{s + 1}_command", "a modelled command", COMMAND_CODES[codes[s]]
+                    if codes[s] < len(COMMAND_CODES) else codes[s])
+
+    sides = []
+    for s in (0, 1):
+        p = f"p{s + 1}_"
+        # 7E0E2A/7E102A holds fractional damage taken, not HP (7E0E1E is じわじわ)
+        sides.append(Side((before[p + "hp"] << 8) - before[p + "damage_fraction"], touki[s],
+                          before[p + "balance"], 25, None, before[p + "airtime_lo"] > 0))
+    state = State(tuple(sides), first)
+    keys = tuple(m["key"] for m in moves)
+
+    # Judgment codes describe each side's own action; received is per target
+    received = [None, None]
+    for code, side in zip(judgments, (first, 1 - first)):
+        if code not in JUDGMENT_RESULTS:
+            return ("first_judgment" if side == first else "second_judgment", "00/02/04/06", code)
+        received[1 - side] = JUDGMENT_RESULTS[code]
+    reached = {tuple(engine.reach(state, moves, r[1:])[0]) for r in engine.judgment(state, keys)
+               if r[0] > 0}
+    if tuple(received) not in reached:
+        first_ok = any(r[1 - first] == received[1 - first] for r in reached)
+        field = "second_judgment" if first_ok else "first_judgment"
+        return (field, sorted(reached), tuple(received))
+
+    for s in (0, 1):
+        t = 1 - s
+        p = f"p{s + 1}_"
+        (hp_lo, hp_hi), (bal_lo, bal_hi) = damage_range(
+            moves[t], touki[t], before[f"p{t + 1}_balance"], engine.fighters[s], received[s])
+        # Same accumulator as the game: whole HP plus the damage fraction byte
+        hp, fraction = before[p + "hp"], before[p + "damage_fraction"]
+        expected_hp = tuple(max(int(apply_hp_damage(hp, fraction, damage)[0]), 0)
+                            for damage in (hp_hi, hp_lo))
+        if not expected_hp[0] <= after[p + "hp"] <= expected_hp[1]:
+            return (p + "hp", expected_hp, after[p + "hp"])
+        if is_down(state.sides[s]) or before[p + "balance"] + bal_hi >= KNOCKDOWN:
+            continue
+        expected_bal = (before[p + "balance"] + bal_lo, before[p + "balance"] + bal_hi)
+        if not expected_bal[0] <= after[p + "balance"] <= expected_bal[1]:
+            return (p + "balance", expected_bal, after[p + "balance"])
+    return None
+
+def scan_chunk(job):
+    """Divergences for turns resolved in [start, stop) of a trace (worker)"""
+    path, layout, names, start, stop = job
+    trace = open_trace(path, load_address_map(), *layout)
+    lo = max(0, start - LOOKBACK_FRAMES)
+    hi = min(len(trace), stop + SETTLE_FRAMES + 1)
+    view = trace[lo:hi]
+    cols = {name: np.asarray(view[name]).astype(np.int64) for name in FIELDS}
+    frames = resolution_frames(cols["first_judgment"], cols["second_judgment"], lo)
+
+    engine = BattleEngine(process_roster(), names)
+    results = []
+    for n, frame in enumerate(frames):
+        if not start <= frame < stop:
+            continue
+        i = frame - lo
+        # The turn starts once the previous turn's damage has settled
+        begin = min(frames[n - 1] - lo + SETTLE_FRAMES, i) if n else 0
+        before = {name: int(cols[name][begin]) for name in FIELDS}
+        after = {name: int(cols[name][min(i + SETTLE_FRAMES, len(view) - 1)]) for name in FIELDS}
+        touki = [min(int(cols[f"p{s + 1}_touki"][begin:i + 1].max()), TOUKI_MAX) for s in (0, 1)]
+        first = 1 if int(cols["first_touki_a"][i]) == touki_byte(touki[1]) != touki_byte(touki[0]) else 0
+        codes = [int(cols["p1_command"][i]), int(cols["p2_command"][i])]
+        judgments = [int(cols["first_judgment"][i]), int(cols["second_judgment"][i])]
+        divergence = check_turn(engine, before, after, touki, codes, judgments, first)
+        results.append({"frame": int(frame), "divergence": divergence})
+    return results
+
+def stat_divergences(path, layout, names, roster):
+    """Defense bytes in the first frame that differ from the roster"""
+    trace = open_trace(path, load_address_map(), *layout)
+    if len(trace) == 0:
+        return []
+    found = []
+    for s, name in enumerate(names):
+        for field, stat in (("defense", "defense"), ("balance_defense", "balance_defense")):
+            column = f"p{s + 1}_{field}"
+            if column in trace.dtype.names and int(trace[column][0]) != roster[name][stat]:
+                found.append((column, roster[name][stat], int(trace[column][0])))
+    return found
+
+def find_divergences(path, names, layout=(WRAM_BASE, WRAM_SIZE, 0), workers=None,
+                     chunk_frames=CHUNK_FRAMES):
+    """All turns with their first divergence, in frame order"""
+    frames = len(open_trace(path, load_address_map(), *layout))
+    jobs = [(str(path), layout, tuple(names), start, min(start + chunk_frames, frames))
+            for start in range(0, frames, chunk_frames)]
+    turns = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(scan_chunk, jobs):
+            turns.extend(results)
+    return turns
+
+def main():
+    """Report the first diverging field per turn"""
+    parser = argparse.ArgumentParser(description="Emulator trace vs engine divergence finder")
+    parser.add_argument("dump", help="WRAM trace file")
+    parser.add_argument("first", help="1P character")
+    parser.add_argument("second", help="2P character")
+    parser.add_argument("--base", type=_hex, default=WRAM_BASE, help="first address in each record (hex)")
+    parser.add_argument("--size", type=_hex, default=WRAM_SIZE, help="WRAM bytes per record (hex)")
+    parser.add_argument("--header", type=int, default=0, help="header bytes before WRAM in each record")
+    parser.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_FRAMES, help="frames per worker job")
+    parser.add_argument("--all", action="store_true", help="list every diverging turn")
+    args = parser.parse_args()
+
+    names = (args.first, args.second)
+    layout = (args.base, args.size, args.header)
+    roster = load_roster()
+    for field, expected, actual in stat_divergences(args.dump, layout, names, roster):
+        print(f"stats: {field} roster {expected}, trace {actual}")
+
+    start = time.time()
+    turns = find_divergences(args.dump, names, layout, args.workers, args.chunk)
+    diverged = [t for t in turns if t["divergence"]]
+    print(f"{len(turns)} turns, {len(diverged)} diverging in {time.time() - start:.1f}s")
+
+    counts = {}
+    for turn in diverged:
+        counts[turn["divergence"][0]] = counts.get(turn["divergence"][0], 0) + 1
+    for field, count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"  {field:<18} {count}")
+
+    for turn in diverged if args.all else diverged[:1]:
+        field, expected, actual = turn["divergence"]
+        number = turns.index(turn) + 1
+        print(f"turn {number} (frame {turn['frame']}): {field} expected {expected}, trace {actual}")
+    return 1 if diverged else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Build-time validator for the character data
+Checks public/data/characters/<id>/{stats,moves,frames}.json and roster.json
+against schemas mirroring src/types/CharacterData.ts, then cross-field
+invariants the schemas cannot express:
+- move ids unique, every move has frames and every frames entry a move
+- 霊撃力UP commands use spirit_boost_ ids
+- realHp ~ 96 / defense and realBalance ~ 256 / balanceDefense
+- knockdown with mashing no longer than without
+- roster indices in range and one mode table entry per form slot
+
+Schemas are compiled once into plain Python functions (generated source,
+like fastjsonschema, which is not a dependency here). Characters are
+validated in parallel.
+
+    python validate_character_json.py
+    python validate_character_json.py --characters /tmp/characters --workers 1
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from character_compiler import (
+    CHARACTERS_DIR, FORM_IDS, GAME_MODES, PAGE_FORM_IDS, ROSTER_PATH, TOTAL_BALANCE, TOTAL_HP,
+)
+
+# Relative tolerance for real HP / balance (defense is stored rounded to 0.1%)
+REAL_TOLERANCE = 0.01
+
+RATE = {"type": "integer", "minimum": 0, "maximum": 255}
+FRAMES = {"type": "integer", "minimum": 0}
+SHARE = {"type": "number", "minimum": 0, "maximum": 1}
+
+FRAME_TIMINGS = {
+    "type": "object",
+    "required": ["prepTransition", "preparation", "activation"],
+    "additionalProperties": False,
+    "properties": {
+        "prepTransition": {
+            "type": "object",
+            "required": ["forest", "dark", "guillotine", "timegap"],
+            "additionalProperties": False,
+            "properties": {stage: FRAMES for stage in ("forest", "dark", "guillotine", "timegap")},
+        },
+        "preparation": FRAMES,
+        "activation": FRAMES,
+    },
+}
+
+MOVE_FRAMES = {
+    "type": "object",
+    "required": ["ground"],
+    "additionalProperties": False,
+    "properties": {"ground": FRAME_TIMINGS, "aerial": FRAME_TIMINGS},
+}
+
+MOVE_DEFINITION = {
+    "type": "object",
+    "required": ["id", "command", "name", "type", "priority", "successRate", "evasionRate",
+                 "power", "balanceDrain", "reikiCost"],
+    "additionalProperties": False,
+    "properties": {
+        "id": {"type": "string", "pattern": r"^[a-z][a-z0-9_]*$"},
+        "command": {"type": "string", "minLength": 1},
+        "name": {"type": "string", "minLength": 1},
+        "nameEn": {"type": "string"},
+        "type": {"enum": ["punch", "defense", "technique", "spirit", "aerial", "extension", "contact",
+                          "ground", "shockwave", "guard", "evasion", "buff"]},
+        "priority": {"enum": ["highest", "high", "medium", "low"]},
+        "successRate": RATE,
+        "evasionRate": RATE,
+        "power": RATE,
+        "balanceDrain": RATE,
+        "reikiCost": {"type": "integer", "minimum": 0, "maximum": 10},
+    },
+}
+
+CHARACTER_STATS = {
+    "type": "object",
+    "required": ["defense", "realHp", "balanceDefense", "realBalance", "airtime", "knockdownDuration",
+                 "knockdownDuration30PerSec", "knockdownDuration60PerSec", "knockdownSpeed",
+                 "airtimeTouki", "poweredPunchRate", "cleanHitRate"],
+    "additionalProperties": False,
+    "properties": {
+        "defense": {"type": "number", "exclusiveMinimum": 0, "maximum": 1},
+        "realHp": {"type": "integer", "minimum": 1},
+        "balanceDefense": {"type": "number", "exclusiveMinimum": 0, "maximum": 1},
+        "realBalance": {"type": "integer", "minimum": 1},
+        "airtime": FRAMES,
+        "knockdownDuration": FRAMES,
+        "knockdownDuration30PerSec": FRAMES,
+        "knockdownDuration60PerSec": FRAMES,
+        "knockdownSpeed": {"type": "integer", "minimum": 0, "maximum": 255},
+        "airtimeTouki": {"type": "number", "minimum": 0},
+        "poweredPunchRate": SHARE,
+        "cleanHitRate": SHARE,
+    },
+}
+
+CHARACTER_ID = {"enum": sorted(set(FORM_IDS.values()) | set(PAGE_FORM_IDS.values()))}
+
+SCHEMAS = {
+    "stats.json": {
+        "type": "object",
+        "required": ["id", "name", "nameEn", "canTransform", "stats"],
+        "additionalProperties": False,
+        "properties": {
+            "id": CHARACTER_ID,
+            "name": {"type": "string", "minLength": 1},
+            "nameEn": {"type": "string", "minLength": 1},
+            "canTransform": {"type": "boolean"},
+            "transformInto": CHARACTER_ID,
+            "transformCondition": {"type": "string"},
+            "stats": CHARACTER_STATS,
+        },
+    },
+    "moves.json": {"type": "array", "minItems": 1, "items": MOVE_DEFINITION},
+    "frames.json": {"type": "object", "additionalProperties": MOVE_FRAMES},
+    "roster.json": {
+        "type": "object",
+        "required": ["version", "moves", "frames", "modes", "characters"],
+        "properties": {
+            "version": {"type": "integer", "minimum": 1},
+            "moves": {"type": "array", "items": MOVE_DEFINITION},
+            "frames": {"type": "array", "items": MOVE_FRAMES},
+            "modes": {
+                "type": "object",
+                "required": GAME_MODES,
+                "additionalProperties": {"type": "object", "additionalProperties": {
+                    "type": "array", "items": {"type": "integer", "minimum": 0}}},
+            },
+            "characters": {"type": "array", "minItems": 1, "items": {
+                "type": "object",
+                "required": ["id", "name", "pageId", "forms"],
+                "properties": {
+                    "id": CHARACTER_ID,
+                    "name": {"type": "string", "minLength": 1},
+                    "pageId": {"type": "integer", "minimum": 1},
+                    "forms": {"type": "array", "minItems": 1, "items": {
+                        "type": "object",
+                        "required": ["id", "name", "nameEn", "slot", "stats", "moves", "frames"],
+                        "additionalProperties": False,
+                        "properties": {
+                            "id": CHARACTER_ID,
+                            "name": {"type": "string", "minLength": 1},
+                            "nameEn": {"type": "string", "minLength": 1},
+                            "slot": {"type": "integer", "minimum": 0},
+                            "stats": CHARACTER_STATS,
+                            "moves": {"type": "array", "minItems": 1, "items": {"type": "integer", "minimum": 0}},
+                            "frames": {"type": "array", "minItems": 1, "items": {"type": "integer", "minimum": 0}},
+                        },
+                    }},
+                },
+            }},
+        },
+    },
+}
+
+# Python type checks per JSON Schema type (bool is not a number in JSON)
+TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+}
+
+class SchemaCompiler:
+    """Generates the source of a validator function for one schema"""
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+        self.counter = 0
+
+    def name(self, prefix):
+        """Fresh local variable name"""
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value):
+        """Module-level name holding a value the generated code refers to"""
+        name = f"_C{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def emit(self, depth, line):
+        """Append one indented line"""
+        self.lines.append("    " * depth + line)
+
+    def node(self, schema, var, path, depth):
+        """Checks for var (an expression naming the value) against schema"""
+        if "enum" in schema:
+            self.emit(depth, f"if {var} not in {self.constant(set(schema['enum']))}:")
+            self.emit(depth + 1, f"errors.append({path} + ': not one of the allowed values (' + repr({var}) + ')')")
+        kind = schema.get("type")
+        if kind is None:
+            return
+        check = TYPE_CHECKS[kind].format(v=var)
+        self.emit(depth, f"if not {check}:")
+        self.emit(depth + 1, f"errors.append({path} + ': expected {kind}')")
+        self.emit(depth, "else:")
+        depth += 1
+        self.emit(depth, "pass")
+        if kind in ("integer", "number"):
+            for key, op in (("minimum", "<"), ("maximum", ">"), ("exclusiveMinimum", "<=")):
+                if key in schema:
+                    self.emit(depth, f"if {var} {op} {schema[key]!r}:")
+                    self.emit(depth + 1, f"errors.append({path} + ': ' + repr({var}) + ' violates {key} {schema[key]}')")
+        elif kind == "string":
+            if "minLength" in schema:
+                self.emit(depth, f"if len({var}) < {schema['minLength']}:")
+                self.emit(depth + 1, f"errors.append({path} + ': shorter than {schema['minLength']}')")
+            if "pattern" in schema:
+                pattern = self.constant(re.compile(schema["pattern"]))
+                self.emit(depth, f"if not {pattern}.search({var}):")
+                self.emit(depth + 1, f"errors.append({path} + ': does not match {schema['pattern']}')")
+        elif kind == "array":
+            if "minItems" in schema:
+                self.emit(depth, f"if len({var}) < {schema['minItems']}:")
+                self.emit(depth + 1, f"errors.append({path} + ': fewer than {schema['minItems']} items')")
+            if "items" in schema:
+                index, item = self.name("i"), self.name("item")
+                self.emit(depth, f"for {index}, {item} in enumerate({var}):")
+                self.node(schema["items"], item, f"{path} + '[' + str({index}) + ']'", depth + 1)
+        elif kind == "object":
+            for key in schema.get("required", []):
+                self.emit(depth, f"if {key!r} not in {var}:")
+                self.emit(depth + 1, f"errors.append({path} + ': missing {key}')")
+            properties = schema.get("properties", {})
+            for key, sub in properties.items():
+                value = self.name("v")
+                self.emit(depth, f"if {key!r} in {var}:")
+                self.emit(depth + 1, f"{value} = {var}[{key!r}]")
+                self.node(sub, value, f"{path} + '.{key}'", depth + 1)
+            extra = schema.get("additionalProperties", True)
+            if extra is not True:
+                key, value = self.name("k"), self.name("v")
+                known = self.constant(set(properties))
+                self.emit(depth, f"for {key}, {value} in {var}.items():")
+                self.emit(depth + 1, f"if {key} in {known}:")
+                self.emit(depth + 2, "continue")
+                if extra is False:
+                    self.emit(depth + 1, f"errors.append({path} + ': unexpected ' + repr({key}))")
+                else:
+                    self.node(extra, value, f"{path} + '.' + str({key})", depth + 1)
+
+def compile_schema(schema, name="validate"):
+    """validate(data, path='$') -> [error strings], generated from schema"""
+    compiler = SchemaCompiler()
+    compiler.emit(0, f"def {name}(data, path='$'):")
+    compiler.emit(1, "errors = []")
+    compiler.node(schema, "data", "path", 1)
+    compiler.emit(1, "return errors")
+    namespace = dict(compiler.constants)
+    exec("\n".join(compiler.lines), namespace)
+    return namespace[name]
+
+VALIDATORS = {name: compile_schema(schema) for name, schema in SCHEMAS.items()}
+
+def near(value, expected):
+    """value within REAL_TOLERANCE of expected"""
+    return abs(value - expected) <= REAL_TOLERANCE * expected
+
+def stats_invariants(stats, where):
+    """Cross-field checks on one CharacterStats block"""
+    errors = []
+    if stats["defense"] > 0 and not near(stats["realHp"], TOTAL_HP / stats["defense"]):
+        errors.append(f"{where}: realHp {stats['realHp']} != 96 / defense ({TOTAL_HP / stats['defense']:.1f})")
+    if stats["balanceDefense"] > 0 and not near(stats["realBalance"], TOTAL_BALANCE / stats["balanceDefense"]):
+        errors.append(f"{where}: realBalance {stats['realBalance']} != 256 / balanceDefense "
+                      f"({TOTAL_BALANCE / stats['balanceDefense']:.1f})")
+    if not stats["knockdownDuration60PerSec"] <= stats["knockdownDuration30PerSec"] <= stats["knockdownDuration"]:
+        errors.append(f"{where}: knockdown durations not decreasing with mashing")
+    return errors
+
+def move_invariants(moves, where):
+    """Cross-field checks on a move list"""
+    errors = []
+    seen = set()
+    for move in moves:
+        if move["id"] in seen:
+            errors.append(f"{where}: duplicate move id {move['id']}")
+        seen.add(move["id"])
+        if move["command"].startswith("霊撃力UP") != move["id"].startswith("spirit_boost_"):
+            errors.append(f"{where}: {move['id']} command {move['command']} does not match its id")
+    return errors
+
+def validate_character(path):
+    """(directory name, [errors]) for one character directory"""
+    path = Path(path)
+    errors = []
+    data = {}
+    for name in ("stats.json", "moves.json", "frames.json"):
+        try:
+            data[name] = json.loads((path / name).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            errors.append(f"{name}: {e}")
+    if errors:
+        return path.name, errors
+    return path.name, character_errors(path.name, data)
+
+def character_errors(directory, data):
+    """[errors] for one character's parsed {stats,moves,frames}.json in <directory>"""
+    errors = []
+    for name in ("stats.json", "moves.json", "frames.json"):
+        errors += VALIDATORS[name](data[name], name)
+    if errors:
+        return errors
+
+    stats, moves, frames = data["stats.json"], data["moves.json"], data["frames.json"]
+    if stats["id"] != directory:
+        errors.append(f"stats.json: id {stats['id']} does not match directory {directory}")
+    errors += stats_invariants(stats["stats"], "stats.json")
+    errors += move_invariants(moves, "moves.json")
+    ids = {move["id"] for move in moves}
+    errors += [f"frames.json: no frames for {move_id}" for move_id in sorted(ids - set(frames))]
+    errors += [f"frames.json: {move_id} is not in moves.json" for move_id in sorted(set(frames) - ids)]
+    return errors
+
+def validate_roster(path):
+    """(file name, [errors]) for the compiled roster"""
+    path = Path(path)
+    try:
+        roster = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        return path.name, [str(e)]
+    return path.name, roster_errors(roster)
+
+def roster_errors(roster):
+    """[errors] for a parsed compiled roster"""
+    errors = VALIDATORS["roster.json"](roster, "roster")
+    if errors:
+        return errors
+
+    slots = []
+    for c, character in enumerate(roster["characters"]):
+        for f, form in enumerate(character["forms"]):
+            where = f"roster.characters[{c}].forms[{f}] ({form['name']})"
+            slots.append(form["slot"])
+            if len(form["moves"]) != len(form["frames"]):
+                errors.append(f"{where}: {len(form['moves'])} moves but {len(form['frames'])} frames")
+            moves_ok = all(m < len(roster["moves"]) for m in form["moves"])
+            frames_ok = all(i < len(roster["frames"]) for i in form["frames"])
+            if not moves_ok:
+                errors.append(f"{where}: move index out of range")
+            if not frames_ok:
+                errors.append(f"{where}: frame index out of range")
+            if moves_ok and frames_ok:
+                errors += move_invariants([roster["moves"][m] for m in form["moves"]], where)
+            errors += stats_invariants(form["stats"], where)
+    if sorted(slots) != list(range(len(slots))):
+        errors.append("roster: form slots are not 0..forms-1")
+    for mode, table in roster["modes"].items():
+        for field, values in table.items():
+            if len(values) != len(slots):
+                errors.append(f"roster.modes.{mode}.{field}: {len(values)} entries for {len(slots)} forms")
+        for slot, (rate, real) in enumerate(zip(table.get("defense", []), table.get("realHp", []))):
+            if rate and not near(real, TOTAL_HP * 256 / rate):
+                errors.append(f"roster.modes.{mode}: slot {slot} realHp {real} != 96 / ({rate}/256)")
+    return errors
+
+def validate_output(characters_dir=CHARACTERS_DIR, roster_path=ROSTER_PATH, workers=None, ids=None):
+    """[(name, [errors])] for the character directories (only the given ids) and the roster"""
+    directories = []
+    if characters_dir:
+        directories = sorted(p for p in Path(characters_dir).iterdir() if (p / "stats.json").exists()
+                             and (ids is None or p.name in ids))
+    workers = os.cpu_count() if workers is None else workers
+    if workers > 1 and len(directories) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(directories))) as pool:
+            results = list(pool.map(validate_character, directories))
+    else:
+        results = [validate_character(d) for d in directories]
+    if roster_path and Path(roster_path).exists():
+        results.append(validate_roster(roster_path))
+    return results
+
+def report(results):
+    """Print the errors; returns the number of files with errors"""
+    failed = 0
+    for name, errors in results:
+        for error in errors:
+            print(f"  {name}: {error}")
+        failed += bool(errors)
+    return failed
+
+def main():
+    """Validate every character directory and the roster; exit 1 on any error"""
+    parser = argparse.ArgumentParser(description="Validate generated character JSON")
+    parser.add_argument("--characters", default=str(CHARACTERS_DIR), help="Character directories")
+    parser.add_argument("--roster", default=str(ROSTER_PATH), help="Compiled roster (skipped if missing)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = validate_output(args.characters, args.roster, args.workers)
+    failed = report(results)
+    elapsed = time.perf_counter() - start
+    print(f"{len(results)} checked, {failed} with errors in {elapsed * 1000:.0f} ms")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
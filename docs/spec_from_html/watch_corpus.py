@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Watch yuyuz_md and keep the character data up to date while editing
+The parsed pages, page 57 tables and compiled characters stay in memory.
+When a file changes only that page is re-parsed (for page 57, only the
+edited sections):
+- a character page recompiles that character's forms
+- page 57 re-runs the frame check and recompiles the characters whose
+  frame sections changed; tables with ambiguous rows are not adopted (and
+  the watcher does not start on them)
+then their <id>/{stats,moves,frames}.json and roster.json are rewritten and
+checked by validate_character_json.py. If they pass, public/data/.reload is
+touched, which the Vite dev server (vite.config.ts) turns into a page reload.
+
+Uses watchdog (inotify) when installed, otherwise polls mtimes.
+
+    python watch_corpus.py
+    python watch_corpus.py --output /tmp/characters --interval 0.1
+"""
+
+import argparse
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+from character_compiler import (
+    CHARACTERS_DIR, MD_DIR, ROSTER_PATH, Interner, compile_character,
+    compile_roster, form_files, split_forms, write_json,
+)
+from frame_check import check_tables, format_problem, repairs
+from spec_tables import CHARACTER_PAGES, FRAME_PAGE, character_tables, frame_tables
+from validate_character_json import report, validate_output
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+# Touched next to roster.json after every rebuild
+RELOAD_STAMP = ".reload"
+POLL_INTERVAL = 0.2
+# Editors write a file in several steps; wait this long for the burst to end
+SETTLE = 0.05
+
+def watched(name):
+    """True for page 57 and the character pages"""
+    match = re.match(r'^(\d{3})-.*\.md$', name)
+    return bool(match) and (name == FRAME_PAGE or int(match.group(1)) in CHARACTER_PAGES)
+
+class FrameCheckError(Exception):
+    """Page 57 has rows the frame check cannot explain"""
+
+class Corpus:
+    """Parsed pages and compiled characters, updated one file at a time"""
+    def __init__(self, directory=MD_DIR, output=CHARACTERS_DIR, roster_path=ROSTER_PATH):
+        self.directory = Path(directory)
+        self.output = Path(output)
+        self.roster_path = Path(roster_path)
+        self.snapshot = {"frames": {}, "characters": {}}
+        self.pages = {}
+        self.compiled = {}
+        self.fixes = {}
+        self.frame_cache = {}
+        self.staged = None
+        for path in sorted(self.directory.glob("*.md")):
+            if watched(path.name):
+                self.parse(path.name)
+        if not self.commit_frames():
+            raise FrameCheckError("page 57 has ambiguous frame rows; fix them before watching")
+        for page in self.snapshot["characters"]:
+            self.compile(page)
+
+    def parse(self, name):
+        """Re-parse one file; returns the page names whose data changed"""
+        path = self.directory / name
+        if not path.exists():
+            page = self.pages.pop(name, None)
+            if page:
+                self.snapshot["characters"].pop(page, None)
+                self.compiled.pop(page, None)
+            return set()
+        text = path.read_text(encoding="utf-8")
+        if name == FRAME_PAGE:
+            # Staged until commit_frames() has checked them
+            old = self.snapshot["frames"]
+            cache = dict(self.frame_cache)
+            new = frame_tables(text, cache)
+            self.staged = (new, cache)
+            changed = {h for h in set(old) | set(new) if old.get(h) != new.get(h)}
+            return {page for page in self.snapshot["characters"]
+                    if self.frame_headings(page, new) & changed}
+        tables = character_tables(text)
+        page = tables["name"] or name
+        previous = self.pages.get(name)
+        if previous and previous != page:
+            self.snapshot["characters"].pop(previous, None)
+            self.compiled.pop(previous, None)
+        self.pages[name] = page
+        if self.snapshot["characters"].get(page) == tables:
+            return set()
+        self.snapshot["characters"][page] = tables
+        return {page}
+
+    def frame_headings(self, page, frames=None):
+        """Page 57 sections a page's forms read"""
+        frames = self.snapshot["frames"] if frames is None else frames
+        return {form if form in frames else page for form in self.snapshot["characters"][page]["commands"]}
+
+    def commit_frames(self):
+        """
+        Run the page 57 gate on the staged frames and adopt them (with their
+        parse cache and fixes) if it passes; on ambiguous rows they are
+        dropped and the previous frames stay. Returns whether it passed.
+        """
+        if self.staged is None:
+            return True
+        frames, cache = self.staged
+        self.staged = None
+        problems = check_tables(frames)
+        for problem in problems:
+            if problem["suspect"] is None:
+                print(f"  frame check: {format_problem(problem)}")
+        if any(p["suspect"] is None for p in problems):
+            return False
+        self.snapshot["frames"] = frames
+        self.frame_cache = cache
+        self.fixes = repairs(problems)
+        return True
+
+    def compile(self, page):
+        """Recompile one page's forms with their own move / frame tables"""
+        moves, frames = Interner(), Interner()
+        character = compile_character(page, self.snapshot["characters"][page], self.snapshot["frames"],
+                                      moves, frames, self.fixes)
+        self.compiled[page] = (character, {"moves": moves.values, "frames": frames.values})
+
+    def update(self, names):
+        """Apply a batch of changed files; returns the pages that were rewritten"""
+        pages = set()
+        frame_pages = set()
+        for name in names:
+            if name == FRAME_PAGE:
+                frame_pages = self.parse(name)
+            else:
+                pages |= self.parse(name)
+        if self.commit_frames():
+            pages |= frame_pages
+        else:
+            print("page 57 has ambiguous frame rows; keeping the previous frames")
+        for page in pages:
+            self.compile(page)
+        if pages:
+            self.write(pages)
+        return pages
+
+    def write(self, pages):
+        """Write the changed pages' form files and the roster, then signal a reload if they validate"""
+        characters = [character for character, _ in self.compiled.values()]
+        tables = {id(character): payload for character, payload in self.compiled.values()}
+        written = set()
+        for character, form in split_forms({"characters": characters}):
+            if character["name"] not in pages:
+                continue
+            for name, value in zip(("stats.json", "moves.json", "frames.json"),
+                                   form_files(character, form, tables[id(character)])):
+                write_json(self.output / form["id"] / name, value)
+            written.add(form["id"])
+        roster, _ = compile_roster(self.snapshot, frame_fixes=self.fixes)
+        write_json(self.roster_path, roster, indent=None)
+        if report(validate_output(self.output, self.roster_path, workers=1, ids=written)):
+            print("generated data failed validation; not reloading")
+            return
+        (self.roster_path.parent / RELOAD_STAMP).write_text(f"{time.time()}\n", encoding="utf-8")
+
+def poll(directory, interval, changes):
+    """Put the names of modified .md files on changes, checking mtimes every interval"""
+    def scan():
+        return {entry.name: entry.stat().st_mtime_ns
+                for entry in os.scandir(directory) if watched(entry.name)}
+    seen = scan()
+    while True:
+        time.sleep(interval)
+        current = scan()
+        for name in set(seen) | set(current):
+            if seen.get(name) != current.get(name):
+                changes.put(name)
+        seen = current
+
+def start_observer(directory, changes):
+    """watchdog observer putting changed file names on changes"""
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            for path in (event.src_path, getattr(event, "dest_path", "")):
+                if path and watched(Path(path).name):
+                    changes.put(Path(path).name)
+    observer = Observer()
+    observer.schedule(Handler(), str(directory))
+    observer.start()
+    return observer
+
+def main():
+    """Load the corpus once, then rebuild the affected characters on every change"""
+    parser = argparse.ArgumentParser(description="Watch yuyuz_md and rebuild character data")
+    parser.add_argument("--directory", default=str(MD_DIR), help="yuyuz_md directory")
+    parser.add_argument("--output", default=str(CHARACTERS_DIR), help="Per-form character directories")
+    parser.add_argument("--roster", default=str(ROSTER_PATH), help="Compiled roster JSON")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Polling interval (s)")
+    parser.add_argument("--poll", action="store_true", help="Poll even if watchdog is installed")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        corpus = Corpus(args.directory, args.output, args.roster)
+    except FrameCheckError as e:
+        print(e)
+        return 1
+    print(f"loaded {len(corpus.snapshot['characters'])} pages in {time.perf_counter() - start:.2f}s")
+
+    changes = queue.Queue()
+    if Observer is not None and not args.poll:
+        start_observer(args.directory, changes)
+        print(f"watching {args.directory} (inotify)")
+    else:
+        threading.Thread(target=poll, args=(args.directory, args.interval, changes), daemon=True).start()
+        print(f"watching {args.directory} (polling every {args.interval}s)")
+
+    try:
+        while True:
+            names = {changes.get()}
+            time.sleep(SETTLE)
+            while not changes.empty():
+                names.add(changes.get())
+            start = time.perf_counter()
+            pages = corpus.update(names)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{', '.join(sorted(names))}: rebuilt {', '.join(sorted(pages)) or 'nothing'} in {elapsed:.0f} ms")
+    except KeyboardInterrupt:
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
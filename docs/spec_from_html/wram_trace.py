@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped decoder for per-frame SNES WRAM dumps
+Builds a NumPy structured dtype from the address map in 027-メモリアドレス.md
+and maps dump files with np.memmap, so named per-frame columns (touki,
+balance, RNG correction, judgment result, ...) are strided views into the
+file rather than Python objects.
+
+Dump layout: the file is a sequence of fixed-size records, one per frame.
+Each record is an optional header (e.g. a frame counter written by the
+emulator script) followed by WRAM starting at --base for --size bytes.
+Full-WRAM dumps are the default (base 7E0000, size 0x20000).
+
+    python wram_trace.py trace.bin --fields p1_touki,p2_touki,first_judgment --head 20
+    python wram_trace.py trace.bin --base 7E0400 --size 2500 --export cols.npz
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).parent
+ADDRESS_MAP = SCRIPT_DIR / "yuyuz_md" / "027-メモリアドレス.md"
+
+WRAM_BASE = 0x7E0000
+WRAM_SIZE = 0x20000
+
+# Short names for the addresses the tools use; others get w7eXXXX names
+ALIASES = {
+    0x7E0E1E: "p1_hp_fraction",
+    0x7E0E1F: "p1_hp",
+    0x7E0E2A: "p1_damage_fraction",
+    0x7E0E21: "p1_touki",
+    0x7E0E24: "p1_balance",
+    0x7E0E5A: "p1_airtime_lo",
+    0x7E0E5B: "p1_airtime_hi",
+    0x7E0E66: "p1_command",
+    0x7E0E74: "p1_recovery_lo",
+    0x7E0E75: "p1_recovery_hi",
+    0x7E0EB0: "p1_defense",
+    0x7E0EB8: "p1_balance_defense",
+    0x7E0EBA: "p1_recovery_speed",
+    0x7E0EBC: "p1_powered_punch",
+    0x7E0EBE: "p1_clean_hit",
+    0x7E101E: "p2_hp_fraction",
+    0x7E101F: "p2_hp",
+    0x7E102A: "p2_damage_fraction",
+    0x7E1021: "p2_touki",
+    0x7E1024: "p2_balance",
+    0x7E105A: "p2_airtime_lo",
+    0x7E105B: "p2_airtime_hi",
+    0x7E1066: "p2_command",
+    0x7E1074: "p2_recovery_lo",
+    0x7E1075: "p2_recovery_hi",
+    0x7E10B0: "p2_defense",
+    0x7E10B8: "p2_balance_defense",
+    0x7E10BA: "p2_recovery_speed",
+    0x7E10BC: "p2_powered_punch",
+    0x7E10BE: "p2_clean_hit",
+    0x7E2800: "first_rate_a",
+    0x7E2801: "first_rng_a",
+    0x7E2802: "first_touki_a",
+    0x7E2803: "second_rate_a",
+    0x7E2804: "second_rng_a",
+    0x7E2805: "second_touki_a",
+    0x7E2806: "second_balance_corr",
+    0x7E2810: "second_rate_b",
+    0x7E2811: "second_rng_b",
+    0x7E2812: "second_touki_b",
+    0x7E2813: "first_rate_b",
+    0x7E2814: "first_rng_b",
+    0x7E2815: "first_touki_b",
+    0x7E2816: "first_balance_corr",
+    0x7E0443: "damage",
+    0x7E0446: "balance_damage",
+    0x7E046C: "first_judgment",
+    0x7E046E: "second_judgment",
+    0x7E0470: "collision",
+}
+
+# 16-bit values split into 下位/上位 bytes (little-endian, low byte first)
+WORD_FIELDS = {
+    "p1_airtime": 0x7E0E5A,
+    "p2_airtime": 0x7E105A,
+    "p1_recovery": 0x7E0E74,
+    "p2_recovery": 0x7E1074,
+}
+
+# 7E046C / 7E046E values (same names as JudgmentResult in BattleTypes.ts)
+JUDGMENT_CODES = {0x00: "direct_hit", 0x02: "graze", 0x04: "evade", 0x06: "direct_fail"}
+
+# 7E0470 values
+COLLISION_CODES = {
+    0x01: "first_through",
+    0x02: "first_reduced",
+    0x03: "cancel",
+    0x04: "both_reduced",
+    0x05: "second_reduced",
+    0x06: "second_through",
+}
+
+def parse_address_map(text):
+    """[(address, label)] from the 7EXXXX:label lines of the address page"""
+    entries = []
+    seen = set()
+    for line in text.splitlines():
+        match = re.match(r'^\s*(7E[0-9A-Fa-f]{4})\s*[:：]\s*(.+?)\s*$', line)
+        if not match:
+            continue
+        address = int(match.group(1), 16)
+        if address in seen:
+            continue
+        seen.add(address)
+        # Drop Markdown link targets, keep the link text
+        label = re.sub(r'\[([^\]]*)\]\([^)]*\)', r'\1', match.group(2))
+        entries.append((address, label))
+    return entries
+
+def load_address_map(path=ADDRESS_MAP):
+    """Address map from 027-メモリアドレス.md"""
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_address_map(f.read())
+
+def field_name(address):
+    """Column name for an address"""
+    return ALIASES.get(address, f"w{address:06x}")
+
+def record_dtype(address_map, base=WRAM_BASE, size=WRAM_SIZE, header=0):
+    """
+    Structured dtype for one frame record
+    Byte fields sit at their WRAM offsets; 下位/上位 pairs also get a <u2 view.
+    Addresses outside [base, base + size) are left out.
+    """
+    names, formats, offsets = [], [], []
+    if header:
+        names.append("header")
+        formats.append(f"V{header}" if header not in (2, 4, 8) else f"<u{header}")
+        offsets.append(0)
+
+    for address, _ in address_map:
+        if base <= address < base + size:
+            names.append(field_name(address))
+            formats.append("u1")
+            offsets.append(header + address - base)
+
+    for name, address in WORD_FIELDS.items():
+        if base <= address and address + 1 < base + size:
+            names.append(name)
+            formats.append("<u2")
+            offsets.append(header + address - base)
+
+    return np.dtype({
+        "names": names,
+        "formats": formats,
+        "offsets": offsets,
+        "itemsize": header + size,
+    })
+
+def open_trace(path, address_map=None, base=WRAM_BASE, size=WRAM_SIZE, header=0):
+    """Memory-map a dump file as an array of frame records (read-only)"""
+    if address_map is None:
+        address_map = load_address_map()
+    dtype = record_dtype(address_map, base, size, header)
+
+    file_size = Path(path).stat().st_size
+    frames = file_size // dtype.itemsize
+    if file_size % dtype.itemsize:
+        print(f"Warning: {file_size % dtype.itemsize} trailing bytes ignored "
+              f"(record size {dtype.itemsize})", file=sys.stderr)
+    if frames == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(frames,))
+
+def columns(trace, names):
+    """{name: per-frame view} for the requested fields (no copies)"""
+    missing = [n for n in names if n not in trace.dtype.names]
+    if missing:
+        raise KeyError(f"Fields not in this layout: {', '.join(missing)}")
+    return {name: trace[name] for name in names}
+
+def judgment_changes(trace, field="first_judgment"):
+    """Frame indices where a judgment byte changes value"""
+    values = trace[field]
+    if len(values) < 2:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(values[1:] != values[:-1]) + 1
+
+def _hex(value):
+    """Parse a hex CLI argument with or without 0x"""
+    return int(value, 16)
+
+def main():
+    """Summarize or export columns of a WRAM dump"""
+    parser = argparse.ArgumentParser(description="Decode per-frame WRAM dumps")
+    parser.add_argument("dump", help="dump file")
+    parser.add_argument("--base", type=_hex, default=WRAM_BASE, help="first address in each record (hex)")
+    parser.add_argument("--size", type=_hex, default=WRAM_SIZE, help="WRAM bytes per record (hex)")
+    parser.add_argument("--header", type=int, default=0, help="header bytes before WRAM in each record")
+    parser.add_argument("--fields", default="p1_hp,p2_hp,p1_touki,p2_touki,p1_balance,p2_balance,first_judgment,second_judgment",
+                        help="comma-separated field names")
+    parser.add_argument("--head", type=int, default=0, help="print the first N frames")
+    parser.add_argument("--export", help="write the selected columns to an .npz file")
+    parser.add_argument("--list", action="store_true", help="list available fields")
+    args = parser.parse_args()
+
+    address_map = load_address_map()
+    trace = open_trace(args.dump, address_map, args.base, args.size, args.header)
+
+    if args.list:
+        labels = dict(address_map)
+        for name in trace.dtype.names:
+            offset = trace.dtype.fields[name][1] - args.header + args.base
+            print(f"  {name:<22} {offset:06X}  {labels.get(offset, '')}")
+        return 0
+
+    names = [n.strip() for n in args.fields.split(",") if n.strip()]
+    cols = columns(trace, names)
+    print(f"{len(trace)} frames, record size {trace.dtype.itemsize} bytes")
+
+    for name, values in cols.items():
+        if len(values):
+            print(f"  {name:<22} min {int(values.min()):>5}  max {int(values.max()):>5}")
+
+    if args.head:
+        print("\n" + "frame  " + "  ".join(f"{n:>8.8}" for n in names))
+        for i in range(min(args.head, len(trace))):
+            print(f"{i:>5}  " + "  ".join(f"{int(cols[n][i]):>8}" for n in names))
+
+    if args.export:
+        np.savez(args.export, **{n: np.asarray(v) for n, v in cols.items()})
+        print(f"Exported: {args.export}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+/**
+ * AI Policy Loader
+ *
+ * Loads policy grids exported by docs/spec_from_html/expectimax_ai.py --export
+ * and looks up the CPU's command for the current battle state
+ */
+
+import type { BattleState } from '../types/GameState';
+
+/**
+ * One command the policy can choose
+ */
+export interface AIPolicyAction {
+  key: string;      // Wiki command key (e.g. "霊撃/↓X/霊丸")
+  command: string;  // Direction + button (e.g. "↓X"), or "AorY" / "なし"
+  name: string;     // Move name
+}
+
+/**
+ * Grid axis (values are whole units; "first" is 1 when the CPU is 先手)
+ */
+export interface AIPolicyAxis {
+  name: 'hp' | 'opponent_hp' | 'balance' | 'opponent_balance' | 'reiki' | 'first';
+  values: number[];
+}
+
+/**
+ * Policy file as written by the exporter
+ */
+export interface AIPolicyFile {
+  version: number;
+  names: [string, string];
+  side: number;
+  depth: number;
+  actions: AIPolicyAction[];
+  axes: AIPolicyAxis[];
+  policy: string;   // base64 uint8 action indices, row-major over axes
+}
+
+/**
+ * Decoded policy ready for lookups
+ */
+export interface AIPolicy {
+  actions: AIPolicyAction[];
+  axes: AIPolicyAxis[];
+  indices: Uint8Array;
+}
+
+/** Index marking grid points with no available command */
+const NO_ACTION = 255;
+
+/**
+ * Load a policy grid
+ * @param path - URL of the exported JSON
+ * @returns Promise<AIPolicy> - Decoded policy
+ * @throws Error if the file cannot be loaded or does not match its axes
+ */
+export async function loadAIPolicy(path: string): Promise<AIPolicy> {
+  const response = await fetch(path);
+  if (!response.ok) {
+    throw new Error(`Failed to load AI policy ${path}: ${response.status}`);
+  }
+  const data = (await response.json()) as AIPolicyFile;
+
+  const binary = atob(data.policy);
+  const indices = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    indices[i] = binary.charCodeAt(i);
+  }
+
+  const expected = data.axes.reduce((size, axis) => size * axis.values.length, 1);
+  if (indices.length !== expected) {
+    throw new Error(`AI policy ${path} has ${indices.length} entries, expected ${expected}`);
+  }
+
+  return { actions: data.actions, axes: data.axes, indices };
+}
+
+/**
+ * Index of the grid value closest to a state value
+ */
+function nearestIndex(values: number[], value: number): number {
+  let best = 0;
+  for (let i = 1; i < values.length; i++) {
+    if (Math.abs(values[i] - value) < Math.abs(values[best] - value)) {
+      best = i;
+    }
+  }
+  return best;
+}
+
+/**
+ * Look up the CPU command for a battle state
+ * @param policy - Decoded policy
+ * @param state - Current battle state
+ * @param cpu - Which player the CPU controls
+ * @returns AIPolicyAction | null - Command to play, null if none recorded
+ */
+export function lookupAIAction(
+  policy: AIPolicy,
+  state: BattleState,
+  cpu: 1 | 2
+): AIPolicyAction | null {
+  const me = cpu === 1 ? state.player1 : state.player2;
+  const opponent = cpu === 1 ? state.player2 : state.player1;
+  const values: Record<AIPolicyAxis['name'], number> = {
+    hp: me.hp,
+    opponent_hp: opponent.hp,
+    balance: me.balance,
+    opponent_balance: opponent.balance,
+    reiki: me.reiki,
+    first: state.firstPlayer === cpu ? 1 : 0,
+  };
+
+  let offset = 0;
+  for (const axis of policy.axes) {
+    offset = offset * axis.values.length + nearestIndex(axis.values, values[axis.name]);
+  }
+
+  const index = policy.indices[offset];
+  return index === NO_ACTION ? null : policy.actions[index] ?? null;
+}
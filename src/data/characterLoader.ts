@@ -3,6 +3,8 @@
  *
  * Loads character JSON files from split structure and returns typed CharacterData objects
  * New structure: stats.json, moves.json, frames.json
+ * When a build manifest (manifest.json) exists, the content-hashed copies it
+ * lists are fetched instead and served from the HTTP cache when unchanged
  */
 
 import type {
@@ -11,9 +13,50 @@ import type {
   CharacterStatsFile,
   CharacterMovesFile,
   CharacterFramesFile,
+  CharacterStats,
+  CompiledCharacter,
+  CompiledRosterFile,
+  DataManifest,
+  GameMode,
+  ModeStatTable,
   MoveData,
 } from '../types/CharacterData';
 
+/** Supported compiled roster version */
+const ROSTER_VERSION = 2;
+
+/** Supported data manifest version */
+const MANIFEST_VERSION = 1;
+
+/** Manifest written by docs/spec_from_html/bundle_character_data.py */
+const MANIFEST_PATH = '/data/manifest.json';
+
+let manifestPromise: Promise<DataManifest | null> | undefined;
+
+/**
+ * Load the data manifest (once per session)
+ * The manifest itself is always revalidated; the artifacts it lists have
+ * content-hashed URLs and are fetched from the cache when present.
+ * The dev server skips it: public/data may hold a manifest from an earlier
+ * bundle run whose hashed copies are older than the files being edited
+ * @returns Promise<DataManifest | null> - Manifest, or null on the dev server, if there is none or its version is unknown
+ */
+export function loadManifest(): Promise<DataManifest | null> {
+  if (import.meta.env.DEV) {
+    return Promise.resolve(null);
+  }
+  if (!manifestPromise) {
+    manifestPromise = fetch(MANIFEST_PATH, { cache: 'no-cache' })
+      .then(async (response) => {
+        if (!response.ok) return null;
+        const manifest = (await response.json()) as DataManifest;
+        return manifest.version === MANIFEST_VERSION ? manifest : null;
+      })
+      .catch(() => null);
+  }
+  return manifestPromise;
+}
+
 /**
  * Available characters (test set - 3 characters)
  */
@@ -26,6 +69,7 @@ export const AVAILABLE_CHARACTERS: CharacterId[] = [
 /**
  * Load character data from split JSON files
  * Loads stats.json, moves.json, frames.json and combines them
+ * (the manifest's hashed copies when a manifest is available)
  * @param characterId - ID of the character to load
  * @returns Promise<CharacterData> - Character data object
  * @throws Error if character not found or invalid
@@ -33,12 +77,15 @@ export const AVAILABLE_CHARACTERS: CharacterId[] = [
 export async function loadCharacter(characterId: CharacterId): Promise<CharacterData> {
   try {
     const basePath = `/data/characters/${characterId}`;
+    const artifacts = (await loadManifest())?.characters[characterId];
+    // Hashed URLs never change content, so any cached copy is current
+    const init: RequestInit = artifacts ? { cache: 'force-cache' } : {};
 
     // Load all 3 files in parallel
     const [statsResponse, movesResponse, framesResponse] = await Promise.all([
-      fetch(`${basePath}/stats.json`),
-      fetch(`${basePath}/moves.json`),
-      fetch(`${basePath}/frames.json`),
+      fetch(artifacts?.stats.url ?? `${basePath}/stats.json`, init),
+      fetch(artifacts?.moves.url ?? `${basePath}/moves.json`, init),
+      fetch(artifacts?.frames.url ?? `${basePath}/frames.json`, init),
     ]);
 
     // Check responses
@@ -100,6 +147,118 @@ export async function loadAllCharacters(): Promise<CharacterData[]> {
   return loadCharacters(AVAILABLE_CHARACTERS);
 }
 
+/**
+ * Compiled roster with each form resolved to CharacterData
+ * Forms share MoveData objects for identical (move, frames) pairs, so a form
+ * switch is picking another entry of forms
+ */
+export interface CompiledRoster {
+  characters: CompiledCharacter[];
+  forms: CharacterData[][];   // [character index][form index]
+  slots: number[][];          // Mode table slot of each form, same shape as forms
+  modes: Record<GameMode, ModeStatTable>;
+}
+
+/**
+ * Load the compiled roster (all characters and forms in one file)
+ * @param path - URL of roster.json (default: the manifest's hashed copy, else /data/roster.json)
+ * @returns Promise<CompiledRoster> - Roster with forms resolved
+ * @throws Error if the file cannot be loaded or has an unknown version
+ */
+export async function loadCompiledRoster(path?: string): Promise<CompiledRoster> {
+  const artifact = path ? undefined : (await loadManifest())?.roster;
+  const response = await fetch(
+    artifact?.url ?? path ?? '/data/roster.json',
+    artifact ? { cache: 'force-cache' } : {}
+  );
+  if (!response.ok) {
+    throw new Error(`Failed to load roster: ${response.status}`);
+  }
+  const roster = (await response.json()) as CompiledRosterFile;
+  if (roster.version !== ROSTER_VERSION) {
+    throw new Error(`Unsupported roster version: ${roster.version}`);
+  }
+  return resolveCompiledRoster(roster);
+}
+
+/**
+ * Resolve every form of a compiled roster to CharacterData
+ * @param roster - Parsed roster.json
+ * @returns CompiledRoster - Characters and their resolved forms
+ */
+export function resolveCompiledRoster(roster: CompiledRosterFile): CompiledRoster {
+  const shared = new Map<string, MoveData>();
+  const resolveMove = (moveIndex: number, frameIndex: number): MoveData => {
+    const key = `${moveIndex}:${frameIndex}`;
+    let move = shared.get(key);
+    if (!move) {
+      move = { ...roster.moves[moveIndex], frames: roster.frames[frameIndex] };
+      shared.set(key, move);
+    }
+    return move;
+  };
+
+  const forms = roster.characters.map((character) =>
+    character.forms.map((form, formIndex): CharacterData => ({
+      id: form.id,
+      name: form.name,
+      nameEn: form.nameEn,
+      canTransform: character.forms.length > 1,
+      transformInto: character.forms[formIndex + 1]?.id,
+      stats: form.stats,
+      moves: form.moves.map((moveIndex, k) => resolveMove(moveIndex, form.frames[k])),
+    }))
+  );
+  const slots = roster.characters.map((character) => character.forms.map((form) => form.slot));
+  return { characters: roster.characters, forms, slots, modes: roster.modes };
+}
+
+/**
+ * Stats of a form in a game mode, read from the precomputed mode table
+ * @param roster - Resolved roster
+ * @param characterIndex - Character index in roster.forms
+ * @param formIndex - Form index within the character
+ * @param mode - Game mode
+ * @returns CharacterStats - Form stats with the mode's defense, HP, balance and rates
+ */
+export function formStatsForMode(
+  roster: CompiledRoster,
+  characterIndex: number,
+  formIndex: number,
+  mode: GameMode
+): CharacterStats {
+  const table = roster.modes[mode];
+  const slot = roster.slots[characterIndex][formIndex];
+  return {
+    ...roster.forms[characterIndex][formIndex].stats,
+    defense: table.defense[slot] / 256,
+    realHp: table.realHp[slot],
+    balanceDefense: table.balanceDefense[slot] / 256,
+    realBalance: table.realBalance[slot],
+    poweredPunchRate: table.poweredPunchRate[slot] / 256,
+    cleanHitRate: table.cleanHitRate[slot] / 256,
+  };
+}
+
+/**
+ * Find a form in a compiled roster
+ * @param roster - Resolved roster
+ * @param formId - Form ID (e.g. 'kurama2', 'toguro_100')
+ * @returns All forms of the form's character and the form's index, or undefined
+ */
+export function findForm(
+  roster: CompiledRoster,
+  formId: CharacterId
+): { forms: CharacterData[]; index: number } | undefined {
+  for (const forms of roster.forms) {
+    const index = forms.findIndex((form) => form.id === formId);
+    if (index >= 0) {
+      return { forms, index };
+    }
+  }
+  return undefined;
+}
+
 /**
  * Get character name by ID (without loading full data)
  * @param characterId - Character ID
@@ -116,6 +275,7 @@ export function getCharacterName(characterId: CharacterId): string {
     hiei: '飛影',
     hiei_dragon: '黒龍波吸収飛影',
     genkai: '幻海',
+    genkai_rejuvenated: '若幻海',
     genkai_young: '幻海（若）',
     suzuku: '鈴駒',
     touya: '凍矢',
@@ -128,6 +288,7 @@ export function getCharacterName(characterId: CharacterId): string {
     toguro_elder: '戸愚呂兄',
     toguro_younger: '戸愚呂弟',
     toguro_80: '80%',
+    toguro_younger_100: '100%',
     toguro_100: '100%',
     gourmet: '神谷',
     makintaro: '刃霧',
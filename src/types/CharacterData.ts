@@ -17,6 +17,7 @@ export type CharacterId =
   | 'hiei'          // 飛影
   | 'hiei_dragon'   // 黒龍波吸収飛影
   | 'genkai'        // 幻海
+  | 'genkai_rejuvenated' // 若幻海 (幻海's form)
   | 'genkai_young'  // 幻海(若)
   | 'suzuku'        // 鈴駒
   | 'touya'         // 凍矢
@@ -29,6 +30,7 @@ export type CharacterId =
   | 'toguro_elder'  // 戸愚呂兄
   | 'toguro_younger'// 戸愚呂弟
   | 'toguro_80'     // 80%
+  | 'toguro_younger_100' // 100% (戸愚呂弟's form)
   | 'toguro_100'    // 100%
   | 'gourmet'       // 神谷
   | 'makintaro'     // 刃霧
@@ -229,3 +231,80 @@ export interface CharacterData {
   transformInto?: CharacterId;
   transformCondition?: string;
 }
+
+/**
+ * One form in the compiled roster (roster.json)
+ * moves[k] and frames[k] index the roster's shared tables for the same command
+ */
+export interface CompiledForm {
+  id: CharacterId;
+  name: string;
+  nameEn: string;
+  slot: number;                 // Index into the roster's per-mode tables
+  stats: CharacterStats;        // Story mode values
+  moves: number[];
+  frames: number[];
+}
+
+/**
+ * Character page in the compiled roster, with every 戦闘コマンド form
+ */
+export interface CompiledCharacter {
+  id: CharacterId;
+  name: string;
+  pageId: number;
+  forms: CompiledForm[];
+}
+
+/**
+ * Game modes with their own defense values (015-基本性能.md)
+ */
+export type GameMode =
+  | 'normal'       // ストーリー
+  | 'round_robin'; // 総当たり戦
+
+/**
+ * Mode-dependent stats, one array per field indexed by form slot
+ * Rates are the x/256 bytes; real values are precomputed from them
+ */
+export interface ModeStatTable {
+  defense: number[];            // 威力倍率 x/256
+  realHp: number[];             // 96 / (defense / 256)
+  defenseUp: number[];          // 防御力UP 威力倍率 x/256 (0 if none)
+  realHpUp: number[];           // 96 / (defenseUp / 256) (0 if none)
+  balanceDefense: number[];     // 奪バランス値倍率 x/256
+  realBalance: number[];        // 256 / (balanceDefense / 256)
+  poweredPunchRate: number[];   // 気合いの入ったパンチ発生率 x/256
+  cleanHitRate: number[];       // クリーンヒット発生率 x/256
+}
+
+/**
+ * Compiled roster file (roster.json, from docs/spec_from_html/character_compiler.py)
+ * Identical move rows and frame timings are stored once and shared by index
+ */
+export interface CompiledRosterFile {
+  version: number;
+  moves: MoveDefinition[];
+  frames: MoveFrames[];
+  modes: Record<GameMode, ModeStatTable>;
+  characters: CompiledCharacter[];
+}
+
+/**
+ * One content-hashed artifact in manifest.json
+ * The URL changes whenever the content does, so it can be cached as immutable
+ */
+export interface DataArtifact {
+  url: string;     // e.g. /data/dist/yusuke/moves.bc4213d3dc311e54.json
+  hash: string;    // Truncated SHA-256 of the minified JSON
+  bytes: number;   // Uncompressed size
+}
+
+/**
+ * Data manifest (manifest.json, from docs/spec_from_html/bundle_character_data.py)
+ */
+export interface DataManifest {
+  version: number;
+  characters: Partial<Record<CharacterId, Record<'stats' | 'moves' | 'frames', DataArtifact>>>;
+  roster?: DataArtifact;
+}
@@ -1,8 +1,26 @@
 import { defineConfig } from 'vite';
 import { resolve } from 'path';
 
+// Touched by docs/spec_from_html/watch_corpus.py after it rewrites character data
+const reloadStamp = resolve(__dirname, 'public/data/.reload');
+
 export default defineConfig({
   base: './',
+  plugins: [
+    {
+      name: 'character-data-reload',
+      configureServer(server) {
+        server.watcher.add(reloadStamp);
+        const reload = (file: string) => {
+          if (resolve(file) === reloadStamp) {
+            server.ws.send({ type: 'full-reload' });
+          }
+        };
+        server.watcher.on('add', reload);
+        server.watcher.on('change', reload);
+      },
+    },
+  ],
   build: {
     target: 'es2020',
     outDir: 'dist',